@@ -16,9 +16,9 @@ load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
 TRADE_KEY = os.getenv("TRADE_KEY")
 TRADE_SECRET = os.getenv("TRADE_SECRET")
 
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET)
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
-BASE_URL = "https://paper-api.alpaca.markets"
+BASE_URL = os.getenv("ALPACA_API_URL", "https://paper-api.alpaca.markets")
 
 # data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
 trade_api = tradeapi.REST(TRADE_KEY, TRADE_SECRET, BASE_URL, api_version="v2")
@@ -12,7 +12,7 @@ TRADE_KEY = os.getenv("TRADE_KEY")
 TRADE_SECRET = os.getenv("TRADE_SECRET")
 
 # Create API object
-BASE_URL = "https://paper-api.alpaca.markets"
+BASE_URL = os.getenv("ALPACA_API_URL", "https://paper-api.alpaca.markets")
 trade_api = tradeapi.REST(TRADE_KEY, TRADE_SECRET, BASE_URL, api_version="v2")
 
 # Get account information
@@ -1,11 +1,12 @@
-import pandas as pd
 from datetime import datetime, timezone, timedelta
 import pytz
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_store import BarStore
 
 # Load environment variables from .env file
 load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
@@ -15,39 +16,24 @@ DATA_KEY = os.getenv("DATA_KEY")
 DATA_SECRET = os.getenv("DATA_SECRET")
 
 # Initialize Alpaca historical data client
-data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
+data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # Get current NY time
 ny_timezone = pytz.timezone("America/New_York")
 current_time_ny = datetime.now(ny_timezone)
 print("Date and time (NY):", current_time_ny.strftime("%Y-%m-%d %H:%M:%S"))
 
-# Define UTC time range (last 10 minutes) in ISO format
+# Define UTC time range (last 10 minutes)
 utc_now = datetime.now(timezone.utc)
 start_time = utc_now - timedelta(minutes=10)
-start = start_time.isoformat()
-end = utc_now.isoformat()
 
-# Define symbol and request parameters
+# Fetch historical bars through the local bar store (only uncached minutes hit the API)
 symbol = "SPY"
-request_params = StockBarsRequest(
-    symbol_or_symbols=[symbol],
-    timeframe=TimeFrame.Minute,
-    start=start,
-    end=end,
-    limit=1000,
-    feed="iex"
-)
-
-# Fetch historical bars
-bars = data_client.get_stock_bars(request_params)
+store = BarStore(data_client)
+price_bars = store.frame(symbol, TimeFrame.Minute, start_time, utc_now)
 
 # Handle response safely
-bars_data = bars.data.get(symbol)
-if bars_data:
-    # Convert to DataFrame
-    price_bars = pd.DataFrame([bar.model_dump() for bar in bars_data])
-
+if not price_bars.empty:
     # Create output directory and filename
     output_dir = os.path.join(os.getcwd(), "Historical Files")
     os.makedirs(output_dir, exist_ok=True)
@@ -21,7 +21,7 @@ headers = {
 symbol = "SPY"
 params = {"symbols": symbol}
 response = requests.get(
-    "https://data.alpaca.markets/v2/stocks/quotes/latest", 
+    os.getenv("ALPACA_API_URL", "https://data.alpaca.markets") + "/v2/stocks/quotes/latest", 
     headers = headers, 
     params = params)
 json_data = response.json()
@@ -32,7 +32,7 @@ print(f"Ask: {ask}, Bid: {bid}")
 
 ### Get the latest OHLCV bar of prices
 response = requests.get(
-    "https://data.alpaca.markets/v2/stocks/bars/latest",
+    os.getenv("ALPACA_API_URL", "https://data.alpaca.markets") + "/v2/stocks/bars/latest",
     headers=headers,
     params=params
 )
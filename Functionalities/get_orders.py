@@ -15,7 +15,7 @@ TRADE_KEY = os.getenv("TRADE_KEY")
 TRADE_SECRET = os.getenv("TRADE_SECRET")
 
 # Initialize client
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET)
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # Get closed orders (change to OPEN if needed)
 orders = trading_client.get_orders(filter=GetOrdersRequest(status=QueryOrderStatus.CLOSED))
@@ -13,7 +13,7 @@ TRADE_KEY = os.getenv("TRADE_KEY")
 TRADE_SECRET = os.getenv("TRADE_SECRET")
 
 # Initialize client
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET)
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # Get all open positions
 portfolio = trading_client.get_all_positions()
@@ -15,10 +15,10 @@ DATA_SECRET = os.getenv("DATA_SECRET")
 TRADE_KEY = os.getenv("TRADE_KEY")
 TRADE_SECRET = os.getenv("TRADE_SECRET")
 
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET)
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
-BASE_URL = "https://paper-api.alpaca.markets"
+BASE_URL = os.getenv("ALPACA_API_URL", "https://paper-api.alpaca.markets")
 trade_api = tradeapi.REST(TRADE_KEY, TRADE_SECRET, BASE_URL, api_version = "v2")
 
 
@@ -57,7 +57,7 @@ headers = {
 params = {"symbols": symbol}
 
 response = requests.get(
-    "https://data.alpaca.markets/v2/stocks/quotes/latest", 
+    os.getenv("ALPACA_API_URL", "https://data.alpaca.markets") + "/v2/stocks/quotes/latest", 
     headers = headers, 
     params = params)
 json_data = response.json()
@@ -1,12 +1,22 @@
+import argparse
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta, timezone
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
 import os
-from ta.volatility import BollingerBands
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_store import BarStore
+from trading import indicators
+from trading.live_chart import load_charts, run_live
+
+parser = argparse.ArgumentParser(description="Bollinger Band signals of one symbol; --live keeps several updating.")
+parser.add_argument("--symbols", nargs="+", default=["SPY"], help="with --live, one window per symbol")
+parser.add_argument("--live", action="store_true", help="keep the chart updating with new bars and the last trade")
+parser.add_argument("--refresh", type=float, default=1.0, help="--live: seconds between redraws")
+args = parser.parse_args()
 
 # Load Alpaca API keys
 load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
@@ -14,10 +24,10 @@ DATA_KEY = os.getenv("DATA_KEY")
 DATA_SECRET = os.getenv("DATA_SECRET")
 
 # Alpaca data client
-client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
+client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # ---------------- PARAMETERS ---------------- #
-symbol = "SPY"
+symbol = args.symbols[0].upper()
 bar_count_days = 365
 bb_period = 20
 
@@ -27,29 +37,30 @@ start_time = end_time - timedelta(days=bar_count_days)
 timeframe = TimeFrame.Day
 
 # ---------------- FETCH DATA ---------------- #
-params = StockBarsRequest(
-    symbol_or_symbols=[symbol],
-    timeframe=timeframe,
-    start=start_time.isoformat(),
-    end=end_time.isoformat(),
-    feed="iex",
-    limit=1000
-)
-bars = client.get_stock_bars(params).data.get(symbol)
-
-if not bars:
+# Local bar store: only days not cached yet go to the API
+store = BarStore(client)
+
+# ---------------- LIVE MODE ---------------- #
+# Blitted redraws, LTTB-decimated history
+if args.live:
+    charts = load_charts(store, [s.upper() for s in args.symbols], timeframe, start_time, end_time,
+                         bar_interval=timedelta(days=1), bb_window=bb_period, macd=False, rsi=False,
+                         title="Daily Bollinger Bands (live)")
+    if charts:
+        run_live(charts, client, timeframe, timedelta(days=1), refresh=args.refresh)
+    sys.exit()
+
+df = store.frame(symbol, timeframe, start_time, end_time)
+
+if df.empty:
     print(f"No data returned for {symbol}")
     exit()
 
 # ---------------- DATAFRAME ---------------- #
-df = pd.DataFrame([bar.model_dump() for bar in bars])
 df['time'] = pd.to_datetime(df['timestamp'])
 
 # ---------------- BOLLINGER BANDS ---------------- #
-bb = BollingerBands(close=df['close'], window=bb_period, window_dev=2)
-df['bb_mavg'] = bb.bollinger_mavg()
-df['bb_upper'] = bb.bollinger_hband()
-df['bb_lower'] = bb.bollinger_lband()
+df['bb_mavg'], df['bb_upper'], df['bb_lower'] = indicators.bollinger_bands(df['close'], window=bb_period, window_dev=2)
 
 # ---------------- SIGNALS ---------------- #
 df['buy_signal'] = (df['close'] < df['bb_lower'])
@@ -1,12 +1,23 @@
+import argparse
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta, timezone
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
 import os
-from ta.trend import MACD
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_store import BarStore
+from trading import indicators
+from trading.live_chart import load_charts, run_live
+
+parser = argparse.ArgumentParser(description="MACD buy/sell signals of one symbol; --live keeps several updating.")
+parser.add_argument("--symbols", nargs="+", default=["SPY"], help="with --live, one window per symbol")
+parser.add_argument("--live", action="store_true", help="keep the chart updating with new bars and the last trade")
+parser.add_argument("--refresh", type=float, default=1.0, help="--live: seconds between redraws")
+args = parser.parse_args()
 
 # Load Alpaca API keys
 load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
@@ -14,10 +25,10 @@ DATA_KEY = os.getenv("DATA_KEY")
 DATA_SECRET = os.getenv("DATA_SECRET")
 
 # Alpaca client setup
-client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
+client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # Parameters
-symbol = "SPY"
+symbol = args.symbols[0].upper()
 days = 365
 
 # Timeframe
@@ -25,29 +36,28 @@ end_time = datetime.now(timezone.utc)
 start_time = end_time - timedelta(days=days)
 timeframe = TimeFrame.Day
 
-# Fetch OHLCV
-request = StockBarsRequest(
-    symbol_or_symbols=[symbol],
-    timeframe=timeframe,
-    start=start_time.isoformat(),
-    end=end_time.isoformat(),
-    feed="iex",
-    limit=1000
-)
-bars = client.get_stock_bars(request).data.get(symbol)
-
-if not bars:
+# Fetch OHLCV (local bar store, API only for missing days)
+store = BarStore(client)
+
+# Live mode: blitted redraws, LTTB-decimated history
+if args.live:
+    charts = load_charts(store, [s.upper() for s in args.symbols], timeframe, start_time, end_time,
+                         bar_interval=timedelta(days=1), bands=False, rsi=False, title="MACD (Daily, live)")
+    if charts:
+        run_live(charts, client, timeframe, timedelta(days=1), refresh=args.refresh)
+    sys.exit()
+
+df = store.frame(symbol, timeframe, start_time, end_time)
+
+if df.empty:
     print(f"No data returned for {symbol}")
     exit()
 
 # DataFrame
-df = pd.DataFrame([bar.model_dump() for bar in bars])
 df['time'] = pd.to_datetime(df['timestamp'])
 
 # MACD calculation
-macd = MACD(close=df['close'], window_slow=26, window_fast=12, window_sign=9)
-df['macd'] = macd.macd()
-df['signal'] = macd.macd_signal()
+df['macd'], df['signal'], _ = indicators.macd(df['close'], window_slow=26, window_fast=12, window_sign=9)
 df['histogram'] = df['macd'] - df['signal']
 
 # Buy/sell signals
@@ -67,7 +77,7 @@ ax1.grid(True)
 ax1.legend()
 
 # --------- MACD Indicator Subplot --------- #
-ax2.bar(df['time'], df['histogram'], label='MACD Histogram', color=['green' if val >= 0 else 'red' for val in df['histogram']])
+ax2.bar(df['time'], df['histogram'], label='MACD Histogram', color=np.where(df['histogram'] >= 0, 'green', 'red'))
 ax2.plot(df['time'], df['macd'], label='MACD Line', color='purple')
 ax2.plot(df['time'], df['signal'], label='Signal Line', color='orange')
 ax2.axhline(0, linestyle='--', color='gray', linewidth=1)
@@ -1,12 +1,38 @@
+import argparse
+import time
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta, timezone
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
 import os
-from ta.momentum import RSIIndicator
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_store import BarStore
+from trading import indicators
+from trading.audit_log import AuditWriter
+from trading.live_chart import load_charts, run_live
+from trading.rsi_scanner import ALERT_COLUMNS, RSIScanner
+from trading.scheduler import BarScheduler
+
+parser = argparse.ArgumentParser(description="RSI chart of one symbol, or headless RSI alerts for a whole universe.")
+parser.add_argument("--scan", action="store_true", help="headless scanner: alert on every symbol each bar")
+universe = parser.add_mutually_exclusive_group()
+universe.add_argument("--symbols", nargs="+", default=["SPY"])
+universe.add_argument("--symbols-file", help="one symbol per line (e.g. the S&P 1500)")
+parser.add_argument("--granularity", choices=["minute", "hour", "day"], default=None,
+                    help="bar size (default: hour for the chart, minute for --scan)")
+parser.add_argument("--period", type=int, default=14, help="RSI window")
+parser.add_argument("--upper", type=float, default=70.0, help="overbought threshold")
+parser.add_argument("--lower", type=float, default=30.0, help="oversold threshold")
+parser.add_argument("--band", type=float, default=5.0,
+                    help="hysteresis: a zone re-arms only after RSI moves this far back inside")
+parser.add_argument("--batch", type=int, default=200, help="symbols per bars request")
+parser.add_argument("--once", action="store_true", help="--scan: one sweep, print the extremes and exit")
+parser.add_argument("--live", action="store_true", help="keep the chart updating (one window per symbol)")
+parser.add_argument("--refresh", type=float, default=1.0, help="--live: seconds between redraws")
+args = parser.parse_args()
 
 # Load .env for Alpaca API keys
 load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
@@ -14,12 +40,12 @@ DATA_KEY = os.getenv("DATA_KEY")
 DATA_SECRET = os.getenv("DATA_SECRET")
 
 # Initialize Alpaca historical data client
-data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
+data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # ------------------- PARAMETERS ------------------- #
-symbol = "SPY"
-granularity = "hour"  # Options: "minute", "hour", "day"
-rsi_period = 14
+symbol = args.symbols[0].upper()
+granularity = args.granularity or ("minute" if args.scan else "hour")  # Options: "minute", "hour", "day"
+rsi_period = args.period
 bars_to_fetch = 500
 
 # ------------------ TIMEFRAME CONFIG -------------- #
@@ -27,48 +53,88 @@ end_time = datetime.now(timezone.utc)
 
 if granularity == "minute":
     timeframe = TimeFrame.Minute
-    start_time = end_time - timedelta(minutes=bars_to_fetch)
+    bar_interval = timedelta(minutes=1)
 elif granularity == "hour":
     timeframe = TimeFrame.Hour
-    start_time = end_time - timedelta(hours=bars_to_fetch)
+    bar_interval = timedelta(hours=1)
 elif granularity == "day":
     timeframe = TimeFrame.Day
-    start_time = end_time - timedelta(days=bars_to_fetch)
+    bar_interval = timedelta(days=1)
+start_time = end_time - bar_interval * bars_to_fetch
+
+if args.symbols_file:
+    with open(args.symbols_file) as f:
+        symbols = [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
 else:
-    raise ValueError("Invalid granularity: use 'minute', 'hour', or 'day'")
+    symbols = [s.upper() for s in args.symbols]
+
+# ------------------ UNIVERSE SCANNER ------------------- #
+# Batched multi-symbol requests, one (symbols x bars) RSI update per sweep, no window
+if args.scan:
+    scanner = RSIScanner(data_client, symbols, timeframe=timeframe, bar_interval=bar_interval, window=rsi_period,
+                         upper=args.upper, lower=args.lower, band=args.band, batch_size=args.batch)
+    alert_log = AuditWriter("rsi_alerts", ALERT_COLUMNS)
+    scheduler = BarScheduler(bar_interval=bar_interval, settle_seconds=2.0)
+    print(f"🚀 RSI scanner | {len(scanner.symbols)} symbols | {granularity} bars | "
+          f"{args.lower:g}/{args.upper:g} ± {args.band:g}")
+    try:
+        while True:
+            for alert in scanner.scan():
+                alert_log.append(alert)
+                if alert["zone"] == "overbought":
+                    print(f"📈 ALERT: {alert['symbol']} RSI crossed above {args.upper:g} (Overbought) "
+                          f"{alert['rsi']:.2f} @ {alert['timestamp']}")
+                else:
+                    print(f"📉 ALERT: {alert['symbol']} RSI dropped below {args.lower:g} (Oversold) "
+                          f"{alert['rsi']:.2f} @ {alert['timestamp']}")
+            t = scanner.timings
+            print(f"⏱️ {time.strftime('%H:%M:%S')} | {len(scanner.symbols)} symbols | {t['requests']} requests | "
+                  f"{t['bars']} bars | fetch {t['fetch_s']:.2f}s | RSI {t['compute_ms']:.1f}ms")
+            if args.once:
+                snapshot = scanner.snapshot().dropna(subset=["rsi"])
+                extremes = snapshot if len(snapshot) <= 20 else pd.concat([snapshot.head(10), snapshot.tail(10)])
+                print(extremes.to_string(index=False))
+                break
+            scheduler.wait()
+    except KeyboardInterrupt:
+        print("🛑 Stopped.")
+    finally:
+        alert_log.close()
+        scheduler.close()
+    sys.exit()
+
+# ------------------ LIVE CHART ------------------- #
+# Blitted redraws of price + RSI, LTTB-decimated history, one window per symbol
+if args.live:
+    charts = load_charts(BarStore(data_client), symbols, timeframe, start_time, end_time, bar_interval=bar_interval,
+                         bands=False, macd=False, rsi_window=rsi_period, upper=args.upper, lower=args.lower,
+                         title=f"RSI ({granularity.capitalize()}, live)")
+    if charts:
+        run_live(charts, data_client, timeframe, bar_interval, refresh=args.refresh)
+    sys.exit()
 
 # ------------------ FETCH OHLCV ------------------- #
-request_params = StockBarsRequest(
-    symbol_or_symbols=[symbol],
-    timeframe=timeframe,
-    start=start_time.isoformat(),
-    end=end_time.isoformat(),
-    feed="iex",
-    limit=bars_to_fetch
-)
-
-bars = data_client.get_stock_bars(request_params)
-bars_data = bars.data.get(symbol)
-
-if not bars_data:
+# Local bar store: only ranges not cached yet go to the API
+store = BarStore(data_client)
+df = store.frame(symbol, timeframe, start_time, end_time).head(bars_to_fetch)
+
+if df.empty:
     print(f"No data returned for {symbol}")
     exit()
 
 # ------------------ PROCESS & COMPUTE RSI ------------------- #
-df = pd.DataFrame([bar.model_dump() for bar in bars_data])
 df['time'] = pd.to_datetime(df['timestamp'])
 
-rsi = RSIIndicator(close=df['close'], window=rsi_period)
-df['RSI'] = rsi.rsi()
+df['RSI'] = indicators.rsi(df['close'], window=rsi_period)
 
 # ------------------ ALERT SYSTEM ------------------- #
 latest_rsi = df['RSI'].iloc[-1]
 print(f"Latest RSI for {symbol} ({granularity}): {latest_rsi:.2f}")
 
-if latest_rsi > 70:
-    print("📈 ALERT: RSI crossed above 70 (Overbought)")
-elif latest_rsi < 30:
-    print("📉 ALERT: RSI dropped below 30 (Oversold)")
+if latest_rsi > args.upper:
+    print(f"📈 ALERT: RSI crossed above {args.upper:g} (Overbought)")
+elif latest_rsi < args.lower:
+    print(f"📉 ALERT: RSI dropped below {args.lower:g} (Oversold)")
 else:
     print("✅ RSI is in neutral range")
 
@@ -83,9 +149,9 @@ ax1.grid(True)
 ax1.legend()
 
 # RSI chart
-ax2.plot(df['time'], df['RSI'], label='RSI (14)', color='purple')
-ax2.axhline(70, linestyle='--', color='red', label='Overbought (70)')
-ax2.axhline(30, linestyle='--', color='green', label='Oversold (30)')
+ax2.plot(df['time'], df['RSI'], label=f'RSI ({rsi_period})', color='purple')
+ax2.axhline(args.upper, linestyle='--', color='red', label=f'Overbought ({args.upper:g})')
+ax2.axhline(args.lower, linestyle='--', color='green', label=f'Oversold ({args.lower:g})')
 ax2.set_title("Relative Strength Index (RSI)")
 ax2.set_ylabel("RSI Value")
 ax2.set_xlabel("Time")
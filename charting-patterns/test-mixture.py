@@ -1,14 +1,23 @@
+import argparse
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta, timezone
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from dotenv import load_dotenv
 import os
-from ta.volatility import BollingerBands
-from ta.trend import MACD
-from ta.momentum import RSIIndicator
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_store import BarStore
+from trading import indicators
+from trading.live_chart import load_charts, run_live
+
+parser = argparse.ArgumentParser(description="Bollinger Bands, MACD and RSI of one symbol; --live keeps several updating.")
+parser.add_argument("--symbols", nargs="+", default=["SPY"], help="with --live, one window per symbol")
+parser.add_argument("--live", action="store_true", help="keep the chart updating with new bars and the last trade")
+parser.add_argument("--refresh", type=float, default=1.0, help="--live: seconds between redraws")
+args = parser.parse_args()
 
 # -------- Load API keys -------- #
 load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
@@ -16,10 +25,10 @@ DATA_KEY = os.getenv("DATA_KEY")
 DATA_SECRET = os.getenv("DATA_SECRET")
 
 # -------- Alpaca client -------- #
-client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
+client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # -------- Parameters -------- #
-symbol = "SPY"
+symbol = args.symbols[0].upper()
 days = 365
 
 # -------- Timeframe -------- #
@@ -27,47 +36,41 @@ end = datetime.now(timezone.utc)
 start = end - timedelta(days=days)
 timeframe = TimeFrame.Day
 
-# -------- Fetch Data -------- #
-request = StockBarsRequest(
-    symbol_or_symbols=[symbol],
-    timeframe=timeframe,
-    start=start.isoformat(),
-    end=end.isoformat(),
-    feed="iex",
-    limit=1000
-)
-bars = client.get_stock_bars(request).data.get(symbol)
-if not bars:
+# -------- Fetch Data (local bar store, API only for missing days) -------- #
+store = BarStore(client)
+
+# -------- Live mode: blitted redraws, LTTB-decimated history -------- #
+if args.live:
+    charts = load_charts(store, [s.upper() for s in args.symbols], timeframe, start, end,
+                         bar_interval=timedelta(days=1), title="Bollinger Bands, MACD, RSI (Daily, live)")
+    if charts:
+        run_live(charts, client, timeframe, timedelta(days=1), refresh=args.refresh)
+    sys.exit()
+
+df = store.frame(symbol, timeframe, start, end)
+if df.empty:
     print(f"No data returned for {symbol}")
     exit()
 
 # -------- Data Processing -------- #
-df = pd.DataFrame([bar.model_dump() for bar in bars])
 df['time'] = pd.to_datetime(df['timestamp'])
 
 # -------- Bollinger Bands -------- #
-bb = BollingerBands(close=df['close'], window=20, window_dev=2)
-df['bb_mavg'] = bb.bollinger_mavg()
-df['bb_upper'] = bb.bollinger_hband()
-df['bb_lower'] = bb.bollinger_lband()
+df['bb_mavg'], df['bb_upper'], df['bb_lower'] = indicators.bollinger_bands(df['close'], window=20, window_dev=2)
 
 # Buy/Sell signals from Bollinger Band
 df['bb_buy'] = df['close'] < df['bb_lower']
 df['bb_sell'] = df['close'] > df['bb_upper']
 
 # -------- MACD -------- #
-macd = MACD(close=df['close'], window_slow=26, window_fast=12, window_sign=9)
-df['macd'] = macd.macd()
-df['macd_signal'] = macd.macd_signal()
-df['macd_hist'] = df['macd'] - df['macd_signal']
+df['macd'], df['macd_signal'], df['macd_hist'] = indicators.macd(df['close'], window_slow=26, window_fast=12, window_sign=9)
 
 # MACD cross signals
 df['macd_buy'] = (df['macd'] > df['macd_signal']) & (df['macd'].shift(1) < df['macd_signal'].shift(1))
 df['macd_sell'] = (df['macd'] < df['macd_signal']) & (df['macd'].shift(1) > df['macd_signal'].shift(1))
 
 # -------- RSI -------- #
-rsi = RSIIndicator(close=df['close'], window=14)
-df['rsi'] = rsi.rsi()
+df['rsi'] = indicators.rsi(df['close'], window=14)
 
 # -------- PLOTTING -------- #
 fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(16, 12), sharex=True, gridspec_kw={'height_ratios': [3, 1.5, 1]})
@@ -91,7 +94,7 @@ ax1.grid(True)
 ax1.legend(loc='upper left')
 
 # --- MACD Panel --- #
-ax2.bar(df['time'], df['macd_hist'], color=['green' if v >= 0 else 'red' for v in df['macd_hist']], label='MACD Histogram')
+ax2.bar(df['time'], df['macd_hist'], color=np.where(df['macd_hist'] >= 0, 'green', 'red'), label='MACD Histogram')
 ax2.plot(df['time'], df['macd'], color='purple', label='MACD Line')
 ax2.plot(df['time'], df['macd_signal'], color='orange', label='Signal Line')
 ax2.axhline(0, linestyle='--', color='gray', linewidth=1)
@@ -3,60 +3,47 @@ from datetime import datetime, timedelta, timezone
 import os
 from dotenv import load_dotenv
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.trend import MACD
-from ta.volume import VolumeWeightedAveragePrice
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_store import BarStore
+from trading import indicators
+from trading.backtest import run_backtest, summarize
 
 # ============ Load Alpaca API ============ #
 load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
 DATA_KEY = os.getenv("DATA_KEY")
 DATA_SECRET = os.getenv("DATA_SECRET")
-client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
+client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
 
 # ============ Parameters ============ #
 symbol = "QQQ"
 timeframe = TimeFrame.Minute
 end = datetime(2025, 6, 25, 16, 0, tzinfo=timezone.utc)
 start = end - timedelta(days=30)
+trailing_stop = 0.985  # same 1.5% trailing stop as universal-strat-run.py (None = signal exits only)
 
 # ============ Fetch Historical Data ============ #
-request = StockBarsRequest(
-    symbol_or_symbols=[symbol],
-    timeframe=timeframe,
-    start=start.isoformat(),
-    end=end.isoformat(),
-    feed="iex",
-    limit=50000
-)
-
-bars = client.get_stock_bars(request).data.get(symbol)
-if not bars:
+# Served from the local bar store; only ranges not cached yet go to the API
+store = BarStore(client)
+df = store.frame(symbol, timeframe, start, end)
+if df.empty:
     print("No data returned.")
     exit()
 
-df = pd.DataFrame([bar.model_dump() for bar in bars])
 df['time'] = pd.to_datetime(df['timestamp'])
 df.set_index('time', inplace=True)
 
 # ============ Indicators ============ #
-bb = BollingerBands(close=df['close'], window=10, window_dev=1.5)
-df['bb_upper'] = bb.bollinger_hband()
-df['bb_lower'] = bb.bollinger_lband()
+_, df['bb_upper'], df['bb_lower'] = indicators.bollinger_bands(df['close'], window=10, window_dev=1.5)
 
-macd = MACD(close=df['close'], window_fast=9, window_slow=21, window_sign=7)
-df['macd'] = macd.macd()
-df['macd_signal'] = macd.macd_signal()
+df['macd'], df['macd_signal'], _ = indicators.macd(df['close'], window_slow=21, window_fast=9, window_sign=7)
 
-atr = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=5)
-df['atr'] = atr.average_true_range()
-atr_median = df['atr'].rolling(window=50).median()
+df['atr'] = indicators.average_true_range(df['high'], df['low'], df['close'], window=5)
+atr_median = indicators.rolling_median(df['atr'], 50)
 
-vwap = VolumeWeightedAveragePrice(
-    high=df['high'], low=df['low'], close=df['close'], volume=df['volume'], window=30
-)
-df['vwap'] = vwap.volume_weighted_average_price()
+df['vwap'] = indicators.volume_weighted_average_price(df['high'], df['low'], df['close'], df['volume'], window=30)
 
 # ============ Signal Logic ============ #
 df['Buy_signal'] = (
@@ -74,38 +61,20 @@ df['Sell_signal'] = (
 )
 
 # ============ Backtest ============ #
-in_position = False
-entry_price = 0
-trades = []
-
-for i in range(len(df)):
-    if df.iloc[i]['Buy_signal'] and not in_position:
-        entry_time = df.index[i]
-        entry_price = df.iloc[i]['close']
-        in_position = True
-    elif df.iloc[i]['Sell_signal'] and in_position:
-        exit_time = df.index[i]
-        exit_price = df.iloc[i]['close']
-        pnl = (exit_price - entry_price) * 100
-        trades.append({
-            "Entry Time": entry_time,
-            "Exit Time": exit_time,
-            "Entry Price": entry_price,
-            "Exit Price": exit_price,
-            "PnL ($)": round(pnl, 2),
-            "Return (%)": round(((exit_price - entry_price) / entry_price) * 100, 2)
-        })
-        in_position = False
+# Entries/exits straight from the signal arrays (no per-row df.iloc), trailing stop included
+results_df = run_backtest(
+    df['close'].to_numpy(), df['Buy_signal'].to_numpy(), df['Sell_signal'].to_numpy(),
+    timestamps=df.index, trailing_stop=trailing_stop, qty=100
+)
 
 # ============ Results ============ #
-results_df = pd.DataFrame(trades)
-
 if results_df.empty:
     print("\n⚠️  No trades executed. Try adjusting thresholds or timeframe.")
 else:
-    total_pnl = results_df["PnL ($)"].sum()
-    avg_return = results_df["Return (%)"].mean()
-    win_rate = (results_df["PnL ($)"] > 0).sum() / len(results_df) * 100
+    stats = summarize(results_df)
+    total_pnl = stats["total_pnl"]
+    avg_return = stats["avg_return"]
+    win_rate = stats["win_rate"]
 
     print("\n⚡ HFT Strategy Results on QQQ (2025, 1-min)")
     print(results_df.to_string(index=False))
@@ -0,0 +1,80 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.data.timeframe import TimeFrame
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_store import BarStore
+from trading.sweep import sweep, parameter_grid, UNIVERSAL_PARAMS, SCALP_BTC_PARAMS
+
+# ============ Parameter grid ============ #
+# Expensive indicators first so neighbouring combinations share them.
+# Includes the universal-strat-run and scalp-btc settings, each with its own exit rule; 23,328 combinations.
+GRID = dict(
+    atr_window=[5, 10, 14],
+    atr_median_window=[15, 30, 50],
+    bb_window=[10, 15, 20],
+    bb_dev=[1.5, 2, 2.5],
+    macd_fast=[6, 9, 12],
+    macd_slow=[21, 26],
+    macd_sign=[7, 9],
+    vwap_window=[15, 30, 60],
+    trailing_stop=[None, 0.985, 0.99, 0.995],
+    sell_rule=["all", "bb_macd"],
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the BB/MACD/ATR/VWAP strategy parameters over historical bars.")
+    parser.add_argument("--symbol", default="QQQ")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--end", default="2025-06-25T16:00:00+00:00", help="UTC end of the backtest window")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    # ============ Load Alpaca API ============ #
+    load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
+    client = StockHistoricalDataClient(os.getenv("DATA_KEY"), os.getenv("DATA_SECRET"), url_override=os.getenv("ALPACA_API_URL"))
+
+    # ============ Bars (cached locally after the first run) ============ #
+    end = datetime.fromisoformat(args.end).astimezone(timezone.utc)
+    start = end - timedelta(days=args.days)
+    bars = BarStore(client).bars(args.symbol, TimeFrame.Minute, start, end)
+    if len(bars["close"]) == 0:
+        print("No data returned.")
+        return
+
+    # ============ Sweep ============ #
+    grid = parameter_grid(**GRID)
+    print(f"🔬 Sweeping {len(grid)} parameter sets over {len(bars['close'])} {args.symbol} bars "
+          f"({start:%Y-%m-%d} -> {end:%Y-%m-%d})")
+    started = datetime.now()
+    results = sweep(bars, grid, workers=args.workers)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    # ============ Results ============ #
+    file_name = f"sweep_{args.symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    results.to_csv(file_name, index=False)
+
+    print(f"\n⚡ Top {args.top} by total PnL")
+    print(results.head(args.top).to_string(index=False))
+
+    # Where the parameter sets the live scripts use today rank
+    for name, params in (("universal-strat-run", UNIVERSAL_PARAMS), ("scalp-btc", SCALP_BTC_PARAMS)):
+        match = results.index[(results[list(params)] == list(params.values())).all(axis=1)]
+        if len(match):
+            row = results.loc[match[0]]
+            print(f"📌 {name} params: rank {match[0] + 1}/{len(results)} | PnL ${row['total_pnl']:.2f} | "
+                  f"Win Rate {row['win_rate']:.2f}% | Trades {int(row['trades'])}")
+        else:
+            print(f"📌 {name} params are not in the grid")
+
+    print(f"\n⏱️ {len(grid)} combinations in {elapsed:.1f}s | results saved to {file_name}")
+
+
+if __name__ == "__main__":
+    main()
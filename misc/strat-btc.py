@@ -1,20 +1,17 @@
 import os
-import time
-from datetime import datetime, timezone, timedelta
-import pandas as pd
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 from alpaca.data.historical import CryptoHistoricalDataClient
-from alpaca.data.requests import CryptoBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
-from ta.trend import MACD
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_window import RollingBarWindow, fetch_new_bars
+from trading.incremental import StrategyIndicators
+from trading.scheduler import BarScheduler
+from trading.notifier import EmailNotifier
 
 # =============================================
 # 🔐 Load credentials
@@ -34,8 +31,8 @@ EMAIL_RECEIVER = os.getenv("EMAIL_RECEIVER")
 # =============================================
 # 📡 Alpaca crypto clients
 # =============================================
-crypto_client = CryptoHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
+crypto_client = CryptoHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
 
 # =============================================
 # ⚙️ Strategy settings
@@ -48,19 +45,26 @@ in_position = False
 highest_price_since_entry = None
 entry_price = None
 
+# Only bars newer than the last one we hold are requested each loop
+bar_window = RollingBarWindow(SYMBOL, maxlen=120)
+
+# BB(10, 1.5) / MACD(9, 21, 7) / ATR(5) / ATR median(50) / VWAP(30), one bar at a time
+indicators = StrategyIndicators(
+    bb_window=10, bb_dev=1.5, macd_fast=9, macd_slow=21, macd_sign=7,
+    atr_window=5, atr_median_window=50, vwap_window=30
+)
+
+# Wakes at each minute boundary + 2s, skips bars already evaluated, logs per-tick latency
+scheduler = BarScheduler(settle_seconds=2.0, latency_prefix="latency_strat_btc")
+
 # =============================================
 # 📧 Send email
 # =============================================
+# Queued and sent from a background thread; the loop never waits on SMTP
+notifier = EmailNotifier(EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER)
+
 def send_trade_email(subject, body):
-    msg = MIMEMultipart()
-    msg['From'] = EMAIL_USER
-    msg['To'] = EMAIL_RECEIVER
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_USER, EMAIL_RECEIVER, msg.as_string())
+    notifier.send(subject, body)
 
 # =============================================
 # 🔁 LIVE loop (24/7 for crypto)
@@ -70,60 +74,39 @@ print("🚀 Starting LIVE BTC HFT STRATEGY with trailing stops & email alerts!")
 
 while True:
     try:
-        # 2hr rolling window
         utc_now = datetime.now(timezone.utc)
-        start = utc_now - timedelta(minutes=120)
+        new_bars = fetch_new_bars(crypto_client, {SYMBOL: bar_window}, utc_now, timeframe=TIMEFRAME)[SYMBOL]
+        scheduler.mark("data")
 
-        request = CryptoBarsRequest(
-            symbol_or_symbols=[SYMBOL],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat()
-        )
+        # Indicators: feed only the new bars
+        for bar in new_bars:
+            indicators.update(bar)
 
-        bars = crypto_client.get_crypto_bars(request).data.get(SYMBOL)
-        if not bars:
+        latest = indicators.latest
+        if latest is None:
             print("⚠️ No crypto bars returned, skipping this loop...")
-            time.sleep(60)
+            scheduler.wait()
             continue
 
-        df = pd.DataFrame([bar.model_dump() for bar in bars])
-        df['time'] = pd.to_datetime(df['timestamp'])
-        df.set_index('time', inplace=True)
-
-        # Indicators
-        bb = BollingerBands(close=df['close'], window=10, window_dev=1.5)
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_lower'] = bb.bollinger_lband()
-
-        macd = MACD(close=df['close'], window_fast=9, window_slow=21, window_sign=7)
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-
-        atr = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=5)
-        df['atr'] = atr.average_true_range()
-        atr_median = df['atr'].rolling(window=50).median()
-
-        vwap = VolumeWeightedAveragePrice(
-            high=df['high'], low=df['low'], close=df['close'], volume=df['volume'], window=30
-        )
-        df['vwap'] = vwap.volume_weighted_average_price()
-
-        latest = df.iloc[-1]
+        if not scheduler.is_new_bar(latest['timestamp']):
+            print(f"⏱️ No new bar since {latest['timestamp']}, waiting for the next one...")
+            scheduler.wait()
+            continue
 
         buy_signal = (
             (latest['close'] > latest['vwap']) and
             (latest['macd'] > latest['macd_signal']) and
             (latest['close'] < latest['bb_lower']) and
-            (latest['atr'] > atr_median.iloc[-1])
+            (latest['atr'] > latest['atr_median'])
         )
 
         sell_signal = (
             (latest['close'] < latest['vwap']) and
             (latest['macd'] < latest['macd_signal']) and
             (latest['close'] > latest['bb_upper']) and
-            (latest['atr'] > atr_median.iloc[-1])
+            (latest['atr'] > latest['atr_median'])
         )
+        scheduler.mark("decision")
 
         # ✅ BUY
         if buy_signal and not in_position:
@@ -134,14 +117,15 @@ while True:
                 time_in_force=TimeInForce.GTC
             )
             trading_client.submit_order(order)
+            scheduler.mark("order_ack")
             in_position = True
             entry_price = latest['close']
             highest_price_since_entry = latest['close']
 
-            print(f"✅ BUY at {latest.name} - ${latest['close']:.2f}")
+            print(f"✅ BUY at {latest['timestamp']} - ${latest['close']:.2f}")
             send_trade_email(
                 f"✅ BUY Executed: {SYMBOL}",
-                f"BUY Order\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
+                f"BUY Order\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
             )
 
         # ✅ Update highest price safely
@@ -159,14 +143,15 @@ while True:
                     time_in_force=TimeInForce.GTC
                 )
                 trading_client.submit_order(order)
+                scheduler.mark("order_ack")
                 in_position = False
                 entry_price = None
                 highest_price_since_entry = None
 
-                print(f"🚨 TRAILING STOP at {latest.name} - ${latest['close']:.2f}")
+                print(f"🚨 TRAILING STOP at {latest['timestamp']} - ${latest['close']:.2f}")
                 send_trade_email(
                     f"🚨 Trailing Stop SELL: {SYMBOL}",
-                    f"Trailing Stop Triggered\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nTrigger: ${trailing_stop_trigger:.2f}\nQty: {POSITION_SIZE}"
+                    f"Trailing Stop Triggered\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nTrigger: ${trailing_stop_trigger:.2f}\nQty: {POSITION_SIZE}"
                 )
 
         # ❌ SELL signal
@@ -178,20 +163,23 @@ while True:
                 time_in_force=TimeInForce.GTC
             )
             trading_client.submit_order(order)
+            scheduler.mark("order_ack")
             in_position = False
             entry_price = None
             highest_price_since_entry = None
 
-            print(f"❌ SELL signal at {latest.name} - ${latest['close']:.2f}")
+            print(f"❌ SELL signal at {latest['timestamp']} - ${latest['close']:.2f}")
             send_trade_email(
                 f"❌ SELL Executed: {SYMBOL}",
-                f"SELL Order\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
+                f"SELL Order\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
             )
         else:
-            print(f"⏱️ No trade at {latest.name} | In Position: {in_position}")
+            print(f"⏱️ No trade at {latest['timestamp']} | In Position: {in_position}")
+
+        scheduler.record(latest['timestamp'])
 
     except Exception as e:
         print(f"⚠️ ERROR: {e}")
 
     # Wait for next bar
-    time.sleep(60)
+    scheduler.wait()
@@ -10,12 +10,12 @@ from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
-from ta.trend import MACD
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading import indicators
+from trading.notifier import EmailNotifier
+from trading.bar_decoder import fetch_bars, to_frame
 
 # =============================================
 # 🔐 Load credentials
@@ -35,8 +35,8 @@ EMAIL_RECEIVER = os.getenv("EMAIL_RECEIVER")
 # =============================================
 # 📡 Alpaca clients
 # =============================================
-data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
+data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
 
 # =============================================
 # ⚙️ Strategy settings
@@ -53,16 +53,11 @@ entry_price = None
 # =============================================
 # 📧 Send email
 # =============================================
+# Queued and sent from a background thread; the loop never waits on SMTP
+notifier = EmailNotifier(EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER)
+
 def send_trade_email(subject, body):
-    msg = MIMEMultipart()
-    msg['From'] = EMAIL_USER
-    msg['To'] = EMAIL_RECEIVER
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_USER, EMAIL_RECEIVER, msg.as_string())
+    notifier.send(subject, body)
 
 # =============================================
 # 🔁 LIVE loop
@@ -104,28 +99,20 @@ while True:
             feed="iex"
         )
 
-        bars = data_client.get_stock_bars(request).data.get(SYMBOL)
-        df = pd.DataFrame([bar.model_dump() for bar in bars])
-        df['time'] = pd.to_datetime(df['timestamp'])
-        df.set_index('time', inplace=True)
+        # Columns decoded straight from the response; the frame is a view over them
+        bars = fetch_bars(data_client, request).get(SYMBOL)
+        df = to_frame(*bars, symbol=SYMBOL)
+        df.index = pd.DatetimeIndex(df['timestamp'], name='time')
 
         # Indicators
-        bb = BollingerBands(close=df['close'], window=10, window_dev=1.5)
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_lower'] = bb.bollinger_lband()
+        _, df['bb_upper'], df['bb_lower'] = indicators.bollinger_bands(df['close'], window=10, window_dev=1.5)
 
-        macd = MACD(close=df['close'], window_fast=9, window_slow=21, window_sign=7)
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
+        df['macd'], df['macd_signal'], _ = indicators.macd(df['close'], window_slow=21, window_fast=9, window_sign=7)
 
-        atr = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=5)
-        df['atr'] = atr.average_true_range()
-        atr_median = df['atr'].rolling(window=50).median()
+        df['atr'] = indicators.average_true_range(df['high'], df['low'], df['close'], window=5)
+        atr_median = indicators.rolling_median(df['atr'], 50)
 
-        vwap = VolumeWeightedAveragePrice(
-            high=df['high'], low=df['low'], close=df['close'], volume=df['volume'], window=30
-        )
-        df['vwap'] = vwap.volume_weighted_average_price()
+        df['vwap'] = indicators.volume_weighted_average_price(df['high'], df['low'], df['close'], df['volume'], window=30)
 
         latest = df.iloc[-1]
 
@@ -133,14 +120,14 @@ while True:
             (latest['close'] > latest['vwap']) and
             (latest['macd'] > latest['macd_signal']) and
             (latest['close'] < latest['bb_lower']) and
-            (latest['atr'] > atr_median.iloc[-1])
+            (latest['atr'] > atr_median[-1])
         )
 
         sell_signal = (
             (latest['close'] < latest['vwap']) and
             (latest['macd'] < latest['macd_signal']) and
             (latest['close'] > latest['bb_upper']) and
-            (latest['atr'] > atr_median.iloc[-1])
+            (latest['atr'] > atr_median[-1])
         )
 
         # ✅ BUY
@@ -14,9 +14,6 @@ from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
-from ta.trend import MACD
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
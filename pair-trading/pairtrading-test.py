@@ -1,21 +1,25 @@
 import os
 import time
-from datetime import datetime, timezone, timedelta
+import argparse
+from datetime import datetime, timezone
 import pytz
 import pandas as pd
 from dotenv import load_dotenv
 import traceback
 
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import MarketOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce
+from alpaca.trading.enums import OrderSide
 
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.notifier import EmailNotifier
+from trading.audit_log import AuditWriter
+from trading.scheduler import BarScheduler
+from trading.bar_window import RollingBarWindow, fetch_new_bars
+from trading.order_gateway import OrderGateway
+from trading.pairs import PairEngine
 
 # =========== CONFIGURATION ===========
 load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
@@ -28,51 +32,67 @@ EMAIL_USER = os.getenv("EMAIL_USER")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 EMAIL_RECEIVER = os.getenv("EMAIL_RECEIVER")
 
-data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
-
-SYMBOL_A = "SPY"
-SYMBOL_B = "QQQ"
+data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
+parser = argparse.ArgumentParser(description="Z-score pair trading on one pair of symbols.")
+parser.add_argument("--pair", nargs=2, metavar=("A", "B"), default=["SPY", "QQQ"])
+parser.add_argument("--pairs", help="ranked pairs_*.csv from trading.pair_screener; overrides --pair")
+parser.add_argument("--rank", type=int, default=1, help="which pair of --pairs to trade (1 = best)")
+args = parser.parse_args()
+
+SYMBOL_A, SYMBOL_B = [symbol.upper() for symbol in args.pair]
+if args.pairs:
+    ranked = pd.read_csv(args.pairs)
+    SYMBOL_A, SYMBOL_B = ranked.loc[args.rank - 1, ["symbol_a", "symbol_b"]]
 SPREAD_LOOKBACK = 60     # bars for rolling stats
+HEDGE = "kalman"         # hedge ratio: "kalman" (recursive), "ols" (rolling regression) or "none" (raw difference)
 TRADE_DOLLARS = 5000     # $ per leg
 Z_ENTER = 2.0            # z-score threshold to enter trade
 TARGET_USD = 100         # profit target dollars for pair exit
 STOP_USD = -50           # stop loss dollars for pair exit
 TIMEFRAME = TimeFrame.Minute
 TIMEZONE = pytz.timezone("America/New_York")
+SETTLE_SECONDS = 2.0     # wait after each minute boundary for the bar to be published
 
 # ===== AUDIT LOG SETUP =====
-audit_log = []
-start_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-audit_filename = f"pair_trading_{SYMBOL_A}_{SYMBOL_B}_{start_timestamp}.csv"
+AUDIT_COLUMNS = [
+    "timestamp", f"close_{SYMBOL_A.lower()}", f"close_{SYMBOL_B.lower()}", "spread", "z_score", "in_pair_position",
+    "side_a", "side_b", "entry_a", "entry_b", "qty_a", "qty_b", "pnl_total", "hedge_ratio",
+]
+# Rows are appended to pair_trading_<A>_<B>_<timestamp>.csv in small batches as we go
+audit_log = AuditWriter(f"pair_trading_{SYMBOL_A}_{SYMBOL_B}", AUDIT_COLUMNS)
+
+# Wakes once per bar, skips bars already evaluated, logs per-tick latency
+scheduler = BarScheduler(settle_seconds=SETTLE_SECONDS, latency_prefix=f"latency_pair_{SYMBOL_A}_{SYMBOL_B}")
+
+# Queued and sent from a background thread; the loop never waits on SMTP
+notifier = EmailNotifier(EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER)
 
 def send_trade_email(subject, body):
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_USER
-        msg['To'] = EMAIL_RECEIVER
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(EMAIL_USER, EMAIL_PASSWORD)
-            server.sendmail(EMAIL_USER, EMAIL_RECEIVER, msg.as_string())
-    except Exception as e:
-        print(f"⚠️ Email sending failed: {e}")
+    notifier.send(subject, body)
+
+# ============ SPREAD ENGINE ============
+# Both symbols' bars come from one request that only asks for what each window is missing;
+# the engine aligns them on timestamp and updates hedge ratio, spread mean/std and z-score per bar
+windows = {symbol: RollingBarWindow(symbol, maxlen=SPREAD_LOOKBACK + 20) for symbol in (SYMBOL_A, SYMBOL_B)}
+engine = PairEngine(SYMBOL_A, SYMBOL_B, window=SPREAD_LOOKBACK, hedge=HEDGE)
 
 # ============ STRATEGY STATE ============
 in_pair_position = False
-side_a = None   # 1 = long SPY, -1 = short SPY
-side_b = None   # 1 = long QQQ, -1 = short QQQ
+side_a = None   # 1 = long A, -1 = short A
+side_b = None   # 1 = long B, -1 = short B
 entry_a = None
 entry_b = None
 qty_a = 0
 qty_b = 0
 pnl_total = 0.0  # initialize to avoid name errors
+order_gateway = None
 
-print("🚀 Starting PAIR-TRADING Scalping Strategy | SPY vs QQQ | SL: $50 | Target: $100")
+print(f"🚀 Starting PAIR-TRADING Scalping Strategy | {SYMBOL_A} vs {SYMBOL_B} | SL: $50 | Target: $100")
 
 try:
+    # Both legs go out together over warm pooled connections; a failed leg unwinds the other
+    order_gateway = OrderGateway(trading_client)
     while True:
         ny_time = datetime.now(TIMEZONE)
         market_open = ny_time.replace(hour=9, minute=30, second=0, microsecond=0)
@@ -87,76 +107,48 @@ try:
             print("✅ Market closed. Exiting loop.")
             break
 
-        # Fetch recent data for both symbols: add buffer for extra bars to ensure full window
+        # Fetch only the bars each symbol is missing (full lookback on the first tick)
         utc_now = datetime.now(timezone.utc)
-        start = utc_now - timedelta(minutes=SPREAD_LOOKBACK + 20)
-
-        request_a = StockBarsRequest(
-            symbol_or_symbols=[SYMBOL_A],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat(),
-            feed="iex"
-        )
-        request_b = StockBarsRequest(
-            symbol_or_symbols=[SYMBOL_B],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat(),
-            feed="iex"
-        )
-
-        bars_a = data_client.get_stock_bars(request_a).data.get(SYMBOL_A)
-        bars_b = data_client.get_stock_bars(request_b).data.get(SYMBOL_B)
-
-        print(f"Fetched {len(bars_a) if bars_a else 0} bars for {SYMBOL_A}")
-        print(f"Fetched {len(bars_b) if bars_b else 0} bars for {SYMBOL_B}")
-
-        # Check data sufficiency
-        if not bars_a or not bars_b or len(bars_a) < SPREAD_LOOKBACK or len(bars_b) < SPREAD_LOOKBACK:
-            print(f"⚠️ No/few data returned for {SYMBOL_A} or {SYMBOL_B}. Retrying in 60 seconds...")
-            time.sleep(60)
+        new_bars = fetch_new_bars(data_client, windows, utc_now, timeframe=TIMEFRAME)
+        engine.add_bars(new_bars[SYMBOL_A], new_bars[SYMBOL_B])
+        scheduler.mark("data")
+
+        print(f"Fetched {len(new_bars[SYMBOL_A])} bars for {SYMBOL_A}")
+        print(f"Fetched {len(new_bars[SYMBOL_B])} bars for {SYMBOL_B}")
+
+        latest = engine.latest
+        if latest is None:
+            print(f"⚠️ No/few data returned for {SYMBOL_A} or {SYMBOL_B}. Retrying next bar...")
+            scheduler.wait()
             continue
 
-        # Prepare dataframes, set datetime index, sort
-        df_a = pd.DataFrame([bar.model_dump() for bar in bars_a])
-        df_a['time'] = pd.to_datetime(df_a['timestamp'])
-        df_a.set_index('time', inplace=True)
-        df_a.sort_index(inplace=True)
-
-        df_b = pd.DataFrame([bar.model_dump() for bar in bars_b])
-        df_b['time'] = pd.to_datetime(df_b['timestamp'])
-        df_b.set_index('time', inplace=True)
-        df_b.sort_index(inplace=True)
-
-        # Merge on overlapping timestamps
-        df = pd.DataFrame({
-            'close_a': df_a['close'],
-            'close_b': df_b['close']
-        }).dropna()
-
-        # Calculate spread and rolling statistics
-        spread = df['close_a'] - df['close_b']
-        spread_mean = spread.rolling(window=SPREAD_LOOKBACK).mean()
-        spread_std = spread.rolling(window=SPREAD_LOOKBACK).std()
-        z_score = (spread - spread_mean) / spread_std
-
-        latest = df.iloc[-1]
-        latest_z = z_score.iloc[-1]
-        prev_z = z_score.iloc[-2] if len(z_score) > 1 else 0.0
-        latest_time = df.index[-1]
+        latest_z = latest['z_score']
+        prev_z = latest['prev_z']
+        latest_time = latest['timestamp']
         close_a = latest['close_a']
         close_b = latest['close_b']
+        hedge_ratio = latest['hedge_ratio']
+
+        # Same merged bar as last tick: nothing to evaluate (and no duplicate audit row)
+        if not scheduler.is_new_bar(latest_time):
+            print(f"⏱️ No new bar since {latest_time}. Waiting for the next one...")
+            scheduler.wait()
+            continue
 
         # Skip iteration if z-score NaN
         if pd.isna(latest_z) or pd.isna(prev_z):
             print(f"⚠️ Z-score not available at {latest_time}. Skipping iteration.")
-            time.sleep(60)
+            scheduler.wait()
             continue
 
-        # Calculate order quantities ensuring minimum 1 share
-        qty_a = max(int(TRADE_DOLLARS / close_a), 1)
-        qty_b = max(int(TRADE_DOLLARS / close_b), 1)
+        # Order quantities (minimum 1 share), fixed for the life of a pair trade;
+        # with a hedge ratio the B leg holds hedge_ratio shares per share of A
+        if not in_pair_position:
+            qty_a = max(int(TRADE_DOLLARS / close_a), 1)
+            if HEDGE == "none":
+                qty_b = max(int(TRADE_DOLLARS / close_b), 1)
+            else:
+                qty_b = max(int(round(qty_a * hedge_ratio)), 1)
 
         # Calculate current PnL if in position
         if in_pair_position:
@@ -166,6 +158,8 @@ try:
         else:
             pnl_total = 0.0
 
+        scheduler.mark("decision")
+
         # ENTRY LOGIC
         if not in_pair_position and abs(latest_z) > Z_ENTER:
             if latest_z > Z_ENTER:
@@ -175,18 +169,11 @@ try:
 
             try:
                 print(f"Attempting entry orders: {SYMBOL_A} {'BUY' if side_a == 1 else 'SELL'}, {SYMBOL_B} {'BUY' if side_b == 1 else 'SELL'}")
-                trading_client.submit_order(MarketOrderRequest(
-                    symbol=SYMBOL_A,
-                    qty=qty_a,
-                    side=OrderSide.BUY if side_a == 1 else OrderSide.SELL,
-                    time_in_force=TimeInForce.DAY
-                ))
-                trading_client.submit_order(MarketOrderRequest(
-                    symbol=SYMBOL_B,
-                    qty=qty_b,
-                    side=OrderSide.BUY if side_b == 1 else OrderSide.SELL,
-                    time_in_force=TimeInForce.DAY
-                ))
+                order_gateway.submit_pair(
+                    SYMBOL_A, qty_a, OrderSide.BUY if side_a == 1 else OrderSide.SELL,
+                    SYMBOL_B, qty_b, OrderSide.BUY if side_b == 1 else OrderSide.SELL
+                )
+                scheduler.mark("order_ack")
 
                 entry_a = close_a
                 entry_b = close_b
@@ -228,18 +215,11 @@ try:
             if do_exit:
                 try:
                     print(f"Attempting exit orders due to {reason}")
-                    trading_client.submit_order(MarketOrderRequest(
-                        symbol=SYMBOL_A,
-                        qty=qty_a,
-                        side=OrderSide.SELL if side_a == 1 else OrderSide.BUY,
-                        time_in_force=TimeInForce.DAY
-                    ))
-                    trading_client.submit_order(MarketOrderRequest(
-                        symbol=SYMBOL_B,
-                        qty=qty_b,
-                        side=OrderSide.SELL if side_b == 1 else OrderSide.BUY,
-                        time_in_force=TimeInForce.DAY
-                    ))
+                    order_gateway.submit_pair(
+                        SYMBOL_A, qty_a, OrderSide.SELL if side_a == 1 else OrderSide.BUY,
+                        SYMBOL_B, qty_b, OrderSide.SELL if side_b == 1 else OrderSide.BUY
+                    )
+                    scheduler.mark("order_ack")
 
                     print(f"❌ PAIR TRADE EXIT ({reason}): {SYMBOL_A} {'LONG' if side_a == 1 else 'SHORT'} @ {close_a:.2f}, "
                           f"{SYMBOL_B} {'LONG' if side_b == 1 else 'SHORT'} @ {close_b:.2f}. "
@@ -272,9 +252,9 @@ try:
         # === Audit Log Update ===
         audit_log.append({
             "timestamp": latest_time,
-            "close_spy": close_a,
-            "close_qqq": close_b,
-            "spread": float(spread.iloc[-1]),
+            f"close_{SYMBOL_A.lower()}": close_a,
+            f"close_{SYMBOL_B.lower()}": close_b,
+            "spread": float(latest['spread']),
             "z_score": float(latest_z),
             "in_pair_position": in_pair_position,
             "side_a": side_a if side_a is not None else "",
@@ -284,15 +264,20 @@ try:
             "qty_a": qty_a,
             "qty_b": qty_b,
             "pnl_total": pnl_total if in_pair_position else "",
+            "hedge_ratio": float(hedge_ratio),
         })
 
-        time.sleep(60)
+        scheduler.record(latest_time)
+        scheduler.wait()
 
 except Exception as e:
     print(f"⚠️ ERROR: {e}")
     traceback.print_exc()
 
 finally:
-    audit_df = pd.DataFrame(audit_log)
-    audit_df.to_csv(audit_filename, index=False)
-    print(f"📑 Final audit log saved to {audit_filename}")
+    if order_gateway is not None:
+        order_gateway.close()
+    audit_log.close()
+    scheduler.close()
+    print(f"📑 Final audit log saved to {audit_log.filename}")
+    print(f"⏲️ {scheduler.latency_summary()}")
@@ -1,21 +1,19 @@
 import os
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import datetime
 import pytz
 
-import pandas as pd
 from dotenv import load_dotenv
 
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
 
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.price_feed import PriceFeed
+from trading.notifier import EmailNotifier
 
 # =============================================
 # 🔐 Load credentials
@@ -34,15 +32,19 @@ EMAIL_RECEIVER = os.getenv("EMAIL_RECEIVER")
 # =============================================
 # 📡 Alpaca Clients
 # =============================================
-stock_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
+stock_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
 
 # =============================================
 # ⚙️ Strategy Settings
 # =============================================
 SYMBOL = "SPY"
 POSITION_SIZE = 100  # Example: 1 share
-TIMEFRAME = TimeFrame.Minute  # Only minute-level for stocks
+PRICE_SOURCE = "trade"  # "trade" = last trade, "quote" = bid/ask mid
+
+# Latest trade/quote, cached and polled adaptively (PRICE_STREAM=1 uses the websocket instead)
+price_feed = PriceFeed(stock_client, SYMBOL, source=PRICE_SOURCE, stream=bool(os.getenv("PRICE_STREAM")),
+                       api_key=DATA_KEY, secret_key=DATA_SECRET, stream_url=os.getenv("ALPACA_STREAM_URL"))
 
 in_position = False
 entry_price = None
@@ -51,17 +53,11 @@ highest_price = None
 # =============================================
 # 📧 Send Email Function
 # =============================================
-def send_trade_email(subject, body):
-    msg = MIMEMultipart()
-    msg['From'] = EMAIL_USER
-    msg['To'] = EMAIL_RECEIVER
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
+# Queued and sent from a background thread; the loop never waits on SMTP
+notifier = EmailNotifier(EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER)
 
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_USER, EMAIL_RECEIVER, msg.as_string())
+def send_trade_email(subject, body):
+    notifier.send(subject, body)
 
 # =============================================
 # 🔁 Continuous Trading Loop w/ Market Hours
@@ -81,27 +77,13 @@ while True:
             time.sleep(300)
             continue
 
-        # === Get latest price ===
-        utc_now = datetime.now(timezone.utc)
-        start = utc_now - timedelta(minutes=5)
-
-        request = StockBarsRequest(
-            symbol_or_symbols=[SYMBOL],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat(),
-            feed="iex"
-        )
-
-        bars = stock_client.get_stock_bars(request).data.get(SYMBOL)
-        if not bars:
-            print("⚠️ No bars returned, waiting...")
-            time.sleep(1)
+        # === Latest trade price (sub-second, cached) ===
+        current_price = price_feed.price(SYMBOL)
+        if current_price is None:
+            print("⚠️ No price returned, waiting...")
+            price_feed.wait()
             continue
 
-        latest_bar = bars[-1]
-        current_price = latest_bar.close
-
         if not in_position:
             # === BUY ===
             order = MarketOrderRequest(
@@ -174,4 +156,4 @@ while True:
     except Exception as e:
         print(f"⚠️ ERROR: {e}")
 
-    time.sleep(1)
+    price_feed.wait()  # 🔁 next poll (or next streamed trade)
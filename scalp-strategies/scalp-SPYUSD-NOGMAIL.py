@@ -1,18 +1,19 @@
 import os
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import datetime
 import pytz
 
-import pandas as pd
 from dotenv import load_dotenv
 
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
-from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
 
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.price_feed import PriceFeed
+
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -34,15 +35,19 @@ TRADE_SECRET = os.getenv("TRADE_SECRET")
 # =============================================
 # 📡 Alpaca Clients
 # =============================================
-stock_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
+stock_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
 
 # =============================================
 # ⚙️ Strategy Settings
 # =============================================
 SYMBOL = "SPY"
 POSITION_SIZE = 100          # Shares per trade
-TIMEFRAME = TimeFrame.Minute # Use minute-level bars
+PRICE_SOURCE = "trade"  # "trade" = last trade, "quote" = bid/ask mid
+
+# Latest trade/quote, cached and polled adaptively (PRICE_STREAM=1 uses the websocket instead)
+price_feed = PriceFeed(stock_client, SYMBOL, source=PRICE_SOURCE, stream=bool(os.getenv("PRICE_STREAM")),
+                       api_key=DATA_KEY, secret_key=DATA_SECRET, stream_url=os.getenv("ALPACA_STREAM_URL"))
 
 # Absolute P&L targets
 TAKE_PROFIT_USD = 110
@@ -83,27 +88,13 @@ while True:
             time.sleep(300)
             continue
 
-        # 🗂️ Get latest bar
-        utc_now = datetime.now(timezone.utc)
-        start = utc_now - timedelta(minutes=5)
-
-        request = StockBarsRequest(
-            symbol_or_symbols=[SYMBOL],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat(),
-            feed="iex"
-        )
-
-        bars = stock_client.get_stock_bars(request).data.get(SYMBOL)
-        if not bars:
-            print("⚠️ No bars returned, waiting...")
-            time.sleep(1)
+        # === Latest trade price (sub-second, cached) ===
+        current_price = price_feed.price(SYMBOL)
+        if current_price is None:
+            print("⚠️ No price returned, waiting...")
+            price_feed.wait()
             continue
 
-        latest_bar = bars[-1]
-        current_price = latest_bar.close
-
         if not in_position:
             # === BUY ===
             order = MarketOrderRequest(
@@ -174,4 +165,4 @@ while True:
     except Exception as e:
         print(f"⚠️ ERROR: {e}")
 
-    time.sleep(1)
+    price_feed.wait()  # 🔁 next poll (or next streamed trade)
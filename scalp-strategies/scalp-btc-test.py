@@ -1,17 +1,16 @@
 import os
-import time
-from datetime import datetime, timezone, timedelta
 
-import pandas as pd
 from dotenv import load_dotenv
 
 from alpaca.data.historical import CryptoHistoricalDataClient
-from alpaca.data.requests import CryptoBarsRequest
-from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
 
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.price_feed import PriceFeed
+
 # =============================================
 # 🔐 Load credentials
 # =============================================
@@ -25,15 +24,19 @@ TRADE_SECRET = os.getenv("TRADE_SECRET")
 # =============================================
 # 📡 Alpaca Clients
 # =============================================
-crypto_client = CryptoHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
+crypto_client = CryptoHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
 
 # =============================================
 # ⚙️ Strategy Settings
 # =============================================
 SYMBOL = "BTC/USD"
 POSITION_SIZE = 0.1
-TIMEFRAME = TimeFrame.Minute  # use 1-min bars for crypto
+PRICE_SOURCE = "trade"  # "trade" = last trade, "quote" = bid/ask mid
+
+# Latest trade/quote, cached and polled adaptively (PRICE_STREAM=1 uses the websocket instead)
+price_feed = PriceFeed(crypto_client, SYMBOL, source=PRICE_SOURCE, stream=bool(os.getenv("PRICE_STREAM")),
+                       api_key=DATA_KEY, secret_key=DATA_SECRET, stream_url=os.getenv("ALPACA_STREAM_URL"))
 
 in_position = False
 entry_price = None
@@ -43,25 +46,13 @@ print("🚀 Starting continuous BTC time-action scalp bot (TP +0.2%, trailing SL
 
 while True:
     try:
-        utc_now = datetime.now(timezone.utc)
-        start = utc_now - timedelta(minutes=5)
-
-        request = CryptoBarsRequest(
-            symbol_or_symbols=[SYMBOL],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat()
-        )
-
-        bars = crypto_client.get_crypto_bars(request).data.get(SYMBOL)
-        if not bars:
-            print("⚠️ No bars returned, waiting...")
-            time.sleep(1)
+        # === Latest trade price (sub-second, cached) ===
+        current_price = price_feed.price(SYMBOL)
+        if current_price is None:
+            print("⚠️ No price returned, waiting...")
+            price_feed.wait()
             continue
 
-        latest_bar = bars[-1]
-        current_price = latest_bar.close
-
         if not in_position:
             # === BUY ===
             order = MarketOrderRequest(
@@ -120,4 +111,4 @@ while True:
     except Exception as e:
         print(f"⚠️ ERROR: {e}")
 
-    time.sleep(1)  # 🔁 every second
+    price_feed.wait()  # 🔁 next poll (or next streamed trade)
@@ -1,24 +1,20 @@
 import os
-import time
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 
-import pandas as pd
 from dotenv import load_dotenv
 
 from alpaca.data.historical import CryptoHistoricalDataClient
-from alpaca.data.requests import CryptoBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
 
-from ta.trend import MACD
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
-
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_window import RollingBarWindow, fetch_new_bars
+from trading.incremental import StrategyIndicators
+from trading.scheduler import BarScheduler
+from trading.notifier import EmailNotifier
 
 # =============================================
 # 🔐 Load credentials
@@ -37,8 +33,8 @@ EMAIL_RECEIVER = os.getenv("EMAIL_RECEIVER")
 # =============================================
 # 📡 Alpaca crypto clients
 # =============================================
-crypto_client = CryptoHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
+crypto_client = CryptoHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
 
 # =============================================
 # ⚙️ Strategy settings
@@ -50,19 +46,26 @@ TIMEFRAME = TimeFrame.Minute
 in_position = False
 highest_price_since_entry = None
 
+# Only bars newer than the last one we hold are requested each loop
+bar_window = RollingBarWindow(SYMBOL, maxlen=30)
+
+# BB(20, 2) / MACD(12, 26, 9) / ATR(5) / ATR median(15) / VWAP(15), one bar at a time
+indicators = StrategyIndicators(
+    bb_window=20, bb_dev=2, macd_fast=12, macd_slow=26, macd_sign=9,
+    atr_window=5, atr_median_window=15, vwap_window=15
+)
+
+# Wakes at each minute boundary + 2s, skips bars already evaluated, logs per-tick latency
+scheduler = BarScheduler(settle_seconds=2.0, latency_prefix="latency_scalp_btc")
+
 # =============================================
 # 📧 Send email
 # =============================================
+# Queued and sent from a background thread; the loop never waits on SMTP
+notifier = EmailNotifier(EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER)
+
 def send_trade_email(subject, body):
-    msg = MIMEMultipart()
-    msg['From'] = EMAIL_USER
-    msg['To'] = EMAIL_RECEIVER
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_USER, EMAIL_RECEIVER, msg.as_string())
+    notifier.send(subject, body)
 
 # =============================================
 # 🔁 LIVE loop (24/7 for crypto)
@@ -72,53 +75,31 @@ print("🚀 Starting LIVE BTC SCALPING STRATEGY with trailing stops & email aler
 
 while True:
     try:
-        # Short rolling window for fresh signals
         utc_now = datetime.now(timezone.utc)
-        start = utc_now - timedelta(minutes=30)  # tighter window for scalping
+        new_bars = fetch_new_bars(crypto_client, {SYMBOL: bar_window}, utc_now, timeframe=TIMEFRAME)[SYMBOL]
+        scheduler.mark("data")
 
-        request = CryptoBarsRequest(
-            symbol_or_symbols=[SYMBOL],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat()
-        )
+        # Indicators: feed only the new bars
+        for bar in new_bars:
+            indicators.update(bar)
 
-        bars = crypto_client.get_crypto_bars(request).data.get(SYMBOL)
-        if not bars:
+        latest = indicators.latest
+        if latest is None:
             print("⚠️ No crypto bars returned, skipping this loop...")
-            time.sleep(30)
+            scheduler.wait()
             continue
 
-        df = pd.DataFrame([bar.model_dump() for bar in bars])
-        df['time'] = pd.to_datetime(df['timestamp'])
-        df.set_index('time', inplace=True)
-
-        # Indicators for scalp logic
-        bb = BollingerBands(close=df['close'], window=20, window_dev=2)
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_lower'] = bb.bollinger_lband()
-
-        macd = MACD(close=df['close'], window_fast=12, window_slow=26, window_sign=9)
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-
-        atr = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=5)
-        df['atr'] = atr.average_true_range()
-        atr_median = df['atr'].rolling(window=15).median()
-
-        vwap = VolumeWeightedAveragePrice(
-            high=df['high'], low=df['low'], close=df['close'], volume=df['volume'], window=15
-        )
-        df['vwap'] = vwap.volume_weighted_average_price()
-
-        latest = df.iloc[-1]
+        if not scheduler.is_new_bar(latest['timestamp']):
+            print(f"⏱️ No new bar since {latest['timestamp']}, waiting for the next one...")
+            scheduler.wait()
+            continue
 
         # 📈 Scalping Buy: price bounces off lower BB, MACD bullish, price > VWAP
         buy_signal = (
             (latest['close'] < latest['bb_lower']) and
             (latest['macd'] > latest['macd_signal']) and
             (latest['close'] > latest['vwap']) and
-            (latest['atr'] > atr_median.iloc[-1])
+            (latest['atr'] > latest['atr_median'])
         )
 
         # 📉 Scalping Sell: price hits upper BB, MACD bearish
@@ -126,6 +107,7 @@ while True:
             (latest['close'] > latest['bb_upper']) and
             (latest['macd'] < latest['macd_signal'])
         )
+        scheduler.mark("decision")
 
         # ✅ BUY
         if buy_signal and not in_position:
@@ -136,13 +118,14 @@ while True:
                 time_in_force=TimeInForce.GTC
             )
             trading_client.submit_order(order)
+            scheduler.mark("order_ack")
             in_position = True
             highest_price_since_entry = latest['close']
 
-            print(f"✅ BUY @ {latest.name} - ${latest['close']:.2f}")
+            print(f"✅ BUY @ {latest['timestamp']} - ${latest['close']:.2f}")
             send_trade_email(
                 f"✅ BTC BUY Executed",
-                f"BUY Order\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
+                f"BUY Order\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
             )
 
         # ✅ Update high
@@ -160,13 +143,14 @@ while True:
                     time_in_force=TimeInForce.GTC
                 )
                 trading_client.submit_order(order)
+                scheduler.mark("order_ack")
                 in_position = False
                 highest_price_since_entry = None
 
-                print(f"🚨 TRAILING STOP @ {latest.name} - ${latest['close']:.2f}")
+                print(f"🚨 TRAILING STOP @ {latest['timestamp']} - ${latest['close']:.2f}")
                 send_trade_email(
                     f"🚨 BTC Trailing Stop SELL",
-                    f"Trailing Stop Triggered\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nTrigger: ${trailing_stop_trigger:.2f}\nQty: {POSITION_SIZE}"
+                    f"Trailing Stop Triggered\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nTrigger: ${trailing_stop_trigger:.2f}\nQty: {POSITION_SIZE}"
                 )
 
         # ❌ Manual Sell if upper band hit and MACD bearish
@@ -178,20 +162,23 @@ while True:
                 time_in_force=TimeInForce.GTC
             )
             trading_client.submit_order(order)
+            scheduler.mark("order_ack")
             in_position = False
             highest_price_since_entry = None
 
-            print(f"❌ SELL @ {latest.name} - ${latest['close']:.2f}")
+            print(f"❌ SELL @ {latest['timestamp']} - ${latest['close']:.2f}")
             send_trade_email(
                 f"❌ BTC SELL Executed",
-                f"SELL Order\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
+                f"SELL Order\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
             )
 
         else:
-            print(f"⏱️ {latest.name} | No Trade | In Position: {in_position} | Price: ${latest['close']:.2f}")
+            print(f"⏱️ {latest['timestamp']} | No Trade | In Position: {in_position} | Price: ${latest['close']:.2f}")
+
+        scheduler.record(latest['timestamp'])
 
     except Exception as e:
         print(f"⚠️ ERROR: {e}")
 
     # Next candle
-    time.sleep(60)
+    scheduler.wait()
@@ -0,0 +1,280 @@
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+import pytz
+import pandas as pd
+from dotenv import load_dotenv
+
+from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.data.timeframe import TimeFrame
+from alpaca.trading.client import TradingClient
+from alpaca.trading.requests import MarketOrderRequest
+from alpaca.trading.enums import OrderSide, TimeInForce
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.bar_window import fetch_new_bars
+from trading.bar_stream import BarStream
+from trading.strategy import SymbolStrategy, format_conditions, AUDIT_COLUMNS, CONFIRM_COLUMNS
+from trading.bar_store import BarStore
+from trading.resampler import TIMEFRAMES
+from trading.audit_log import AuditWriter
+from trading.scheduler import BarScheduler
+from trading.notifier import EmailNotifier
+from trading.snapshot import StrategySnapshot
+
+# =============================================
+# ⚙️ Symbols (SYMBOL or SYMBOL:QTY)
+# =============================================
+# Same symbols and sizes the strat-run-<SYMBOL>.py copies used to run
+DEFAULT_SYMBOLS = ["AAPL:25", "NVDA:25", "QQQ:25", "QQQM:50", "SPY:10"]
+DEFAULT_POSITION_SIZE = 25
+
+parser = argparse.ArgumentParser(description="Run the BB/MACD/ATR/VWAP scalping strategy on many symbols in one process.")
+parser.add_argument("symbols", nargs="*", default=DEFAULT_SYMBOLS, help="e.g. AAPL:25 NVDA SPY:10")
+parser.add_argument("--no-email", action="store_true", help="don't send trade emails (old NOGMAIL variant)")
+parser.add_argument("--verbose", action="store_true", help="print the full condition breakdown for every symbol")
+parser.add_argument("--stream", action="store_true", help="event-driven: evaluate each bar as it arrives on the websocket instead of polling")
+parser.add_argument("--stream-url", default=os.getenv("ALPACA_STREAM_URL"), help="websocket override, e.g. ws://localhost:8765 for trading/replay_feed.py")
+parser.add_argument("--settle", type=float, default=2.0, help="polling: seconds after each minute boundary to wait for the bar to be published")
+parser.add_argument("--idle-exit", type=float, default=None, help="stop streaming after this many seconds without a bar (for replays)")
+parser.add_argument("--confirm", choices=list(TIMEFRAMES), default=None, help="also require this timeframe's MACD to agree, e.g. 15m (resampled from the minute bars)")
+args = parser.parse_args()
+
+POSITIONS = {}
+for item in args.symbols:
+    symbol, _, qty = item.partition(":")
+    if not qty:
+        qty = DEFAULT_POSITION_SIZE
+    POSITIONS[symbol.strip().upper()] = float(qty) if "." in str(qty) else int(qty)
+
+TIMEFRAME = TimeFrame.Minute
+TIMEZONE = pytz.timezone("America/New_York")
+LOOKBACK_BARS = 120
+
+# =============================================
+# 🔐 Load credentials
+# =============================================
+load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
+
+DATA_KEY = os.getenv("DATA_KEY")
+DATA_SECRET = os.getenv("DATA_SECRET")
+TRADE_KEY = os.getenv("TRADE_KEY")
+TRADE_SECRET = os.getenv("TRADE_SECRET")
+
+EMAIL_USER = os.getenv("EMAIL_USER")
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
+EMAIL_RECEIVER = os.getenv("EMAIL_RECEIVER")
+
+# =============================================
+# 📡 Alpaca clients (shared by every symbol)
+# =============================================
+data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
+
+# =============================================
+# 🧠 Per-symbol strategy state + AUDIT LOG SETUP
+# =============================================
+strategies = {
+    symbol: SymbolStrategy(
+        symbol, qty, lookback_bars=LOOKBACK_BARS, trailing_stop=0.985, confirm_timeframe=args.confirm,
+        bb_window=10, bb_dev=1.5, macd_fast=9, macd_slow=21, macd_sign=7,
+        atr_window=5, atr_median_window=50, vwap_window=30
+    )
+    for symbol, qty in POSITIONS.items()
+}
+windows = {symbol: strategy.window for symbol, strategy in strategies.items()}
+# Rows are appended to strat_<SYMBOL>_<timestamp>.csv in small batches as we go
+audit_columns = AUDIT_COLUMNS + (CONFIRM_COLUMNS if args.confirm else [])
+audit_logs = {symbol: AuditWriter(f"strat_{symbol}", audit_columns) for symbol in strategies}
+# Polling mode: one tick per bar, per-symbol latency in latency_multi_<timestamp>.csv
+scheduler = BarScheduler(settle_seconds=args.settle, latency_prefix=None if args.stream else "latency_multi")
+# Every symbol's position flags + indicator state, rewritten every 10 bars and on any position change
+snapshot = StrategySnapshot("state_multi.json", strategies)
+
+# =============================================
+# 📧 Email helper
+# =============================================
+# Queued and sent from a background thread; the loop never waits on SMTP
+notifier = EmailNotifier(EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER)
+
+def send_trade_email(subject, body):
+    if args.no_email:
+        return
+    notifier.send(subject, body)
+
+# =============================================
+# 💸 Orders
+# =============================================
+ACTION_LABELS = {
+    "BUY": ("✅ BUY executed", "✅ BUY Executed", "BUY Order"),
+    "TRAILING_STOP": ("🚨 TRAILING STOP triggered", "🚨 Trailing Stop SELL", "Trailing Stop Triggered"),
+    "SELL": ("❌ SELL signal executed", "❌ SELL Executed", "SELL Order"),
+}
+
+def execute(strategy, action, latest):
+    order = MarketOrderRequest(
+        symbol=strategy.symbol,
+        qty=strategy.position_size,
+        side=OrderSide.BUY if action == "BUY" else OrderSide.SELL,
+        time_in_force=TimeInForce.DAY
+    )
+    trading_client.submit_order(order)
+    scheduler.mark("order_ack", key=strategy.symbol)
+
+    console, subject, heading = ACTION_LABELS[action]
+    print(f"{console} {strategy.symbol} at {latest['timestamp']} - ${latest['close']:.2f}")
+    send_trade_email(
+        f"{subject}: {strategy.symbol}",
+        f"{heading}\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {strategy.position_size}"
+    )
+
+def evaluate(symbol, strategy):
+    """Check conditions on the symbol's latest bar, log them and place any order."""
+    latest = strategy.latest
+    row = strategy.check_conditions()
+    if args.verbose:
+        print(f"[{symbol}]" + format_conditions(row))
+    audit_logs[symbol].append(row)
+
+    saved_state = (strategy.in_position, strategy.entry_price, strategy.highest_price_since_entry,
+                   strategy.trailing_stop_trigger)
+    try:
+        action = strategy.decide(row)
+        scheduler.mark("decision", key=symbol)
+        if action in ACTION_LABELS:
+            execute(strategy, action, latest)
+        elif action == "HOLD":
+            print(f"⏱️ {symbol} Holding | Price: ${latest['close']:.2f} | Highest: ${strategy.highest_price_since_entry:.2f} | Trailing Stop: ${strategy.trailing_stop_trigger:.2f}")
+        else:
+            print(f"⏱️ {symbol} No trade at {latest['timestamp']} | In Position: {strategy.in_position}")
+    except Exception as e:
+        # One symbol's failed order shouldn't stop the others; keep its old position state
+        (strategy.in_position, strategy.entry_price, strategy.highest_price_since_entry,
+         strategy.trailing_stop_trigger) = saved_state
+        print(f"⚠️ {symbol} ERROR: {e}")
+
+def restore_snapshot():
+    """Warm restart: reload state_multi.json and reconcile it with the broker's positions."""
+    try:
+        for symbol in snapshot.restore(trading_client, datetime.now(timezone.utc)):
+            scheduler.is_new_bar(strategies[symbol].latest['timestamp'], key=symbol)  # evaluated before the restart
+    except Exception as e:
+        print(f"⚠️ Could not reconcile with broker positions: {e}")
+
+def warm_up_confirmation():
+    """--confirm: replay stored minute bars into the higher timeframe (only the missing ranges hit the API)."""
+    if not args.confirm:
+        return
+    store = BarStore(data_client)
+    for symbol, strategy in strategies.items():
+        try:
+            count = strategy.warm_up(store)
+            print(f"🧭 {symbol}: {args.confirm} confirmation warmed from {count} stored minute bars")
+        except Exception as e:
+            print(f"⚠️ {symbol}: {args.confirm} warm-up failed, confirming once enough bars arrive: {e}")
+
+# =============================================
+# 📶 Event-driven mode: one evaluation per closed bar
+# =============================================
+def on_stream_bar(row):
+    strategy = strategies.get(row['symbol'])
+    if strategy is None:
+        return
+    new_rows = strategy.window.extend([row])
+    if not new_rows:
+        return  # already seen via the REST warm-up
+    strategy.add_bars(new_rows)
+
+    # Indicators see every bar; trading only happens in regular hours of the bar itself
+    bar_time = pd.Timestamp(row['timestamp']).tz_convert(TIMEZONE)
+    market_open = bar_time.replace(hour=9, minute=30, second=0, microsecond=0)
+    market_close = bar_time.replace(hour=16, minute=0, second=0, microsecond=0)
+    if market_open <= bar_time < market_close:
+        evaluate(row['symbol'], strategy)
+        snapshot.save()
+
+def run_stream():
+    # Warm the indicators with the last LOOKBACK_BARS bars before the first live bar
+    try:
+        new_bars = fetch_new_bars(data_client, windows, datetime.now(timezone.utc), timeframe=TIMEFRAME)
+        for symbol, strategy in strategies.items():
+            strategy.add_bars(new_bars[symbol])
+    except Exception as e:
+        print(f"⚠️ Warm-up fetch failed, starting cold: {e}")
+
+    bar_stream = BarStream(
+        DATA_KEY, DATA_SECRET, list(strategies), on_stream_bar,
+        url=args.stream_url, idle_exit=args.idle_exit
+    )
+    print(f"📶 Streaming bars for {', '.join(strategies)}" + (f" from {args.stream_url}" if args.stream_url else ""))
+    try:
+        bar_stream.run()
+    finally:
+        print(f"📶 {bar_stream.latency_summary()}")
+
+# =============================================
+# 🔁 LIVE HFT Loop (all symbols, one request per tick)
+# =============================================
+def run_polling():
+    while True:
+        ny_time = datetime.now(TIMEZONE)
+        market_open = ny_time.replace(hour=9, minute=30, second=0, microsecond=0)
+        market_close = ny_time.replace(hour=16, minute=0, second=0, microsecond=0)
+
+        if ny_time < market_open:
+            print(f"⏰ Market not open yet (NY time: {ny_time.strftime('%Y-%m-%d %H:%M:%S')}). Waiting...")
+            time.sleep(300)
+            continue
+
+        if ny_time >= market_close:
+            print("✅ Market closed. Exiting loop.")
+            break
+
+        # 📈 One multi-symbol request for every symbol's missing bars
+        utc_now = datetime.now(timezone.utc)
+        new_bars = fetch_new_bars(data_client, windows, utc_now, timeframe=TIMEFRAME)
+        scheduler.mark("data")
+
+        evaluated = {}
+        for symbol, strategy in strategies.items():
+            strategy.add_bars(new_bars[symbol])
+            if strategy.latest is None:
+                print(f"⚠️ No data returned for {symbol} yet.")
+                continue
+            bar_timestamp = strategy.latest['timestamp']
+            if not scheduler.is_new_bar(bar_timestamp, key=symbol):
+                continue  # nothing new for this symbol since the last tick
+            evaluate(symbol, strategy)
+            evaluated[symbol] = bar_timestamp
+
+        if evaluated:
+            snapshot.save()
+            # One latency row per evaluated symbol, against that symbol's own bar
+            for symbol, bar_timestamp in evaluated.items():
+                scheduler.record(bar_timestamp, key=symbol)
+        scheduler.wait()
+
+
+print(f"🚀 Starting DAILY HFT Scalping Strategy for {', '.join(strategies)} with final AUDIT log save")
+
+try:
+    restore_snapshot()
+    warm_up_confirmation()
+    if args.stream:
+        run_stream()
+    else:
+        run_polling()
+
+except Exception as e:
+    print(f"⚠️ ERROR: {e}")
+
+finally:
+    snapshot.flush()
+    scheduler.close()
+    for audit_log in audit_logs.values():
+        audit_log.close()
+        print(f"📑 Final audit log saved to {audit_log.filename}")
+    if not args.stream:
+        print(f"⏲️ {scheduler.latency_summary()}")
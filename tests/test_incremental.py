@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.incremental import RollingMedian, RollingQuantile
+
+
+def _stream(quantile, values):
+    return np.array([quantile.update(x) for x in values])
+
+
+def test_rolling_quantile_matches_pandas():
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(size=3000), 1)  # rounded: plenty of ties
+    values[[100, 101, 2500]] = np.nan
+    for window, q in [(1, 0.5), (5, 0.2), (50, 0.5), (50, 0.8), (390, 0.95)]:
+        expected = pd.Series(values).rolling(window).quantile(q).to_numpy()
+        np.testing.assert_allclose(_stream(RollingQuantile(window, q), values), expected, rtol=1e-12, atol=1e-12)
+    expected = pd.Series(values).rolling(50).median().to_numpy()
+    np.testing.assert_allclose(_stream(RollingMedian(50), values), expected, rtol=1e-12, atol=1e-12)
+
+
+def test_rolling_quantile_memory_stays_bounded():
+    window = 50
+    quantile = RollingQuantile(window, q=0.8)
+    values = np.cumsum(np.random.default_rng(1).normal(size=200_000))  # drifting: old values never reach a top
+    for x in values.tolist():
+        quantile.update(x)
+        assert len(quantile._low) + len(quantile._high) <= 2 * window + 1
+        assert len(quantile._delayed) <= window + 1
+    assert quantile.value == pd.Series(values[-window:]).quantile(0.8)
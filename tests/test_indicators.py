@@ -0,0 +1,53 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from trading.indicators import ema, macd, rolling_median, rolling_quantile, rsi
+
+
+@pytest.mark.parametrize("window, q", [(1, 0.5), (4, 0.5), (5, 0.2), (50, 0.8), (390, 0.95), (390, 0.0), (390, 1.0)])
+def test_rolling_quantile_matches_pandas(window, q):
+    rng = np.random.default_rng(window)
+    values = np.round(rng.normal(size=2000), 1)  # rounded: plenty of ties
+    values[[10, 11, 1500]] = np.nan
+    expected = pd.Series(values).rolling(window).quantile(q).to_numpy()
+    np.testing.assert_allclose(rolling_quantile(values, window, q), expected, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("window", [1, 4, 5, 390])
+def test_rolling_median_matches_pandas(window):
+    values = np.round(np.random.default_rng(window).normal(size=2000), 1)
+    values[[10, 1500]] = np.nan
+    expected = pd.Series(values).rolling(window).median().to_numpy()
+    np.testing.assert_allclose(rolling_median(values, window), expected, rtol=1e-12, atol=1e-12)
+
+
+def test_rolling_quantile_window_longer_than_series():
+    assert np.isnan(rolling_quantile(np.arange(5.0), 10, 0.8)).all()
+    assert np.isnan(rolling_median(np.arange(5.0), 10)).all()
+
+
+def test_rolling_quantile_rejects_q_outside_unit_interval():
+    with pytest.raises(ValueError):
+        rolling_quantile(np.arange(5.0), 3, 1.5)
+
+
+def test_ewm_indicators_match_ta_across_missing_bars():
+    ta = pytest.importorskip("ta")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(size=1000))
+    close[[3, 500, 700, 701, 702, 999]] = np.nan  # in the warm-up, alone, a run, the last bar
+    series = pd.Series(close)
+
+    expected = ta.trend.EMAIndicator(series, 12).ema_indicator().to_numpy()
+    assert np.isnan(ema(close, 12)).sum() == 12
+    np.testing.assert_allclose(ema(close, 12), expected, rtol=1e-12)
+
+    reference = ta.trend.MACD(series)
+    line, signal, _ = macd(close)
+    np.testing.assert_allclose(line, reference.macd().to_numpy(), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(signal, reference.macd_signal().to_numpy(), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(rsi(close), ta.momentum.RSIIndicator(series).rsi().to_numpy(), rtol=1e-12)
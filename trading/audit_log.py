@@ -0,0 +1,90 @@
+import atexit
+import csv
+import math
+import os
+import time
+from datetime import datetime
+
+
+def _format(value):
+    """Cell text the way `DataFrame.to_csv` wrote the old audit files (NaN/None -> empty)."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and math.isnan(value):
+        return ""
+    return str(value)
+
+
+# =============================================
+# 📑 Append-only audit writer
+# =============================================
+class AuditWriter:
+    """Streams audit rows to `<prefix>_<YYYYmmdd_HHMMSS>.csv` instead of holding them all in memory.
+
+    Rows are buffered column-wise and appended in batches once `flush_rows`
+    rows are pending or `flush_seconds` have passed, then fsync'd, so a hard
+    kill loses at most one batch. When the local date changes the current
+    file is closed and a new one started. Memory stays flat however long
+    the session runs.
+    """
+
+    def __init__(self, prefix, columns, directory=".", flush_rows=30, flush_seconds=60.0):
+        self.prefix = prefix
+        self.columns = list(columns)
+        self.directory = directory
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+
+        self.rows_written = 0
+        self.filename = None
+        self._buffer = {column: [] for column in self.columns}
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._day = None
+        self._file = None
+        self._writer = None
+        atexit.register(self.close)
+
+    def append(self, row):
+        if self._day != datetime.now().date():
+            self._rotate()
+        for column in self.columns:
+            self._buffer[column].append(row.get(column))
+        self._pending += 1
+        if self._pending >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            if self._writer is None:
+                self._rotate()
+            columns = [self._buffer[column] for column in self.columns]
+            self._writer.writerows([_format(v) for v in row] for row in zip(*columns))
+            for values in columns:
+                values.clear()
+            self.rows_written += self._pending
+            self._pending = 0
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def _rotate(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+        now = datetime.now()
+        self._day = now.date()
+        self.filename = os.path.join(self.directory, f"{self.prefix}_{now.strftime('%Y%m%d_%H%M%S')}.csv")
+        new_file = not os.path.exists(self.filename)
+        self._file = open(self.filename, "a", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        if new_file:
+            self._writer.writerow(self.columns)
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+        self._writer = None
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+TRADE_COLUMNS = ["Entry Time", "Exit Time", "Entry Price", "Exit Price", "PnL ($)", "Return (%)", "Exit Reason"]
+
+
+def _first_at_or_after(indices, position):
+    """First value in sorted `indices` that is >= position, or -1."""
+    k = np.searchsorted(indices, position)
+    return indices[k] if k < len(indices) else -1
+
+
+def _trailing_exit(close, entry, last, trailing_stop, chunk=64):
+    """First bar in (entry, last] where close <= trailing_stop * highest close since entry, or -1.
+
+    Scans forward in growing chunks with a running max, so a trade costs
+    O(its length) vectorized work instead of one Python step per bar.
+    """
+    peak = close[entry]
+    start = entry + 1
+    while start <= last:
+        stop = min(last + 1, start + chunk)
+        segment = close[start:stop]
+        running_high = np.maximum.accumulate(segment)
+        np.maximum(running_high, peak, out=running_high)
+        hit = segment <= running_high * trailing_stop
+        if hit.any():
+            return start + int(hit.argmax())
+        peak = running_high[-1]
+        start = stop
+        chunk *= 2
+    return -1
+
+
+# =============================================
+# ⚡ Vectorized backtest
+# =============================================
+def run_backtest(close, buy_signal, sell_signal, timestamps=None, trailing_stop=None, qty=100):
+    """Long-only backtest with the live loop's rules, without a per-bar Python loop.
+
+    Enter on a buy signal while flat. While in a position, exit on the
+    first later bar where the close falls to `trailing_stop` x the highest
+    close since entry (checked first, like SymbolStrategy.decide), or on a
+    sell signal. A position still open at the end is not reported.
+
+    Returns the trade table (TRADE_COLUMNS) as a DataFrame.
+    """
+    close = np.asarray(close, dtype=float)
+    buy_idx = np.flatnonzero(np.asarray(buy_signal, dtype=bool))
+    sell_idx = np.flatnonzero(np.asarray(sell_signal, dtype=bool))
+    timestamps = pd.Index(np.arange(len(close)) if timestamps is None else timestamps)
+    n = len(close)
+
+    entries, exits, reasons = [], [], []
+    position = 0
+    while position < n:
+        entry = _first_at_or_after(buy_idx, position)
+        if entry < 0:
+            break
+        sell_exit = _first_at_or_after(sell_idx, entry + 1)
+        last = sell_exit if sell_exit >= 0 else n - 1
+        stop_exit = _trailing_exit(close, entry, last, trailing_stop) if trailing_stop else -1
+
+        if stop_exit >= 0:
+            exit_at, reason = stop_exit, "TRAILING_STOP"
+        elif sell_exit >= 0:
+            exit_at, reason = sell_exit, "SELL"
+        else:
+            break  # still open at the end of the data
+        entries.append(entry)
+        exits.append(exit_at)
+        reasons.append(reason)
+        position = exit_at + 1
+
+    entries = np.asarray(entries, dtype=np.int64)
+    exits = np.asarray(exits, dtype=np.int64)
+    entry_price = close[entries]
+    exit_price = close[exits]
+    return pd.DataFrame({
+        "Entry Time": timestamps.take(entries),
+        "Exit Time": timestamps.take(exits),
+        "Entry Price": entry_price,
+        "Exit Price": exit_price,
+        "PnL ($)": np.round((exit_price - entry_price) * qty, 2),
+        "Return (%)": np.round((exit_price - entry_price) / entry_price * 100, 2),
+        "Exit Reason": reasons,
+    }, columns=TRADE_COLUMNS)
+
+
+def summarize(trades):
+    """Total PnL, average return and win rate of a trade table."""
+    return {
+        "trades": len(trades),
+        "total_pnl": trades["PnL ($)"].sum(),
+        "avg_return": trades["Return (%)"].mean(),
+        "win_rate": (trades["PnL ($)"] > 0).sum() / len(trades) * 100 if len(trades) else 0.0,
+    }
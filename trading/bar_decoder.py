@@ -0,0 +1,161 @@
+import copy
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+# float64 columns decoded next to the int64 ns timestamps, in this row order
+BAR_COLUMNS = ["open", "high", "low", "close", "volume", "trade_count", "vwap"]
+# Keys of the same fields in the bars JSON
+_RAW_KEYS = ["o", "h", "l", "c", "v", "n", "vw"]
+
+_DIGIT = 48  # ord("0")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Up to this many bars (a live tick's worth) plain Python beats NumPy's per-call overhead
+_SMALL_BATCH = 32
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def parse_timestamps(strings):
+    """RFC 3339 bar times -> int64 epoch ns.
+
+    Alpaca sends bar times as fixed-width "YYYY-MM-DDTHH:MM:SSZ"; batches of
+    those are decoded as one uint8 buffer with integer arithmetic, no
+    per-string parsing. A live tick's handful of bars goes through
+    `datetime.fromisoformat`, anything else (offsets, odd widths) through pandas.
+    """
+    n = len(strings)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+    if n <= _SMALL_BATCH:
+        try:
+            return np.array([(datetime.fromisoformat(s) - _EPOCH) // _MICROSECOND * 1000 for s in strings], dtype=np.int64)
+        except (TypeError, ValueError):  # naive or unusual strings
+            pass
+    joined = "".join(strings).encode("ascii", "replace")
+    if len(joined) == 20 * n:
+        chars = np.frombuffer(joined, dtype=np.uint8).reshape(n, 20)
+        if (chars[:, 19] == ord("Z")).all() and (chars[:, 10] == ord("T")).all():
+            d = chars.astype(np.int64) - _DIGIT
+            year = d[:, 0] * 1000 + d[:, 1] * 100 + d[:, 2] * 10 + d[:, 3]
+            month = d[:, 5] * 10 + d[:, 6]
+            day = d[:, 8] * 10 + d[:, 9]
+            seconds = (d[:, 11] * 10 + d[:, 12]) * 3600 + (d[:, 14] * 10 + d[:, 15]) * 60 + d[:, 17] * 10 + d[:, 18]
+
+            # days since 1970-01-01 for a proleptic Gregorian date (H. Hinnant's days_from_civil)
+            year = year - (month <= 2)
+            era = year // 400
+            year_of_era = year - era * 400
+            day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+            day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+            days = era * 146097 + day_of_era - 719468
+            return (days * 86400 + seconds) * 10**9
+    return pd.to_datetime(list(strings), utc=True, format="ISO8601").as_unit("ns").asi8
+
+
+def _raw_column(bars, key):
+    try:
+        return np.fromiter(map(itemgetter(key), bars), dtype=float, count=len(bars))
+    except (KeyError, TypeError):  # field missing or null on some bars
+        return np.array([math.nan if bar.get(key) is None else bar[key] for bar in bars], dtype=float)
+
+
+# =============================================
+# 🧬 Bars -> columns
+# =============================================
+def bar_columns(bars):
+    """One symbol's bars -> (int64 ns timestamps, float64 [column, bar] values).
+
+    `bars` is the raw JSON list (dicts keyed t/o/h/l/c/v/n/vw), which is
+    decoded column by column without building a Python object per bar.
+    alpaca `Bar` objects and `model_dump()` dicts are accepted too, on the
+    slower generic path. Each row of `values` is one BAR_COLUMNS entry.
+    """
+    if isinstance(bars, dict):  # latest-bar endpoints give one bar per symbol
+        bars = [bars]
+    values = np.empty((len(BAR_COLUMNS), len(bars)))
+    if not bars:
+        return np.empty(0, dtype=np.int64), values
+
+    if isinstance(bars[0], dict) and "t" in bars[0]:
+        timestamps = parse_timestamps(list(map(itemgetter("t"), bars)))
+        if len(bars) <= _SMALL_BATCH:
+            values[:] = np.array([[bar.get(key) for bar in bars] for key in _RAW_KEYS], dtype=float)
+            return timestamps, values
+        for i, key in enumerate(_RAW_KEYS):
+            values[i] = _raw_column(bars, key)
+        return timestamps, values
+
+    rows = [bar if isinstance(bar, dict) else bar.model_dump() for bar in bars]
+    timestamps = pd.to_datetime([row["timestamp"] for row in rows], utc=True).as_unit("ns").asi8
+    for i, column in enumerate(BAR_COLUMNS):
+        values[i] = [math.nan if row.get(column) is None else row[column] for row in rows]
+    return timestamps, values
+
+
+def decode_bars(raw):
+    """Bars response -> {symbol: (timestamps, values)}.
+
+    `raw` is the JSON body (str/bytes), the parsed response
+    (`{"bars": {...}, "next_page_token": ...}`) or the `{symbol: [bars]}`
+    dict an alpaca client returns with `raw_data=True`.
+    """
+    if isinstance(raw, (str, bytes, bytearray)):
+        raw = json.loads(raw)
+    if isinstance(raw.get("bars"), dict):
+        raw = raw["bars"]
+    return {symbol: bar_columns(bars) for symbol, bars in raw.items()}
+
+
+def fetch_bars(data_client, request):
+    """Run a Stock/CryptoBarsRequest and decode it straight to columns.
+
+    The request goes through a raw-data copy of `data_client` (same session
+    and credentials), so alpaca-py still handles auth, retries and paging
+    but never builds its pydantic `Bar` models. Clients without a raw mode
+    (e.g. the replay harness fakes) fall back to decoding their objects.
+    """
+    if hasattr(data_client, "_use_raw_data"):
+        raw_client = copy.copy(data_client)
+        raw_client._use_raw_data = True
+    else:
+        raw_client = data_client
+
+    if hasattr(data_client, "get_crypto_bars"):
+        data = raw_client.get_crypto_bars(request)
+    else:
+        data = raw_client.get_stock_bars(request)
+    if not isinstance(data, dict):
+        data = data.data
+    return {symbol: bar_columns(bars) for symbol, bars in data.items() if bars}
+
+
+# =============================================
+# 🪞 Views
+# =============================================
+def to_columns(timestamps, values):
+    """{column: ndarray} like `BarStore.read()`; the float columns are views into `values`."""
+    columns = {"timestamp": timestamps}
+    for i, column in enumerate(BAR_COLUMNS):
+        columns[column] = values[i]
+    return columns
+
+
+def to_frame(timestamps, values, symbol=None):
+    """DataFrame in the `pd.DataFrame([bar.model_dump() ...])` layout, backed by `values` without a copy."""
+    df = pd.DataFrame(values.T, columns=BAR_COLUMNS, copy=False)
+    df.insert(0, "timestamp", pd.DatetimeIndex(np.asarray(timestamps).view("datetime64[ns]")).tz_localize("UTC"))
+    if symbol is not None:
+        df.insert(0, "symbol", symbol)
+    return df
+
+
+def to_rows(timestamps, values, symbol):
+    """Per-bar dicts with the `bar.model_dump()` fields, for the few bars a live tick adds."""
+    return [
+        {"symbol": symbol, "timestamp": pd.Timestamp(ts, tz="UTC"), **dict(zip(BAR_COLUMNS, column))}
+        for ts, column in zip(np.asarray(timestamps).tolist(), values.T.tolist())
+    ]
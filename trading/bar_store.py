@@ -0,0 +1,229 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from alpaca.data.requests import StockBarsRequest, CryptoBarsRequest
+from alpaca.data.timeframe import TimeFrameUnit
+
+from trading.bar_decoder import BAR_COLUMNS, fetch_bars, to_columns
+
+DEFAULT_ROOT = os.getenv(
+    "BAR_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Historical Files", "bar_store")
+)
+
+_UNIT_SECONDS = {
+    TimeFrameUnit.Minute: 60,
+    TimeFrameUnit.Hour: 3600,
+    TimeFrameUnit.Day: 86400,
+    TimeFrameUnit.Week: 7 * 86400,
+    TimeFrameUnit.Month: 31 * 86400,
+}
+# Bars closed less than this long ago may still be published late: they are stored but the
+# range is not marked covered, so the next backfill asks for it again
+COVERAGE_SETTLE_SECONDS = 10 * 60
+
+
+def _to_ns(t):
+    ts = pd.Timestamp(t)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value
+
+
+def _merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+# =============================================
+# 🗄️ Local bar store
+# =============================================
+class BarStore:
+    """On-disk cache of historical bars, so repeat backtests and charts skip the API.
+
+    Layout is `<root>/<SYMBOL>/<timeframe>/<partition>/` with one partition
+    per UTC day for intraday timeframes (per year for daily and longer).
+    Each partition holds `timestamp.npy` (int64 ns) and `values.npy`
+    (float64, one contiguous row per BAR_COLUMNS entry); both are opened
+    memory-mapped on read. `coverage.json` records which time ranges have
+    already been requested, so a range with no bars (weekend, holiday) is
+    not fetched again and only the real gaps go to the API. The last
+    `COVERAGE_SETTLE_SECONDS` before now are never marked covered, so a
+    bar the provider publishes late is picked up by a later backfill.
+
+    Without a `data_client` the store is read-only and never touches the
+    network. Bars that have not closed yet are never stored.
+    """
+
+    def __init__(self, data_client=None, root=DEFAULT_ROOT, feed="iex"):
+        self.data_client = data_client
+        self.root = root
+        self.feed = feed
+        self.requests_made = 0
+
+    # ----- layout -----
+    def _series_dir(self, symbol, timeframe):
+        return os.path.join(self.root, symbol.replace("/", "-"), timeframe.value)
+
+    @staticmethod
+    def _partition_unit(timeframe):
+        return "D" if _UNIT_SECONDS[timeframe.unit] < 86400 else "Y"
+
+    def _partition_keys(self, timeframe, start_ns, end_ns):
+        unit = self._partition_unit(timeframe)
+        first = np.datetime64(start_ns, "ns").astype(f"datetime64[{unit}]")
+        last = np.datetime64(end_ns - 1, "ns").astype(f"datetime64[{unit}]")
+        return [str(key) for key in np.arange(first, last + 1)]
+
+    def _load_coverage(self, series_dir):
+        path = os.path.join(series_dir, "coverage.json")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_coverage(self, series_dir, coverage):
+        path = os.path.join(series_dir, "coverage.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(coverage, f)
+        os.replace(path + ".tmp", path)
+
+    def _load_partition(self, path, mmap_mode="r"):
+        if not os.path.exists(os.path.join(path, "values.npy")):
+            return None, None
+        timestamps = np.load(os.path.join(path, "timestamp.npy"), mmap_mode=mmap_mode)
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode=mmap_mode)
+        return timestamps, values
+
+    def _write_partition(self, path, timestamps, values):
+        old_ts, old_values = self._load_partition(path, mmap_mode=None)
+        if old_ts is not None:
+            timestamps = np.concatenate([timestamps, old_ts])
+            values = np.concatenate([values, old_values], axis=1)
+        # newest fetch wins on duplicate timestamps
+        timestamps, first = np.unique(timestamps, return_index=True)
+        values = np.ascontiguousarray(values[:, first])
+
+        os.makedirs(path, exist_ok=True)
+        for name, array in (("timestamp", timestamps), ("values", values)):
+            target = os.path.join(path, f"{name}.npy")
+            with open(target + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(target + ".tmp", target)
+
+    # ----- gaps and backfill -----
+    def _closed_until(self, timeframe, settle_seconds=0):
+        """Bars starting before this (ns) have closed (at least `settle_seconds` ago)."""
+        interval_ns = timeframe.amount * _UNIT_SECONDS[timeframe.unit] * 10**9
+        return _to_ns(datetime.now(timezone.utc)) - interval_ns - settle_seconds * 10**9 + 1
+
+    def missing_ranges(self, symbol, timeframe, start, end):
+        """[(start_ns, end_ns)] sub-ranges of [start, end) never requested before."""
+        start_ns = _to_ns(start)
+        end_ns = min(_to_ns(end), self._closed_until(timeframe))
+        gaps = []
+        cursor = start_ns
+        for covered_start, covered_end in self._load_coverage(self._series_dir(symbol, timeframe)):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end_ns:
+                break
+            if covered_start > cursor:
+                gaps.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end_ns:
+            gaps.append((cursor, end_ns))
+        return gaps
+
+    def _request_bars(self, symbol, timeframe, start_ns, end_ns):
+        """(timestamps, values) for [start_ns, end_ns), decoded straight from the response."""
+        start = pd.Timestamp(start_ns, tz="UTC").isoformat()
+        end = pd.Timestamp(end_ns, tz="UTC").isoformat()
+        if hasattr(self.data_client, "get_crypto_bars"):
+            request = CryptoBarsRequest(symbol_or_symbols=[symbol], timeframe=timeframe, start=start, end=end)
+        else:
+            request = StockBarsRequest(symbol_or_symbols=[symbol], timeframe=timeframe, start=start, end=end, feed=self.feed)
+        self.requests_made += 1
+        empty = (np.empty(0, dtype=np.int64), np.empty((len(BAR_COLUMNS), 0)))
+        return fetch_bars(self.data_client, request).get(symbol, empty)
+
+    def backfill(self, symbol, timeframe, start, end):
+        """Fetch and store only the missing ranges; returns the number of bars added."""
+        gaps = self.missing_ranges(symbol, timeframe, start, end)
+        if not gaps or self.data_client is None:
+            return 0
+
+        series_dir = self._series_dir(symbol, timeframe)
+        coverage = self._load_coverage(series_dir)
+        unit = self._partition_unit(timeframe)
+        settled_until = self._closed_until(timeframe, COVERAGE_SETTLE_SECONDS)
+        added = 0
+        for gap_start, gap_end in gaps:
+            timestamps, values = self._request_bars(symbol, timeframe, gap_start, gap_end)
+            keep = (timestamps >= gap_start) & (timestamps < gap_end)
+            timestamps, values = timestamps[keep], values[:, keep]
+
+            partitions = timestamps.astype("datetime64[ns]").astype(f"datetime64[{unit}]")
+            for key in np.unique(partitions):
+                in_partition = partitions == key
+                self._write_partition(os.path.join(series_dir, str(key)), timestamps[in_partition], values[:, in_partition])
+            added += len(timestamps)
+
+            # Only mark the range covered once its bars are on disk, and never its unsettled tail
+            covered_end = min(gap_end, settled_until)
+            if covered_end <= gap_start:
+                continue
+            coverage = _merge_intervals(coverage + [[int(gap_start), int(covered_end)]])
+            os.makedirs(series_dir, exist_ok=True)
+            self._save_coverage(series_dir, coverage)
+        return added
+
+    # ----- read API -----
+    def read(self, symbol, timeframe, start, end):
+        """Stored bars in [start, end) as {column: ndarray}; never touches the network.
+
+        A range inside a single partition comes back as read-only views of
+        the memory-mapped files (no copy).
+        """
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        series_dir = self._series_dir(symbol, timeframe)
+        ts_parts, value_parts = [], []
+        for key in self._partition_keys(timeframe, start_ns, end_ns):
+            timestamps, values = self._load_partition(os.path.join(series_dir, key))
+            if timestamps is None:
+                continue
+            lo, hi = np.searchsorted(timestamps, [start_ns, end_ns])
+            if hi > lo:
+                ts_parts.append(timestamps[lo:hi])
+                value_parts.append(values[:, lo:hi])
+
+        if not ts_parts:
+            timestamps, values = np.empty(0, dtype=np.int64), np.empty((len(BAR_COLUMNS), 0))
+        elif len(ts_parts) == 1:
+            timestamps, values = ts_parts[0], value_parts[0]
+        else:
+            timestamps, values = np.concatenate(ts_parts), np.concatenate(value_parts, axis=1)
+
+        return to_columns(timestamps, values)
+
+    def bars(self, symbol, timeframe, start, end):
+        """Backfill what's missing (if online), then read as NumPy columns."""
+        self.backfill(symbol, timeframe, start, end)
+        return self.read(symbol, timeframe, start, end)
+
+    def frame(self, symbol, timeframe, start, end):
+        """Same as `bars()` but as the DataFrame `pd.DataFrame([bar.model_dump() ...])` gives."""
+        columns = self.bars(symbol, timeframe, start, end)
+        df = pd.DataFrame({column: np.asarray(values) for column, values in columns.items()})
+        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        df.insert(0, 'symbol', symbol)
+        return df
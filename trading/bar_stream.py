@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+import numpy as np
+
+from alpaca.data.enums import DataFeed
+from alpaca.data.live import StockDataStream
+
+# Short keys of a raw stream bar -> column names used everywhere else
+RAW_BAR_FIELDS = {
+    "o": "open",
+    "h": "high",
+    "l": "low",
+    "c": "close",
+    "v": "volume",
+    "n": "trade_count",
+    "vw": "vwap",
+}
+
+
+def raw_bar_to_row(msg):
+    """Raw msgpack stream bar -> the same row dict `bar.model_dump()` gives."""
+    row = {"symbol": msg["S"], "timestamp": msg["t"].to_datetime()}
+    for key, column in RAW_BAR_FIELDS.items():
+        row[column] = msg.get(key)
+    return row
+
+
+# =============================================
+# 📶 Event-driven bar ingestion
+# =============================================
+class BarStream:
+    """Calls `on_bar(row)` the moment a minute bar arrives on the websocket.
+
+    Uses alpaca's StockDataStream in raw mode (no pydantic model per bar).
+    `url` points it at another endpoint, e.g. the local replay feed in
+    trading/replay_feed.py. With `idle_exit` the stream stops once no bar
+    has arrived for that many seconds, which ends a replay cleanly.
+
+    For every bar the delay up to the end of `on_bar` is recorded: from the
+    replay feed's send stamp when present, otherwise from the bar close.
+    """
+
+    def __init__(self, api_key, secret_key, symbols, on_bar, url=None, feed="iex",
+                 idle_exit=None, bar_interval=timedelta(minutes=1)):
+        self.symbols = list(symbols)
+        self.on_bar = on_bar
+        self.idle_exit = idle_exit
+        self.bar_interval_ns = int(bar_interval.total_seconds() * 1e9)
+        self.stream = StockDataStream(api_key, secret_key, raw_data=True, feed=DataFeed(feed), url_override=url)
+        self.latencies_ms = deque(maxlen=100_000)
+        self.bars_received = 0
+        self._last_bar_at = None
+
+    async def _handle(self, msg):
+        self._last_bar_at = time.monotonic()
+        self.bars_received += 1
+        self.on_bar(raw_bar_to_row(msg))
+
+        done = time.time_ns()
+        origin = msg.get("st")
+        if origin is None:
+            origin = msg["t"].to_unix_nano() + self.bar_interval_ns
+        self.latencies_ms.append((done - origin) / 1e6)
+
+    def _watch_idle(self):
+        while True:
+            time.sleep(min(self.idle_exit, 1.0))
+            if self._last_bar_at is not None and time.monotonic() - self._last_bar_at > self.idle_exit:
+                print(f"⏹️ No bars for {self.idle_exit}s, stopping stream.")
+                self.stream.stop()
+                return
+
+    def run(self):
+        """Blocks until the stream is stopped (Ctrl-C, `stop()` or idle exit)."""
+        self.stream.subscribe_bars(self._handle, *self.symbols)
+        if self.idle_exit:
+            threading.Thread(target=self._watch_idle, daemon=True).start()
+        self.stream.run()
+
+    def stop(self):
+        self.stream.stop()
+
+    def latency_summary(self):
+        if not self.latencies_ms:
+            return "no bars received"
+        lat = np.fromiter(self.latencies_ms, dtype=float)
+        return (f"{self.bars_received} bars | latency ms p50 {np.percentile(lat, 50):.2f} "
+                f"p99 {np.percentile(lat, 99):.2f} max {lat.max():.2f}")
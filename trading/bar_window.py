@@ -0,0 +1,137 @@
+import math
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from alpaca.data.requests import StockBarsRequest, CryptoBarsRequest
+from alpaca.data.timeframe import TimeFrame
+
+from trading.bar_decoder import BAR_COLUMNS, fetch_bars, to_rows
+
+
+# =============================================
+# 🪟 Rolling bar window
+# =============================================
+class RollingBarWindow:
+    """Keeps the last `maxlen` bars of one symbol in memory.
+
+    The first fetch pulls the full lookback. After that only bars newer than
+    the last stored timestamp are requested, so a missed tick is backfilled
+    by the next request. If the window has gone stale for longer than its
+    own length it falls back to a full lookback reload.
+    """
+
+    def __init__(self, symbol, maxlen=120, bar_interval=timedelta(minutes=1)):
+        self.symbol = symbol
+        self.maxlen = maxlen
+        self.bar_interval = bar_interval
+        self.gaps = 0  # missing bar slots seen between consecutive bars
+        self._bars = OrderedDict()  # timestamp -> bar row
+
+    def __len__(self):
+        return len(self._bars)
+
+    @property
+    def last_timestamp(self):
+        if not self._bars:
+            return None
+        return next(reversed(self._bars))
+
+    def request_start(self, now):
+        """Start of the next request: just after the last bar, or the full lookback."""
+        lookback_start = pd.Timestamp(now) - self.bar_interval * self.maxlen
+        last = self.last_timestamp
+        if last is None or last < lookback_start:
+            return lookback_start
+        return last + self.bar_interval
+
+    def extend(self, bars):
+        """Append bars (alpaca `Bar` objects or dicts); returns the rows that were new."""
+        new_rows = []
+        for bar in bars:
+            row = bar if isinstance(bar, dict) else bar.model_dump()
+            ts = pd.Timestamp(row["timestamp"])
+            last = self.last_timestamp
+            if last is not None:
+                if ts <= last:
+                    continue
+                missing = int((ts - last) / self.bar_interval) - 1
+                if missing > 0:
+                    self.gaps += missing
+            self._bars[ts] = row
+            new_rows.append(row)
+
+        while len(self._bars) > self.maxlen:
+            self._bars.popitem(last=False)
+        return new_rows
+
+    def extend_columns(self, timestamps, values):
+        """Same as `extend` for decoded columns; only bars newer than the window become rows."""
+        last = self.last_timestamp
+        first_new = 0 if last is None else int(np.searchsorted(timestamps, last.value, side="right"))
+        return self.extend(to_rows(timestamps[first_new:], values[:, first_new:], self.symbol))
+
+    def state(self, tail=None):
+        """Window bars (only the last `tail` if given) as {"timestamp": [epoch ns], <BAR_COLUMNS>: [...]}, ready for JSON."""
+        stamps = list(self._bars)
+        rows = list(self._bars.values())
+        if tail is not None:
+            stamps, rows = stamps[-tail:], rows[-tail:]
+        state = {"timestamp": [ts.value for ts in stamps], "gaps": self.gaps}
+        for column in BAR_COLUMNS:
+            state[column] = [row.get(column, math.nan) for row in rows]
+        return state
+
+    def load_state(self, state):
+        self._bars.clear()
+        values = np.array([state[column] for column in BAR_COLUMNS], dtype=float).reshape(len(BAR_COLUMNS), -1)
+        self.extend(to_rows(np.array(state["timestamp"], dtype=np.int64), values, self.symbol))
+        self.gaps = state["gaps"]
+
+    def to_frame(self):
+        """Window as a DataFrame indexed by bar time, same layout the scripts build."""
+        df = pd.DataFrame(list(self._bars.values()))
+        if df.empty:
+            return df
+        df['time'] = pd.to_datetime(df['timestamp'])
+        df.set_index('time', inplace=True)
+        return df
+
+
+# =============================================
+# 📡 Incremental fetch
+# =============================================
+def fetch_new_bars(data_client, windows, now, timeframe=TimeFrame.Minute, feed="iex"):
+    """Fetch only the bars each window is missing with a single bars request.
+
+    `windows` maps symbol -> RollingBarWindow. Stock and crypto clients are
+    both supported; the response is decoded straight to columns and only
+    the new bars become row dicts. Returns {symbol: [new rows]}.
+    """
+    start = min(window.request_start(now) for window in windows.values())
+    if start > now:
+        return {symbol: [] for symbol in windows}
+
+    if hasattr(data_client, "get_crypto_bars"):
+        request = CryptoBarsRequest(
+            symbol_or_symbols=list(windows),
+            timeframe=timeframe,
+            start=start.isoformat(),
+            end=now.isoformat()
+        )
+    else:
+        request = StockBarsRequest(
+            symbol_or_symbols=list(windows),
+            timeframe=timeframe,
+            start=start.isoformat(),
+            end=now.isoformat(),
+            feed=feed
+        )
+    data = fetch_bars(data_client, request)
+
+    return {
+        symbol: window.extend_columns(*data[symbol]) if symbol in data else []
+        for symbol, window in windows.items()
+    }
@@ -0,0 +1,414 @@
+"""Per-stage timings of one strategy tick over synthetic sessions.
+
+    python -m trading.benchmark                       # 1k / 10k / 100k bars
+    python -m trading.benchmark --sizes 1000 --compare bench_<commit>_<time>.json
+    python -m trading.benchmark --path indicators --sizes 100000 1000000
+
+Two tick pipelines are timed, stage by stage and end to end:
+  full         the per-tick recompute in misc/test-deployment.py: bars request,
+               model_dump -> DataFrame, pd.to_datetime, each `ta` indicator,
+               ATR rolling median, signal evaluation, audit append, order build;
+               `columnar_*` time the trading.bar_decoder path that replaces
+               the first three
+  incremental  the universal-strat-run.py / strat-run-multi.py loop: one-bar
+               request, StrategyIndicators.update, conditions + decision,
+               audit append, order build (plus the one-off warm-up over all bars)
+  indicators   each `ta` indicator (and pandas' rolling ATR median / 80th
+               percentile over 50 and 390 bars) next to its trading.indicators
+               version over the whole session (what backtests, sweeps and
+               charts compute); the `np_*` records carry their largest
+               difference from the reference
+
+Bars are served by an in-process trading.mock_alpaca server with no added
+latency, so `bar_request` is HTTP + JSON + alpaca-py parsing on localhost.
+Results are written as JSON (one record per path/stage/size, with the git
+commit and library versions) so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import ta
+from alpaca.data.historical import StockHistoricalDataClient
+from alpaca.data.requests import StockBarsRequest
+from alpaca.data.timeframe import TimeFrame
+from alpaca.trading.enums import OrderSide, TimeInForce
+from alpaca.trading.requests import MarketOrderRequest
+from ta.momentum import RSIIndicator
+from ta.trend import MACD
+from ta.volatility import AverageTrueRange, BollingerBands
+from ta.volume import VolumeWeightedAveragePrice
+
+from trading.audit_log import AuditWriter
+from trading.bar_decoder import fetch_bars, to_frame
+from trading.bar_window import RollingBarWindow, fetch_new_bars
+from trading import indicators
+from trading.mock_alpaca import MarketData, MockAlpacaServer
+from trading.strategy import AUDIT_COLUMNS, SymbolStrategy
+
+SIZES = [1_000, 10_000, 100_000]
+SYMBOL = "SPY"
+SESSION_END = datetime(2025, 6, 25, 20, 0, tzinfo=timezone.utc)
+
+
+def _time(fn, setup=None, budget=0.5, max_repeats=1000):
+    """Run `fn` until `budget` seconds are spent (at least once); per-call ms stats.
+
+    `setup` runs before each call, outside the timed region, and its return
+    value is passed to `fn`.
+    """
+    samples = []
+    spent = 0.0
+    while len(samples) < max_repeats and (not samples or spent < budget):
+        arg = setup() if setup else None
+        started = time.perf_counter()
+        fn(arg) if setup else fn()
+        elapsed = time.perf_counter() - started
+        samples.append(elapsed * 1000)
+        spent += elapsed
+    return {
+        "repeats": len(samples),
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+
+
+# =============================================
+# 🐢 Full recompute per tick (misc/test-deployment.py)
+# =============================================
+def _full_stages(client, n_bars, audit):
+    start = SESSION_END - timedelta(minutes=n_bars)
+    request = StockBarsRequest(symbol_or_symbols=[SYMBOL], timeframe=TimeFrame.Minute,
+                               start=start.isoformat(), end=SESSION_END.isoformat(), feed="iex")
+
+    def bar_request():
+        return client.get_stock_bars(request).data.get(SYMBOL)
+
+    def dump_frame(bars):
+        return pd.DataFrame([bar.model_dump() for bar in bars])
+
+    def to_datetime(df):
+        df['time'] = pd.to_datetime(df['timestamp'])
+        df.set_index('time', inplace=True)
+        return df
+
+    def bollinger(df):
+        bb = BollingerBands(close=df['close'], window=10, window_dev=1.5)
+        df['bb_upper'] = bb.bollinger_hband()
+        df['bb_lower'] = bb.bollinger_lband()
+
+    def macd(df):
+        m = MACD(close=df['close'], window_fast=9, window_slow=21, window_sign=7)
+        df['macd'] = m.macd()
+        df['macd_signal'] = m.macd_signal()
+
+    def atr(df):
+        df['atr'] = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=5).average_true_range()
+
+    def rolling_median(df):
+        return df['atr'].rolling(window=50).median()
+
+    def vwap(df):
+        df['vwap'] = VolumeWeightedAveragePrice(
+            high=df['high'], low=df['low'], close=df['close'], volume=df['volume'], window=30
+        ).volume_weighted_average_price()
+
+    def signals(df, atr_median):
+        latest = df.iloc[-1]
+        buy_signal = ((latest['close'] > latest['vwap']) and (latest['macd'] > latest['macd_signal'])
+                      and (latest['close'] < latest['bb_lower']) and (latest['atr'] > atr_median.iloc[-1]))
+        sell_signal = ((latest['close'] < latest['vwap']) and (latest['macd'] < latest['macd_signal'])
+                       and (latest['close'] > latest['bb_upper']) and (latest['atr'] > atr_median.iloc[-1]))
+        return latest, buy_signal, sell_signal
+
+    def audit_append(latest):
+        audit.append(latest.to_dict())
+
+    def order_build():
+        return MarketOrderRequest(symbol=SYMBOL, qty=100, side=OrderSide.BUY, time_in_force=TimeInForce.DAY)
+
+    def tick():
+        df = to_datetime(dump_frame(bar_request()))
+        bollinger(df)
+        macd(df)
+        atr(df)
+        atr_median = rolling_median(df)
+        vwap(df)
+        latest, _, _ = signals(df, atr_median)
+        audit_append(latest)
+        order_build()
+
+    def columnar_request():
+        return fetch_bars(client, request)[SYMBOL]
+
+    bars = bar_request()
+    columns = columnar_request()
+    raw = dump_frame(bars)
+    df = to_datetime(raw.copy())
+    for indicator in (bollinger, macd, atr, vwap):
+        indicator(df)
+    atr_median = rolling_median(df)
+    latest = df.iloc[-1]
+
+    return n_bars, [
+        ("bar_request", bar_request, None),
+        ("model_dump_frame", lambda: dump_frame(bars), None),
+        ("to_datetime", to_datetime, raw.copy),
+        ("columnar_request", columnar_request, None),
+        ("columnar_frame", lambda: to_frame(*columns), None),
+        ("ta_bollinger", bollinger, df.copy),
+        ("ta_macd", macd, df.copy),
+        ("ta_atr", atr, df.copy),
+        ("ta_vwap", vwap, df.copy),
+        ("rolling_median", lambda: rolling_median(df), None),
+        ("signal_eval", lambda: signals(df, atr_median), None),
+        ("audit_append", lambda: audit_append(latest), None),
+        ("order_build", order_build, None),
+        ("tick", tick, None),
+    ]
+
+
+# =============================================
+# ⚡ Incremental tick (universal-strat-run.py)
+# =============================================
+def _incremental_stages(client, n_bars, audit):
+    start = SESSION_END - timedelta(minutes=n_bars)
+    request = StockBarsRequest(symbol_or_symbols=[SYMBOL], timeframe=TimeFrame.Minute,
+                               start=start.isoformat(), end=SESSION_END.isoformat(), feed="iex")
+    rows = [bar.model_dump() for bar in client.get_stock_bars(request).data[SYMBOL]]
+    now = rows[-1]['timestamp'] + timedelta(seconds=61)
+
+    def primed_window():
+        window = RollingBarWindow(SYMBOL, maxlen=120)
+        window.extend(rows[-2:-1])
+        return window
+
+    def bar_request(window):
+        return fetch_new_bars(client, {SYMBOL: window}, now)[SYMBOL]
+
+    def warmup():
+        strategy = SymbolStrategy(SYMBOL, 25, lookback_bars=120)
+        strategy.add_bars(rows)
+        return strategy
+
+    strategy = warmup()
+    position = {"in_position": strategy.in_position, "entry_price": strategy.entry_price,
+                "highest_price_since_entry": strategy.highest_price_since_entry}
+
+    def indicator_update():
+        strategy.indicators.update(rows[-1])
+
+    def decide():
+        row = strategy.check_conditions()
+        strategy.decide(row)
+        strategy.__dict__.update(position)  # keep every repeat on the same branch
+        return row
+
+    row = strategy.check_conditions()
+
+    def order_build():
+        return MarketOrderRequest(symbol=SYMBOL, qty=25, side=OrderSide.BUY, time_in_force=TimeInForce.DAY)
+
+    def tick(window):
+        new_rows = bar_request(window)
+        strategy.add_bars(new_rows)
+        audit.append(decide())
+        order_build()
+
+    return n_bars, [
+        ("warmup", warmup, None),
+        ("bar_request", bar_request, primed_window),
+        ("indicator_update", indicator_update, None),
+        ("signal_eval", decide, None),
+        ("audit_append", lambda: audit.append(row), None),
+        ("order_build", order_build, None),
+        ("tick", tick, primed_window),
+    ]
+
+
+# =============================================
+# 🧮 ta vs trading.indicators (whole session)
+# =============================================
+def _max_difference(ours, theirs):
+    ours, theirs = np.asarray(ours, dtype=float), np.asarray(theirs, dtype=float)
+    if not (np.isnan(ours) == np.isnan(theirs)).all():
+        return float("inf")  # warm-up periods disagree
+    both = ~np.isnan(theirs)
+    return float(np.max(np.abs(ours[both] - theirs[both]), initial=0.0))
+
+
+def _indicator_stages(client, n_bars, audit):
+    end = int(SESSION_END.timestamp()) - 60
+    _, values = MarketData().bars(SYMBOL, 60, end - 60 * (n_bars - 1), end)
+    high, low, close, volume = values[:, 1], values[:, 2], values[:, 3], values[:, 4]
+    df = pd.DataFrame({"high": high, "low": low, "close": close, "volume": volume})
+
+    def ta_bollinger():
+        bb = BollingerBands(close=df['close'], window=10, window_dev=1.5)
+        return bb.bollinger_hband(), bb.bollinger_lband()
+
+    def ta_macd():
+        m = MACD(close=df['close'], window_fast=9, window_slow=21, window_sign=7)
+        return m.macd(), m.macd_signal()
+
+    def ta_atr():
+        return AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=5).average_true_range()
+
+    def ta_vwap():
+        return VolumeWeightedAveragePrice(high=df['high'], low=df['low'], close=df['close'], volume=df['volume'],
+                                          window=30).volume_weighted_average_price()
+
+    def ta_rsi():
+        return RSIIndicator(close=df['close'], window=14).rsi()
+
+    def ta_atr_median():
+        return ta_atr().rolling(window=50).median()
+
+    def ta_atr_p80():
+        return ta_atr().rolling(window=50).quantile(0.8)
+
+    def ta_atr_p80_390():
+        return ta_atr().rolling(window=390).quantile(0.8)
+
+    def ta_all():
+        return ta_bollinger(), ta_macd(), ta_atr_median(), ta_vwap()
+
+    def np_bollinger():
+        _, hband, lband = indicators.bollinger_bands(close, window=10, window_dev=1.5)
+        return hband, lband
+
+    def np_macd():
+        line, signal, _ = indicators.macd(close, window_slow=21, window_fast=9, window_sign=7)
+        return line, signal
+
+    def np_atr():
+        return indicators.average_true_range(high, low, close, window=5)
+
+    def np_atr_median():
+        return indicators.rolling_median(np_atr(), 50)
+
+    def np_atr_p80():
+        return indicators.rolling_quantile(np_atr(), 50, 0.8)
+
+    def np_atr_p80_390():
+        return indicators.rolling_quantile(np_atr(), 390, 0.8)
+
+    def np_vwap():
+        return indicators.volume_weighted_average_price(high, low, close, volume, window=30)
+
+    def np_rsi():
+        return indicators.rsi(close, window=14)
+
+    def np_all():
+        return np_bollinger(), np_macd(), np_atr_median(), np_vwap()
+
+    pairs = [
+        ("bollinger", ta_bollinger, np_bollinger),
+        ("macd", ta_macd, np_macd),
+        ("atr", ta_atr, np_atr),
+        ("atr_median", ta_atr_median, np_atr_median),
+        ("atr_p80", ta_atr_p80, np_atr_p80),
+        ("atr_p80_390", ta_atr_p80_390, np_atr_p80_390),
+        ("vwap", ta_vwap, np_vwap),
+        ("rsi", ta_rsi, np_rsi),
+    ]
+    differences = {}
+    for name, ta_fn, np_fn in pairs:
+        expected, got = ta_fn(), np_fn()
+        if not isinstance(expected, tuple):
+            expected, got = (expected,), (got,)
+        differences[name] = max(_max_difference(ours, theirs) for ours, theirs in zip(got, expected))
+    differences["all"] = max(differences.values())
+
+    stages = []
+    for name, ta_fn, np_fn in pairs + [("all", ta_all, np_all)]:
+        stages.append((f"ta_{name}", ta_fn, None))
+        stages.append((f"np_{name}", np_fn, None, {"max_abs_diff": differences[name]}))
+    return n_bars, stages
+
+
+# =============================================
+# 📊 Runner
+# =============================================
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(sizes=SIZES, budget=0.5, paths=("full", "incremental", "indicators"), quiet=False):
+    """Time every stage for each session size; returns the result document."""
+    builders = {"full": _full_stages, "incremental": _incremental_stages, "indicators": _indicator_stages}
+    results = []
+    mock = MockAlpacaServer().start()
+    client = StockHistoricalDataClient("bench", "bench", url_override=mock.url)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            audit = AuditWriter("bench_audit", AUDIT_COLUMNS, directory=directory)
+            for n_bars in sizes:
+                for path in paths:
+                    bars, stages = builders[path](client, n_bars, audit)
+                    for stage, fn, setup, *extra in stages:
+                        timing = _time(fn, setup, budget=budget)
+                        results.append({"path": path, "stage": stage, "bars": bars, **timing, **(extra[0] if extra else {})})
+                        if not quiet:
+                            check = f"  max diff vs ta {extra[0]['max_abs_diff']:.1e}" if extra else ""
+                            print(f"{path:>11} {stage:<17} {bars:>7} bars  median {timing['median_ms']:>10.3f} ms"
+                                  f"  ({timing['repeats']} runs){check}")
+            audit.close()
+    finally:
+        mock.stop()
+
+    return {
+        "commit": _commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "ta": getattr(ta, "__version__", "unknown"),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare(current, baseline):
+    """Print median-time ratios against an earlier result file."""
+    before = {(r["path"], r["stage"], r["bars"]): r["median_ms"] for r in baseline["results"]}
+    print(f"\n📈 vs {baseline['commit']} ({baseline['timestamp']}): new / old median")
+    for r in current["results"]:
+        old = before.get((r["path"], r["stage"], r["bars"]))
+        if old:
+            print(f"{r['path']:>11} {r['stage']:<17} {r['bars']:>7} bars  {r['median_ms'] / old:6.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each stage of one strategy tick.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="session lengths in bars")
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds spent per stage and size")
+    parser.add_argument("--path", choices=["full", "incremental", "indicators"], nargs="+",
+                        default=["full", "incremental", "indicators"])
+    parser.add_argument("--out", help="result file (default bench_<commit>_<time>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    document = run(args.sizes, args.budget, args.path)
+    out = args.out or f"bench_{document['commit']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out, "w") as f:
+        json.dump(document, f, indent=1)
+    print(f"\n💾 Results saved to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(document, json.load(f))
@@ -0,0 +1,505 @@
+import heapq
+import math
+from collections import defaultdict, deque
+
+import pandas as pd
+
+NAN = float('nan')
+
+
+# =============================================
+# 📐 Incremental indicators (one bar at a time)
+# =============================================
+# Each class mirrors the `ta` indicator of the same name with fillna=False:
+# feeding the same bars in order gives the same values, including the NaN
+# (or zero, for ATR) warm-up period. `state()` returns plain JSON-able data
+# and `load_state()` puts it back, so a restarted process carries on exactly
+# where the last one stopped.
+
+class EMA:
+    """Exponential moving average, `ewm(span=window, adjust=False)` seeded on the first value."""
+
+    def __init__(self, window):
+        self.window = window
+        self.alpha = 2.0 / (window + 1)
+        self.count = 0
+        self._value = None
+
+    def update(self, x):
+        if math.isnan(x):
+            return self.value
+        if self._value is None:
+            self._value = x
+        else:
+            self._value += self.alpha * (x - self._value)
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        return self._value if self.count >= self.window else NAN
+
+    def state(self):
+        return {"count": self.count, "value": self._value}
+
+    def load_state(self, state):
+        self.count = state["count"]
+        self._value = state["value"]
+
+
+class RollingMeanStd:
+    """Rolling mean and std using Welford add/remove updates.
+
+    ddof=0 (population std) matches `ta`'s Bollinger Bands, ddof=1 matches
+    pandas' `rolling().std()`.
+    """
+
+    def __init__(self, window, ddof=0):
+        self.window = window
+        self.ddof = ddof
+        self._values = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        values = self._values
+        if len(values) == self.window:
+            old = values.popleft()
+            new_mean = self._mean + (x - old) / self.window
+            self._m2 += (x - old) * (x - new_mean + old - self._mean)
+            self._mean = new_mean
+        else:
+            n = len(values) + 1
+            delta = x - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (x - self._mean)
+        values.append(x)
+        if self._m2 < 0.0:
+            self._m2 = 0.0
+        return self.mean, self.std
+
+    @property
+    def mean(self):
+        return self._mean if len(self._values) == self.window else NAN
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.window - self.ddof)) if len(self._values) == self.window else NAN
+
+    def state(self):
+        return {"values": list(self._values), "mean": self._mean, "m2": self._m2}
+
+    def load_state(self, state):
+        self._values = deque(state["values"])
+        self._mean = state["mean"]
+        self._m2 = state["m2"]
+
+
+class RollingSum:
+    """Rolling sum over the last `window` values."""
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._total = 0.0
+
+    def update(self, x):
+        if len(self._values) == self.window:
+            self._total -= self._values.popleft()
+        self._values.append(x)
+        self._total += x
+        return self.value
+
+    @property
+    def value(self):
+        return self._total if len(self._values) == self.window else NAN
+
+    def state(self):
+        return {"values": list(self._values), "total": self._total}
+
+    def load_state(self, state):
+        self._values = deque(state["values"])
+        self._total = state["total"]
+
+
+class RollingQuantile:
+    """Rolling q-quantile in O(log window) per update, same as `rolling(window).quantile(q)`.
+
+    Two heaps with lazy deletion: `_low` (a max-heap, negated) holds the
+    floor(q * (n - 1)) + 1 smallest of the n values in the window and
+    `_high` the rest, so the two order statistics the quantile interpolates
+    between are always the heap tops. `push()` adds the newest value and
+    `pop()` drops the oldest; `update()` does both once the window is full.
+    A NaN in the window makes the value NaN until it leaves.
+
+    Dropped values stay in their heap until they reach its top; once these
+    stale entries outnumber the live ones, both heaps are rebuilt from the
+    window, so memory stays O(window) however long the session runs.
+    """
+
+    def __init__(self, window, q=0.5):
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f"quantile must be between 0 and 1, got {q}")
+        self.window = window
+        self.q = q
+        self._clear()
+
+    def _clear(self):
+        self._values = deque()
+        self._low = []   # max-heap of the lower part (negated)
+        self._high = []  # min-heap of the upper part
+        self._low_size = 0
+        self._high_size = 0
+        self._nans = 0
+        self._delayed = defaultdict(int)
+
+    def _prune(self, heap, sign):
+        while heap and self._delayed.get(sign * heap[0]):
+            x = sign * heapq.heappop(heap)
+            self._delayed[x] -= 1
+            if not self._delayed[x]:
+                del self._delayed[x]
+
+    def _target(self, count):
+        """Size of `_low` for `count` live values."""
+        return int(math.floor(self.q * (count - 1))) + 1 if count else 0
+
+    def _rebuild(self):
+        """Both heaps from the live values of the window, without stale entries."""
+        live = sorted(x for x in self._values if not math.isnan(x))
+        target = self._target(len(live))
+        self._low = [-x for x in live[:target]]
+        heapq.heapify(self._low)
+        self._high = live[target:]  # a sorted list is already a min-heap
+        self._low_size, self._high_size = target, len(live) - target
+        self._delayed.clear()
+
+    def _rebalance(self):
+        target = self._target(self._low_size + self._high_size)
+        while self._low_size > target:
+            heapq.heappush(self._high, -heapq.heappop(self._low))
+            self._low_size -= 1
+            self._high_size += 1
+            self._prune(self._low, -1)
+        while self._low_size < target:
+            heapq.heappush(self._low, -heapq.heappop(self._high))
+            self._high_size -= 1
+            self._low_size += 1
+            self._prune(self._high, 1)
+
+    def push(self, x):
+        self._values.append(x)
+        if math.isnan(x):
+            self._nans += 1
+            return
+        if self._low and x <= -self._low[0]:
+            heapq.heappush(self._low, -x)
+            self._low_size += 1
+        else:
+            heapq.heappush(self._high, x)
+            self._high_size += 1
+        self._rebalance()
+
+    def pop(self):
+        x = self._values.popleft()
+        if math.isnan(x):
+            self._nans -= 1
+            return x
+        self._delayed[x] += 1
+        if x <= -self._low[0]:
+            self._low_size -= 1
+            if x == -self._low[0]:
+                self._prune(self._low, -1)
+        else:
+            self._high_size -= 1
+            if self._high and x == self._high[0]:
+                self._prune(self._high, 1)
+        live = self._low_size + self._high_size
+        if len(self._low) + len(self._high) - live > live:
+            self._rebuild()
+        else:
+            self._rebalance()
+        return x
+
+    def update(self, x):
+        if len(self._values) == self.window:
+            self.pop()
+        self.push(x)
+        return self.value
+
+    def _tops(self):
+        """(k-th, (k+1)-th) smallest of the window and the weight of the second, q * (window - 1) = k + weight."""
+        position = self.q * (self.window - 1)
+        weight = position - math.floor(position)
+        low = float(-self._low[0])
+        return low, (float(self._high[0]) if weight else low), weight
+
+    @property
+    def value(self):
+        if len(self._values) < self.window or self._nans:
+            return NAN
+        low, high, weight = self._tops()
+        return low + (high - low) * weight if weight else low
+
+    def state(self):
+        return {"values": list(self._values)}
+
+    def load_state(self, state):
+        """Rebuild the heaps from the window's values (the quantile only depends on the multiset)."""
+        self._clear()
+        for x in state["values"]:
+            self.push(x)
+
+
+class RollingMedian(RollingQuantile):
+    """Rolling median in O(log window) per update, same as `rolling(window).median()`."""
+
+    def __init__(self, window):
+        super().__init__(window, q=0.5)
+
+    @property
+    def value(self):
+        if len(self._values) < self.window or self._nans:
+            return NAN
+        low, high, _ = self._tops()
+        return (low + high) / 2.0
+
+
+class BollingerBands:
+    def __init__(self, window=20, window_dev=2):
+        self.window_dev = window_dev
+        self._stats = RollingMeanStd(window)
+
+    def update(self, close):
+        """Returns (mavg, hband, lband)."""
+        mavg, std = self._stats.update(close)
+        return mavg, mavg + self.window_dev * std, mavg - self.window_dev * std
+
+    def state(self):
+        return self._stats.state()
+
+    def load_state(self, state):
+        self._stats.load_state(state)
+
+
+class MACD:
+    def __init__(self, window_slow=26, window_fast=12, window_sign=9):
+        self._fast = EMA(window_fast)
+        self._slow = EMA(window_slow)
+        self._signal = EMA(window_sign)
+
+    def update(self, close):
+        """Returns (macd, macd_signal)."""
+        macd = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(macd)
+        return macd, signal
+
+    def state(self):
+        return {"fast": self._fast.state(), "slow": self._slow.state(), "signal": self._signal.state()}
+
+    def load_state(self, state):
+        self._fast.load_state(state["fast"])
+        self._slow.load_state(state["slow"])
+        self._signal.load_state(state["signal"])
+
+
+class AverageTrueRange:
+    """Wilder ATR seeded with the mean of the first `window` true ranges (zeros before that, like `ta`)."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.count = 0
+        self._prev_close = None
+        self._tr_sum = 0.0
+        self._atr = 0.0
+
+    def update(self, high, low, close):
+        if self._prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        self.count += 1
+
+        if self.count < self.window:
+            self._tr_sum += tr
+        elif self.count == self.window:
+            self._atr = (self._tr_sum + tr) / self.window
+        else:
+            self._atr = (self._atr * (self.window - 1) + tr) / float(self.window)
+        return self._atr
+
+    def state(self):
+        return {"count": self.count, "prev_close": self._prev_close, "tr_sum": self._tr_sum, "atr": self._atr}
+
+    def load_state(self, state):
+        self.count = state["count"]
+        self._prev_close = state["prev_close"]
+        self._tr_sum = state["tr_sum"]
+        self._atr = state["atr"]
+
+
+class VolumeWeightedAveragePrice:
+    def __init__(self, window=14):
+        self._pv = RollingSum(window)
+        self._volume = RollingSum(window)
+
+    def update(self, high, low, close, volume):
+        typical_price = (high + low + close) / 3.0
+        pv = self._pv.update(typical_price * volume)
+        total_volume = self._volume.update(volume)
+        if total_volume == 0:
+            return NAN
+        return pv / total_volume
+
+    def state(self):
+        return {"pv": self._pv.state(), "volume": self._volume.state()}
+
+    def load_state(self, state):
+        self._pv.load_state(state["pv"])
+        self._volume.load_state(state["volume"])
+
+
+class RSI:
+    """`ta.momentum.RSIIndicator`: Wilder-smoothed gains over losses, 100 where there are no losses."""
+
+    def __init__(self, window=14):
+        self.window = window
+        self.count = 0
+        self._prev_close = None
+        self._up = 0.0
+        self._down = 0.0
+
+    def update(self, close):
+        if math.isnan(close):
+            return self.value
+        diff = 0.0 if self._prev_close is None else close - self._prev_close
+        gain, loss = max(diff, 0.0), max(-diff, 0.0)
+        if self.count == 0:
+            self._up, self._down = gain, loss
+        else:
+            self._up += (gain - self._up) / self.window
+            self._down += (loss - self._down) / self.window
+        self._prev_close = close
+        self.count += 1
+        return self.value
+
+    @property
+    def value(self):
+        if self.count < self.window:
+            return NAN
+        if self._down == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self._up / self._down)
+
+    def state(self):
+        return {"count": self.count, "prev_close": self._prev_close, "up": self._up, "down": self._down}
+
+    def load_state(self, state):
+        self.count = state["count"]
+        self._prev_close = state["prev_close"]
+        self._up = state["up"]
+        self._down = state["down"]
+
+
+# =============================================
+# 🧮 Strategy indicator bundle
+# =============================================
+class StrategyIndicators:
+    """BB / MACD / ATR / ATR-median / VWAP for the scalping strategies, updated per bar.
+
+    Defaults are the universal-strat-run.py settings. `update(bar)` takes a
+    bar row (dict with timestamp/high/low/close/volume) and returns the latest
+    values as a dict, the same fields the scripts used to read off `df.iloc[-1]`.
+    `atr_quantile` turns the ATR-median filter into an ATR-percentile one
+    (the "atr_median" field is then that quantile).
+    """
+
+    def __init__(self, bb_window=10, bb_dev=1.5, macd_fast=9, macd_slow=21, macd_sign=7,
+                 atr_window=5, atr_median_window=50, vwap_window=30, atr_quantile=0.5):
+        self.bb = BollingerBands(window=bb_window, window_dev=bb_dev)
+        self.macd = MACD(window_slow=macd_slow, window_fast=macd_fast, window_sign=macd_sign)
+        self.atr = AverageTrueRange(window=atr_window)
+        if atr_quantile == 0.5:
+            self.atr_median = RollingMedian(atr_median_window)
+        else:
+            self.atr_median = RollingQuantile(atr_median_window, atr_quantile)
+        self.vwap = VolumeWeightedAveragePrice(window=vwap_window)
+        self.latest = None
+
+    def update(self, bar):
+        high, low, close, volume = bar['high'], bar['low'], bar['close'], bar['volume']
+        _, bb_upper, bb_lower = self.bb.update(close)
+        macd, macd_signal = self.macd.update(close)
+        atr = self.atr.update(high, low, close)
+
+        self.latest = {
+            "timestamp": bar['timestamp'],
+            "close": close,
+            "vwap": self.vwap.update(high, low, close, volume),
+            "macd": macd,
+            "macd_signal": macd_signal,
+            "bb_upper": bb_upper,
+            "bb_lower": bb_lower,
+            "atr": atr,
+            "atr_median": self.atr_median.update(atr),
+        }
+        return self.latest
+
+    def state(self):
+        latest = None
+        if self.latest is not None:
+            latest = dict(self.latest, timestamp=pd.Timestamp(self.latest["timestamp"]).isoformat())
+        return {
+            "bb": self.bb.state(),
+            "macd": self.macd.state(),
+            "atr": self.atr.state(),
+            "atr_median": self.atr_median.state(),
+            "vwap": self.vwap.state(),
+            "latest": latest,
+        }
+
+    def load_state(self, state):
+        self.bb.load_state(state["bb"])
+        self.macd.load_state(state["macd"])
+        self.atr.load_state(state["atr"])
+        self.atr_median.load_state(state["atr_median"])
+        self.vwap.load_state(state["vwap"])
+        latest = state["latest"]
+        self.latest = None if latest is None else dict(latest, timestamp=pd.Timestamp(latest["timestamp"]))
+
+
+class TimeframeIndicators:
+    """MACD / RSI / Bollinger Bands of one higher timeframe, updated once per completed bar.
+
+    Used by trading.resampler.MultiTimeframe for confirmations such as
+    "15m MACD > signal"; defaults are the usual 26/12/9, 14 and 20/2.
+    """
+
+    def __init__(self, macd_fast=12, macd_slow=26, macd_sign=9, rsi_window=14, bb_window=20, bb_dev=2):
+        self.macd = MACD(window_slow=macd_slow, window_fast=macd_fast, window_sign=macd_sign)
+        self.rsi = RSI(window=rsi_window)
+        self.bb = BollingerBands(window=bb_window, window_dev=bb_dev)
+
+    def update(self, bar):
+        close = bar['close']
+        macd, macd_signal = self.macd.update(close)
+        bb_mavg, bb_upper, bb_lower = self.bb.update(close)
+        return {
+            "timestamp": bar['timestamp'],
+            "close": close,
+            "macd": macd,
+            "macd_signal": macd_signal,
+            "rsi": self.rsi.update(close),
+            "bb_mavg": bb_mavg,
+            "bb_upper": bb_upper,
+            "bb_lower": bb_lower,
+        }
+
+    def state(self):
+        return {"macd": self.macd.state(), "rsi": self.rsi.state(), "bb": self.bb.state()}
+
+    def load_state(self, state):
+        self.macd.load_state(state["macd"])
+        self.rsi.load_state(state["rsi"])
+        self.bb.load_state(state["bb"])
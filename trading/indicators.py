@@ -0,0 +1,281 @@
+import math
+
+import numpy as np
+
+# Rows of sliding windows handled per NumPy call: bounds the temporary (rows x window) arrays
+_ROWS = 16_384
+# Window sums restart their running sum this often, so rounding never builds up over years of bars
+_BLOCK = 4_096
+# Rolling std re-centres this often; shorter blocks = less cancellation between the two sums
+_STD_BLOCK = 512
+# EMA blocks are cut where decay**-length would pass this (well inside float64 range)
+_MAX_SCALE = math.log(1e100)
+# Order statistics: values partitioned per NumPy call (rows x window), bounds the copy np.partition makes
+_SELECT_VALUES = 1 << 20
+
+
+# =============================================
+# 🧮 Batch indicators (whole arrays at once)
+# =============================================
+# NumPy versions of the `ta` indicators the scripts use, for backtests,
+# sweeps and charts over long histories. Each function takes arrays (or
+# pandas Series) and returns float64 arrays with the same values as `ta`
+# with fillna=False, including its warm-up (NaN until the window is full,
+# zeros for ATR) and missing bars (a NaN close keeps the EMAs going, as
+# pandas does). trading.incremental has the one-bar-at-a-time versions.
+
+def _array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _ewm_from(x, alpha, seed):
+    """y[i] = (1 - alpha) * y[i-1] + alpha * x[i], with y[-1] = seed.
+
+    Solved in closed form per block, y[k] = d^(k+1) * (y0 + alpha * sum x[j] / d^(j+1))
+    for d = 1 - alpha, with every block done at once as rows of a 2D array;
+    only the carry from one block to the next is a (short) Python loop.
+    """
+    n = len(x)
+    decay = 1.0 - alpha
+    if decay <= 0.0 or n == 0:
+        return x.copy()
+    block = max(1, min(n, int(_MAX_SCALE / -math.log(decay))))
+    scale = decay ** -np.arange(1, block + 1, dtype=np.float64)
+    rows = -(-n // block)
+
+    local = np.zeros(rows * block)
+    local[:n] = x
+    local = local.reshape(rows, block)
+    local *= scale
+    np.cumsum(local, axis=1, out=local)
+    local *= alpha / scale  # each row as if its block started from y0 = 0
+
+    carry = np.empty(rows)  # y just before each block
+    carry[0] = seed
+    step = decay ** block
+    for k in range(1, rows):
+        carry[k] = local[k - 1, -1] + step * carry[k - 1]
+    local += carry[:, None] / scale
+    return local.ravel()[:n]
+
+
+def _ewm(values, alpha, min_periods):
+    """`ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean()`, NaNs handled as pandas does.
+
+    Leading NaNs are skipped and a NaN inside the series repeats the last
+    output. With ignore_na=False the old value keeps decaying across the
+    gap, so the first value after k NaNs is
+    (d^(k+1) * y + alpha * x) / (d^(k+1) + alpha); each run of valid values
+    is then solved in one `_ewm_from` call seeded from that value.
+    """
+    x = _array(values)
+    n = len(x)
+    out = np.full(n, np.nan)
+    missing = np.isnan(x)
+    valid = np.flatnonzero(~missing)
+    if len(valid) == 0:
+        return out
+
+    # Runs of valid values: starts where a value follows a NaN (or the first value)
+    starts = valid[np.concatenate(([True], np.diff(valid) > 1))]
+    ends = np.append(valid[np.flatnonzero(np.diff(valid) > 1)] + 1, valid[-1] + 1)
+    gap_ends = np.append(starts[1:], n)
+    decay = 1.0 - alpha
+    last = np.nan
+    for start, end, gap_end in zip(starts, ends, gap_ends):
+        if np.isnan(last):
+            first = x[start]
+        else:
+            old_weight = decay ** (start - gap_start + 1)
+            first = (old_weight * last + alpha * x[start]) / (old_weight + alpha)
+        out[start] = first
+        out[start + 1:end] = _ewm_from(x[start + 1:end], alpha, first)
+        last = out[end - 1]
+        out[end:gap_end] = last  # NaN inputs repeat the last value until the next run
+        gap_start = end
+
+    out[:valid[0]] = np.nan
+    warm = np.cumsum(~missing) < max(min_periods, 1)  # min_periods counts observations, not bars
+    out[warm] = np.nan
+    return out
+
+
+def ema(values, window):
+    """Exponential moving average, same as `ta`'s `_ema` (span=window, adjust=False)."""
+    return _ewm(values, 2.0 / (window + 1), window)
+
+
+def _missing_windows(missing, window):
+    """True for each full window (indexed by its last bar) that holds a NaN."""
+    counts = np.concatenate(([0], np.cumsum(missing)))
+    return counts[window:] - counts[:-window] > 0
+
+
+def _blocks(x, window, block):
+    """Overlapping rows (a strided view): row k holds the bars the windows ending in block k cover.
+
+    The tail is padded with the last value so every row is full; callers
+    keep the first len(x) - window + 1 results.
+    """
+    count = len(x) - window + 1
+    padded = np.concatenate((x, np.repeat(x[-1:], -(-count // block) * block - count)))
+    return np.lib.stride_tricks.sliding_window_view(padded, block + window - 1)[::block]
+
+
+def _window_sums(rows, window):
+    """Sum of every `window` consecutive values in each row, from one cumsum per row."""
+    running = np.zeros((len(rows), rows.shape[1] + 1))
+    np.cumsum(rows, axis=1, out=running[:, 1:])
+    return running[:, window:] - running[:, :-window]
+
+
+def rolling_sum(values, window):
+    """Sum of each full window of `window` values (NaN before, and wherever the window holds a NaN).
+
+    The running sum restarts every `_BLOCK` bars and adds up offsets from
+    the block's first value, so its rounding stays at the size of one
+    block's price range instead of growing over the whole history.
+    """
+    x = _array(values)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window > n:
+        return out
+    missing = np.isnan(x)
+    rows = _blocks(np.where(missing, 0.0, x), window, _BLOCK)
+    reference = rows[:, :1]
+    sums = _window_sums(rows - reference, window) + reference * window
+    out[window - 1:] = sums.ravel()[:n - window + 1]
+    if missing.any():
+        out[window - 1:][_missing_windows(missing, window)] = np.nan
+    return out
+
+
+def sma(values, window):
+    """Simple moving average over full windows."""
+    return rolling_sum(values, window) / window
+
+
+def rolling_std(values, window, ddof=0):
+    """Rolling standard deviation over full windows (ddof=0 as in `ta`, 1 as in pandas).
+
+    From window sums of d = x - r and d^2, with r the mean of each block of
+    `_STD_BLOCK` bars, so sum(d^2) - sum(d)^2 / window only cancels what the
+    price moved inside one block. A window of one repeated value is exactly 0.
+    """
+    x = _array(values)
+    n = len(x)
+    out = np.full(n, np.nan)
+    if window > n:
+        return out
+    missing = np.isnan(x)
+    rows = _blocks(x, window, _STD_BLOCK)
+    if missing.any():
+        d = rows - np.nanmean(rows, axis=1, keepdims=True)
+        d[np.isnan(d)] = 0.0
+    else:
+        d = rows - rows.mean(axis=1, keepdims=True)
+    total = _window_sums(d, window)
+    variance = (_window_sums(d * d, window) - total * total / window) / (window - ddof)
+
+    windows = out[window - 1:]
+    windows[:] = np.maximum(variance.ravel()[:n - window + 1], 0.0)
+    changes = np.concatenate(([0], np.cumsum(x[1:] != x[:-1])))
+    windows[changes[window - 1:] == changes[:n - window + 1]] = 0.0
+    if missing.any():
+        windows[_missing_windows(missing, window)] = np.nan
+    return np.sqrt(out)
+
+
+def _rolling_select(values, window, k, next_too=False):
+    """(k-th, (k+1)-th) smallest value (0-based) of every full window; the pair is equal unless `next_too`.
+
+    NaN before the window is full and wherever it holds a NaN, like pandas.
+    """
+    x = _array(values)
+    n = len(x)
+    low, high = np.full(n, np.nan), np.full(n, np.nan)
+    if window > n:
+        return low, high
+
+    windows = np.lib.stride_tricks.sliding_window_view(x, window)
+    rows = max(1, _SELECT_VALUES // window)
+    for start in range(0, len(windows), rows):
+        done = slice(window - 1 + start, window - 1 + start + rows)
+        part = np.partition(windows[start:start + rows], k, axis=1)
+        low[done] = part[:, k]
+        high[done] = part[:, k + 1:].min(axis=1) if next_too else part[:, k]
+
+    missing = np.isnan(x)
+    if missing.any():
+        holes = _missing_windows(missing, window)
+        low[window - 1:][holes] = np.nan
+        high[window - 1:][holes] = np.nan
+    return low, high
+
+
+def rolling_quantile(values, window, q=0.5):
+    """Rolling q-quantile of each full window, `rolling(window).quantile(q)` (linear interpolation)."""
+    if not 0.0 <= q <= 1.0:
+        raise ValueError(f"quantile must be between 0 and 1, got {q}")
+    position = q * (window - 1)
+    k = int(math.floor(position))
+    fraction = position - k
+    low, high = _rolling_select(values, window, k, next_too=fraction > 0)
+    return low + (high - low) * fraction if fraction else low
+
+
+def rolling_median(values, window):
+    """Rolling median of each full window, `rolling(window).median()`."""
+    low, high = _rolling_select(values, window, (window - 1) // 2, next_too=window % 2 == 0)
+    return (low + high) / 2.0
+
+
+def bollinger_bands(close, window=20, window_dev=2):
+    """(mavg, hband, lband) of `ta.volatility.BollingerBands`."""
+    mavg = sma(close, window)
+    band = window_dev * rolling_std(close, window, ddof=0)
+    return mavg, mavg + band, mavg - band
+
+
+def macd(close, window_slow=26, window_fast=12, window_sign=9):
+    """(macd, macd_signal, macd_diff) of `ta.trend.MACD`."""
+    line = ema(close, window_fast) - ema(close, window_slow)
+    signal = ema(line, window_sign)
+    return line, signal, line - signal
+
+
+def average_true_range(high, low, close, window=14):
+    """`ta.volatility.AverageTrueRange`: Wilder-smoothed true range, zeros until the first full window."""
+    high, low, close = _array(high), _array(low), _array(close)
+    n = len(close)
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    with np.errstate(invalid="ignore"):
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr = np.zeros(n)
+    if n < window:
+        return atr
+    seed = np.nanmean(true_range[:window])
+    atr[window - 1] = seed
+    atr[window:] = _ewm_from(true_range[window:], 1.0 / window, seed)
+    return atr
+
+
+def volume_weighted_average_price(high, low, close, volume, window=14):
+    """`ta.volume.VolumeWeightedAveragePrice`: rolling sum(typical price * volume) / sum(volume)."""
+    volume = _array(volume)
+    typical_price = (_array(high) + _array(low) + _array(close)) / 3.0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return rolling_sum(typical_price * volume, window) / rolling_sum(volume, window)
+
+
+def rsi(close, window=14):
+    """`ta.momentum.RSIIndicator`: Wilder-smoothed gains over losses, 100 where there are no losses."""
+    diff = np.diff(_array(close), prepend=np.nan)
+    with np.errstate(invalid="ignore"):
+        up = np.where(diff > 0, diff, 0.0)
+        down = np.where(diff < 0, -diff, 0.0)
+    up = _ewm(up, 1.0 / window, window)
+    down = _ewm(down, 1.0 / window, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(down == 0, 100.0, 100.0 - 100.0 / (1.0 + up / down))
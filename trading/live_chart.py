@@ -0,0 +1,446 @@
+import copy
+import time
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection, PolyCollection
+
+from alpaca.data.requests import StockBarsRequest
+
+from trading.bar_decoder import BAR_COLUMNS, fetch_bars
+from trading.incremental import MACD, RSI, BollingerBands
+from trading.price_feed import PriceFeed
+from trading.scheduler import BarScheduler
+
+_CLOSE = BAR_COLUMNS.index("close")
+_DAY_NS = 86400 * 10**9
+_GREEN = (0.0, 0.5, 0.0, 1.0)
+_RED = (1.0, 0.0, 0.0, 1.0)
+
+
+def to_datenum(timestamps):
+    """Epoch ns (or Timestamps) -> matplotlib date numbers (days since 1970, matplotlib's default epoch)."""
+    return pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True)).as_unit("ns").asi8 / _DAY_NS
+
+
+# =============================================
+# 📉 Shape-preserving downsampling
+# =============================================
+def lttb(x, y, n_out):
+    """Indices of `n_out` points of (x, y) chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; each bucket in between keeps the
+    point forming the largest triangle with the previously kept point and
+    the next bucket's average, so spikes and turns survive decimation where
+    plain striding would drop them. NaNs (indicator warm-up) are filled
+    from their neighbours for the selection only.
+    """
+    n = len(x)
+    if n <= max(n_out, 3):
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = pd.Series(np.asarray(y, dtype=float)).ffill().bfill().fillna(0.0).to_numpy()
+
+    # n - 2 inner points split into n_out - 2 buckets of (almost) equal size
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    sizes = np.diff(edges)
+    avg_x = np.append(np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / sizes, y[-1])
+
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+# =============================================
+# 📺 Live indicator chart
+# =============================================
+class LiveChart:
+    """Price (+ Bollinger Bands), MACD and RSI panels of one symbol that update in place.
+
+    Every artist exists twice: a static copy holding the decimated history,
+    drawn once into a cached background, and an animated copy holding the
+    last `recent` bars plus the forming one. `render()` restores the
+    background and redraws only the animated copies (blitting), so a tick
+    costs the recent window, not the whole history. Once the live part
+    grows to 2x `recent` bars, the older half is folded into the history,
+    which is re-decimated with LTTB to `history_points` points per panel,
+    and the background is redrawn; that also happens when a new value
+    leaves the current axis limits.
+
+    `add_bars()` appends closed bars through the incremental indicators;
+    `set_last(price)` moves the forming bar (indicators on a copy of
+    their state), and only marks the chart dirty if the price changed.
+    """
+
+    def __init__(self, symbol, bar_interval=pd.Timedelta(minutes=1), bands=True, macd=True, rsi=True,
+                 bb_window=20, bb_dev=2, macd_fast=12, macd_slow=26, macd_sign=9, rsi_window=14,
+                 upper=70.0, lower=30.0, recent=300, history_points=1000, title=None):
+        self.symbol = symbol
+        self.bar_width = pd.Timedelta(bar_interval).value / _DAY_NS
+        self.recent = recent
+        self.history_points = history_points
+        self._indicators = {}
+        if bands:
+            self._indicators["bb"] = BollingerBands(window=bb_window, window_dev=bb_dev)
+        if macd:
+            self._indicators["macd"] = MACD(window_slow=macd_slow, window_fast=macd_fast, window_sign=macd_sign)
+        if rsi:
+            self._indicators["rsi"] = RSI(window=rsi_window)
+
+        columns = ["x", "close"]
+        columns += ["bb_mavg", "bb_upper", "bb_lower"] if bands else []
+        columns += ["macd", "macd_signal", "macd_hist"] if macd else []
+        columns += ["rsi"] if rsi else []
+        self._data = {column: np.full(1024, np.nan) for column in columns}
+        self.n = 0              # closed bars; the forming bar, if any, sits at index n
+        self._forming = False
+        self._fold = 0          # bars [0, fold] are history, [fold, n] are live
+        self.signals = {name: [] for name in ("bb_buy", "bb_sell", "macd_buy", "macd_sell")}
+
+        heights = [3] + ([1.5] if macd else []) + ([1] if rsi else [])
+        self.fig, axes = plt.subplots(len(heights), 1, figsize=(16, 4 * len(heights)), sharex=True,
+                                      squeeze=False, gridspec_kw={'height_ratios': heights})
+        axes = list(axes[:, 0])
+        if self.fig.canvas.manager is not None:
+            self.fig.canvas.manager.set_window_title(f"{symbol} live")
+        self._panels = []
+        self._static, self._live = [], []
+        self._build_price(axes.pop(0), bands, title)
+        if macd:
+            self._build_macd(axes.pop(0))
+        if rsi:
+            self._build_rsi(axes.pop(0), rsi_window, upper, lower)
+        for panel in self._panels:
+            panel["ax"].xaxis_date()
+            panel["ax"].grid(True)
+            panel["ax"].legend(loc='upper left')
+        self.fig.tight_layout()
+
+        self._background = None
+        self._stale = True      # background must be redrawn
+        self._dirty = True      # live artists changed since the last blit
+        self.redraws = 0
+        self.blits = 0
+        self.fig.canvas.mpl_connect("draw_event", self._on_draw)
+
+    # ----- artists -----
+    def _pair(self, ax, factory):
+        """Static (history) and animated (live) copies of one artist."""
+        static, live = factory(True), factory(False)
+        live.set_animated(True)
+        self._static.append(static)
+        self._live.append(live)
+        return static, live
+
+    def _add_lines(self, panel, column, **style):
+        ax = panel["ax"]
+        static, live = self._pair(ax, lambda labelled: ax.plot([], [], **(style if labelled else
+                                                                           dict(style, label=None)))[0])
+        panel["lines"].append((column, static, live))
+
+    def _add_markers(self, panel, signal, column, **style):
+        ax = panel["ax"]
+        static, live = self._pair(ax, lambda labelled: ax.scatter([], [], **(style if labelled else
+                                                                              dict(style, label=None))))
+        panel["markers"].append((signal, column, static, live))
+
+    def _panel(self, ax, reference):
+        panel = {"ax": ax, "reference": reference, "lines": [], "markers": [], "fill": None, "hist": None,
+                 "fixed_ylim": None, "history": np.arange(0)}
+        self._panels.append(panel)
+        return panel
+
+    def _build_price(self, ax, bands, title):
+        panel = self._panel(ax, "close")
+        self._add_lines(panel, "close", label='Close Price', color='blue')
+        if bands:
+            self._add_lines(panel, "bb_upper", linestyle='--', color='red', label='Upper BB')
+            self._add_lines(panel, "bb_lower", linestyle='--', color='green', label='Lower BB')
+            self._add_lines(panel, "bb_mavg", linestyle='-', color='gray', label='Middle BB')
+            panel["fill"] = self._pair(ax, lambda labelled: ax.add_collection(
+                PolyCollection([], facecolor='lightgray', alpha=0.2)))
+            self._add_markers(panel, "bb_buy", "close", marker='^', color='green', s=100, label='BB Buy')
+            self._add_markers(panel, "bb_sell", "close", marker='v', color='red', s=100, label='BB Sell')
+        ax.set_title(f"{self.symbol} - {title or 'live'}")
+        ax.set_ylabel("Price ($)")
+
+    def _build_macd(self, ax):
+        panel = self._panel(ax, "macd_hist")
+        panel["hist"] = self._pair(ax, lambda labelled: ax.add_collection(
+            LineCollection([], linewidths=2, colors='green', label='MACD Histogram' if labelled else None)))
+        self._add_lines(panel, "macd", color='purple', label='MACD Line')
+        self._add_lines(panel, "macd_signal", color='orange', label='Signal Line')
+        ax.axhline(0, linestyle='--', color='gray', linewidth=1)
+        self._add_markers(panel, "macd_buy", "macd", marker='^', color='green', s=70, label='MACD Buy')
+        self._add_markers(panel, "macd_sell", "macd", marker='v', color='red', s=70, label='MACD Sell')
+        ax.set_ylabel("MACD")
+
+    def _build_rsi(self, ax, rsi_window, upper, lower):
+        panel = self._panel(ax, "rsi")
+        self._add_lines(panel, "rsi", color='blue', label=f'RSI ({rsi_window})')
+        ax.axhline(upper, linestyle='--', color='red', label=f'Overbought ({upper:g})')
+        ax.axhline(lower, linestyle='--', color='green', label=f'Oversold ({lower:g})')
+        panel["fixed_ylim"] = (0, 100)
+        ax.set_ylim(0, 100)
+        ax.set_ylabel("RSI")
+
+    # ----- data -----
+    def _grow(self):
+        for column, values in self._data.items():
+            grown = np.full(2 * len(values), np.nan)
+            grown[:len(values)] = values
+            self._data[column] = grown
+
+    def _compute(self, i, x, close, indicators):
+        data = self._data
+        data["x"][i], data["close"][i] = x, close
+        if "bb" in indicators:
+            data["bb_mavg"][i], data["bb_upper"][i], data["bb_lower"][i] = indicators["bb"].update(close)
+        if "macd" in indicators:
+            data["macd"][i], data["macd_signal"][i] = indicators["macd"].update(close)
+            data["macd_hist"][i] = data["macd"][i] - data["macd_signal"][i]
+        if "rsi" in indicators:
+            data["rsi"][i] = indicators["rsi"].update(close)
+
+    @property
+    def last_timestamp(self):
+        """Epoch ns of the last closed bar, or None."""
+        return None if self.n == 0 else int(round(self._data["x"][self.n - 1] * _DAY_NS))
+
+    def add_bars(self, timestamps, closes):
+        """Append closed bars (epoch ns or Timestamps, oldest first); bars at or before the last one are ignored."""
+        x = to_datenum(timestamps)
+        closes = np.asarray(closes, dtype=float)
+        if self.n:
+            keep = x > self._data["x"][self.n - 1]
+            x, closes = x[keep], closes[keep]
+        if not len(x):
+            return 0
+        data = self._data
+        for xi, close in zip(x.tolist(), closes.tolist()):
+            if self.n + 1 >= len(data["x"]):
+                self._grow()
+                data = self._data
+            i = self.n
+            self._compute(i, xi, close, self._indicators)
+            if "bb" in self._indicators:
+                if close < data["bb_lower"][i]:
+                    self.signals["bb_buy"].append(i)
+                elif close > data["bb_upper"][i]:
+                    self.signals["bb_sell"].append(i)
+            if "macd" in self._indicators and i:
+                now, before = data["macd"][i] - data["macd_signal"][i], data["macd"][i - 1] - data["macd_signal"][i - 1]
+                if now > 0 and before < 0:
+                    self.signals["macd_buy"].append(i)
+                elif now < 0 and before > 0:
+                    self.signals["macd_sell"].append(i)
+            self.n += 1
+        self._forming = False
+        if self.n - self._fold > 2 * self.recent:
+            self._fold = self.n - self.recent
+            self._refold()
+        self._dirty = True
+        return len(x)
+
+    def set_last(self, price, timestamp=None):
+        """Show `price` as the forming bar (just after the last closed one unless `timestamp` is given)."""
+        if self.n == 0 or price is None:
+            return
+        if self._forming and self._data["close"][self.n] == price:
+            return
+        x = self._data["x"][self.n - 1] + self.bar_width if timestamp is None else to_datenum([timestamp])[0]
+        self._compute(self.n, x, float(price), copy.deepcopy(self._indicators))
+        self._forming = True
+        self._dirty = True
+
+    # ----- drawing -----
+    def _refold(self):
+        """Re-decimate the history [0, fold] of every panel and mark the background for a redraw."""
+        stop = self._fold + 1
+        for panel in self._panels:
+            panel["history"] = lttb(self._data["x"][:stop], self._data[panel["reference"]][:stop], self.history_points)
+        self._stale = True
+
+    def _fill_verts(self, idx):
+        x, upper, lower = self._data["x"][idx], self._data["bb_upper"][idx], self._data["bb_lower"][idx]
+        ok = ~np.isnan(upper)
+        if not ok.any():
+            return []
+        return [np.concatenate([np.column_stack([x[ok], upper[ok]]), np.column_stack([x[ok], lower[ok]])[::-1]])]
+
+    def _hist(self, collection, idx):
+        x, h = self._data["x"][idx], self._data["macd_hist"][idx]
+        segments = np.zeros((len(idx), 2, 2))
+        segments[:, :, 0] = x[:, None]
+        segments[:, 1, 1] = h
+        collection.set_segments(segments)
+        collection.set_color(np.where((h >= 0)[:, None], _GREEN, _RED))
+
+    def _set_artists(self, panel, idx, live, first, last):
+        """Point the static or live copies of `panel` at bars `idx` and the signals in [first, last]."""
+        which = 1 if live else 0
+        data = self._data
+        for column, *artists in panel["lines"]:
+            artists[which].set_data(data["x"][idx], data[column][idx])
+        if panel["fill"] is not None:
+            panel["fill"][which].set_verts(self._fill_verts(idx))
+        if panel["hist"] is not None:
+            self._hist(panel["hist"][which], idx)
+        for signal, column, *artists in panel["markers"]:
+            hits = np.asarray(self.signals[signal], dtype=np.int64)
+            hits = hits[(hits >= first) & (hits <= last)]
+            artists[which].set_offsets(np.column_stack([data["x"][hits], data[column][hits]]))
+
+    def _live_slice(self):
+        return slice(self._fold, self.n + (1 if self._forming else 0))
+
+    def _limits_ok(self):
+        live = self._live_slice()
+        x = self._data["x"][live]
+        if not len(x):
+            return True
+        if x[-1] > self._panels[0]["ax"].get_xlim()[1]:
+            return False
+        for panel in self._panels:
+            if panel["fixed_ylim"] is not None:
+                continue
+            low, high = panel["ax"].get_ylim()
+            for values in self._panel_values(panel, live):
+                if len(values) and (np.nanmin(values, initial=np.inf) < low or np.nanmax(values, initial=-np.inf) > high):
+                    return False
+        return True
+
+    def _panel_values(self, panel, index):
+        return [self._data[column][index] for column, _, _ in panel["lines"]] + \
+            ([self._data["macd_hist"][index], np.zeros(1)] if panel["hist"] is not None else [])
+
+    def _rescale(self):
+        """Axis limits for everything shown, with headroom so the next bars rarely force another redraw."""
+        live = self._live_slice()
+        x = self._data["x"]
+        first, last = x[0], x[live][-1]
+        span = max(last - first, self.bar_width)
+        self._panels[0]["ax"].set_xlim(first, last + max(0.05 * span, 5 * self.bar_width))
+        for panel in self._panels:
+            if panel["fixed_ylim"] is not None:
+                continue
+            values = np.concatenate([np.ravel(v) for v in self._panel_values(panel, panel["history"])
+                                     + self._panel_values(panel, live)])
+            values = values[np.isfinite(values)]
+            if not len(values):
+                continue
+            low, high = values.min(), values.max()
+            pad = 0.08 * (high - low) or abs(high) * 0.01 or 1.0
+            panel["ax"].set_ylim(low - pad, high + pad)
+
+    def _on_draw(self, event):
+        """Full redraw (fold, rescale, resize): cache the background, then put the live artists back on top."""
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        self._blit()
+
+    def _blit(self):
+        canvas = self.fig.canvas
+        for artist in self._live:
+            artist.axes.draw_artist(artist)
+        canvas.blit(self.fig.bbox)
+        self.blits += 1
+        self._dirty = False
+
+    def render(self):
+        """Draw pending changes: blit the live artists, or redraw everything after a fold / rescale."""
+        if self.n == 0 or not (self._dirty or self._stale):
+            return False
+        live = self._live_slice()
+        live_idx = np.arange(live.start, live.stop)
+        last = live.stop - 1
+        for panel in self._panels:
+            self._set_artists(panel, live_idx, True, self._fold, last)
+        if self._stale or self._background is None or not self._limits_ok():
+            for panel in self._panels:
+                self._set_artists(panel, panel["history"], False, 0, self._fold)
+            self._rescale()
+            self._stale = False
+            self.redraws += 1
+            self.fig.canvas.draw()  # draw_event caches the background and blits the live artists
+            return True
+        self.fig.canvas.restore_region(self._background)
+        self._blit()
+        return True
+
+
+# =============================================
+# 🔁 Live loop for several symbols
+# =============================================
+def load_charts(store, symbols, timeframe, start, end, **chart_options):
+    """One LiveChart per symbol with history [start, end) from a BarStore; symbols without bars are skipped."""
+    charts = {}
+    for symbol in symbols:
+        columns = store.bars(symbol, timeframe, start, end)
+        if not len(columns["timestamp"]):
+            print(f"No data returned for {symbol}")
+            continue
+        charts[symbol] = chart = LiveChart(symbol, **chart_options)
+        chart.add_bars(columns["timestamp"], columns["close"])
+    return charts
+
+
+def fetch_closed_bars(data_client, charts, timeframe, now, feed="iex"):
+    """New closed bars of every chart with one multi-symbol request: {symbol: (timestamps, values)}."""
+    lasts = [chart.last_timestamp for chart in charts.values()]
+    if any(last is None for last in lasts):
+        return {}
+    start = pd.Timestamp(min(lasts) + 1, tz="UTC")
+    request = StockBarsRequest(symbol_or_symbols=list(charts), timeframe=timeframe, start=start.isoformat(),
+                               end=now.isoformat(), feed=feed)
+    return fetch_bars(data_client, request)
+
+
+def run_live(charts, data_client, timeframe, bar_interval, refresh=1.0, settle_seconds=2.0, source="trade",
+             feed="iex"):
+    """Redraw `charts` ({symbol: LiveChart}) every `refresh` seconds until all windows are closed.
+
+    One latest-trade request per tick moves every chart's forming bar; at
+    each bar boundary (plus `settle_seconds`) one multi-symbol bars request
+    appends the bars that closed. Prints frames, redraws and CPU use at the end.
+    """
+    prices = PriceFeed(data_client, list(charts), source=source, min_interval=refresh, max_interval=refresh, feed=feed)
+    scheduler = BarScheduler(bar_interval=pd.Timedelta(bar_interval).to_pytimedelta(), settle_seconds=settle_seconds)
+    next_bars = scheduler.next_wakeup()
+    plt.show(block=False)
+    frames, cpu_started, wall_started = 0, time.process_time(), time.monotonic()
+    try:
+        while any(plt.fignum_exists(chart.fig.number) for chart in charts.values()):
+            tick = time.monotonic()
+            if time.time() >= next_bars:
+                now = pd.Timestamp.now(tz="UTC").floor(pd.Timedelta(bar_interval)) - pd.Timedelta(seconds=1)
+                for symbol, (timestamps, values) in fetch_closed_bars(data_client, charts, timeframe, now,
+                                                                      feed=feed).items():
+                    if symbol in charts:
+                        charts[symbol].add_bars(timestamps, values[_CLOSE])
+                next_bars = scheduler.next_wakeup()
+            for symbol, chart in charts.items():
+                chart.set_last(prices.price(symbol))
+                chart.render()
+            frames += 1
+            canvas = next(iter(charts.values())).fig.canvas
+            canvas.start_event_loop(max(0.001, refresh - (time.monotonic() - tick)))
+    except KeyboardInterrupt:
+        print("🛑 Stopped.")
+    finally:
+        prices.close()
+        scheduler.close()
+    wall = time.monotonic() - wall_started
+    cpu = time.process_time() - cpu_started
+    redraws = sum(chart.redraws for chart in charts.values())
+    blits = sum(chart.blits for chart in charts.values())
+    print(f"📺 {frames} frames x {len(charts)} charts | {blits} blits, {redraws} full redraws | "
+          f"CPU {100 * cpu / max(wall, 1e-9):.1f}%")
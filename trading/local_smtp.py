@@ -0,0 +1,125 @@
+"""Minimal local SMTP server for testing trade emails without Gmail.
+
+    python -m trading.local_smtp --port 1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=0 python universal-strat-run.py
+
+Accepts any AUTH, keeps received messages in memory (and prints them when
+run as a script). `fail_next` makes the next N DATA commands fail with a
+451 to exercise the notifier's retry path; `idle_timeout` drops connections
+that stay quiet that many seconds, like a real server does.
+"""
+import argparse
+import socket
+import socketserver
+import threading
+from email import message_from_string
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        server = self.server.owner
+        self._reply("220 localhost local-smtp ready")
+        mail_from, rcpt_to = None, []
+        self.request.settimeout(server.idle_timeout)
+        while True:
+            try:
+                raw = self.rfile.readline()
+            except socket.timeout:
+                self._reply("421 4.4.2 Idle timeout, closing connection")
+                return
+            if not raw:
+                return
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                parts = line.split()
+                if len(parts) < 2:
+                    self._reply("501 Syntax error")
+                    continue
+                if len(parts) > 2 or parts[1].upper() == "PLAIN":
+                    self._reply("235 2.7.0 Authentication successful")
+                else:  # AUTH LOGIN: username and password prompts
+                    self._reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self._reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                    self._reply("235 2.7.0 Authentication successful")
+                server.logins += 1
+            elif verb == "MAIL":
+                mail_from, rcpt_to = line[10:].strip("<> "), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(line[8:].strip("<> "))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline().decode(errors="replace")
+                    if data_line in (".\r\n", ".\n", ""):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith("..") else data_line)
+                if server.fail_next > 0:
+                    server.fail_next -= 1
+                    self._reply("451 4.3.0 Injected failure")
+                    continue
+                message = message_from_string("".join(lines))
+                server.messages.append(message)
+                if server.echo:
+                    print(f"📨 {mail_from} -> {', '.join(rcpt_to)}: {message['Subject']}")
+                self._reply("250 OK queued")
+            elif verb == "RSET":
+                mail_from, rcpt_to = None, []
+                self._reply("250 OK")
+            elif verb == "NOOP":
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class LocalSMTPServer:
+    def __init__(self, host="localhost", port=0, echo=False, idle_timeout=None):
+        self.messages = []
+        self.logins = 0
+        self.fail_next = 0
+        self.echo = echo
+        self.idle_timeout = idle_timeout
+        self._server = _ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.owner = self
+        self.host, self.port = self._server.server_address
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in that prints received emails.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    smtp = LocalSMTPServer(args.host, args.port, echo=True)
+    print(f"📬 Local SMTP listening on {smtp.host}:{smtp.port}")
+    try:
+        smtp._server.serve_forever()
+    except KeyboardInterrupt:
+        smtp.stop()
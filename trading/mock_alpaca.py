@@ -0,0 +1,468 @@
+"""Local stand-in for the Alpaca REST APIs, for load tests and offline runs.
+
+    python -m trading.mock_alpaca --port 5005 --latency-ms 40 --jitter-ms 20 --rate-limit 200 --error-rate 0.01
+    ALPACA_API_URL=http://localhost:5005 python strat-run/strat-run-multi.py --no-email
+
+Serves the subset of endpoints the scripts use, on one port:
+  data      /v2/stocks/bars, /v2/stocks/bars/latest, /v2/stocks/quotes/latest, /v2/stocks/trades/latest
+            /v1beta3/crypto/us/bars, /v1beta3/crypto/us/latest/bars, /v1beta3/crypto/us/latest/quotes,
+            /v1beta3/crypto/us/latest/trades
+  trading   /v2/orders (submit/list/cancel all), /v2/orders/<id> (get/cancel),
+            /v2/orders:by_client_order_id (unique client_order_id per order),
+            /v2/positions, /v2/account
+  stats     /_mock/stats (request, order, 429 and error counts)
+
+Bars come from price_bars_*.csv files (`--bars`) or, by default, a
+deterministic synthetic price for any symbol. Market orders fill at once
+at the quote; limit orders fill if marketable and otherwise stay open
+until cancelled. Every response is delayed by `--latency-ms` +/- jitter,
+each API key gets a `--rate-limit` requests/minute token bucket (429
+beyond it), and `--error-rate` / `--reject-rate` inject 500s and order
+rejections.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+_TIMEFRAME_SECONDS = {"Min": 60, "T": 60, "Hour": 3600, "H": 3600, "Day": 86400, "D": 86400, "Week": 7 * 86400}
+PAGE_SIZE = 10_000
+
+
+def _iso(ts):
+    return pd.Timestamp(ts, tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _timeframe_seconds(timeframe):
+    amount = int("".join(ch for ch in timeframe if ch.isdigit()) or 1)
+    unit = "".join(ch for ch in timeframe if not ch.isdigit())
+    return amount * _TIMEFRAME_SECONDS[unit]
+
+
+# =============================================
+# 📈 Market data
+# =============================================
+class MarketData:
+    """Recorded bars per symbol, or a synthetic but repeatable price for any symbol."""
+
+    def __init__(self, frames=None):
+        self.frames = {}
+        for symbol, df in (frames or {}).items():
+            times = pd.DatetimeIndex(pd.to_datetime(df['timestamp'], utc=True)).as_unit("s").asi8
+            self.frames[symbol] = (times, df[['open', 'high', 'low', 'close', 'volume', 'trade_count', 'vwap']].to_numpy(float))
+
+    @staticmethod
+    def _synthetic(symbol, seconds):
+        """Smooth intraday wave plus hash noise around a per-symbol base price."""
+        base = 50 + zlib.crc32(symbol.encode()) % 450
+        m = seconds / 60.0
+        noise = np.modf(np.sin(m * 12.9898 + base) * 43758.5453)[0]
+        return base * (1 + 0.01 * np.sin(2 * np.pi * m / 390) + 0.002 * np.sin(2 * np.pi * m / 37) + 0.0005 * noise)
+
+    def bars(self, symbol, step, start, end):
+        """(times in epoch s, [open, high, low, close, volume, trade_count, vwap] rows) for [start, end]."""
+        if symbol in self.frames:
+            times, values = self.frames[symbol]
+            lo, hi = np.searchsorted(times, [start, end + 1])
+            return times[lo:hi], values[lo:hi]
+
+        times = np.arange(-(-start // step) * step, end + 1, step, dtype=np.int64)
+        opens = self._synthetic(symbol, times)
+        closes = self._synthetic(symbol, times + step - 1)
+        spread = np.abs(opens - closes) * 0.5 + opens * 0.0002
+        volume = 100 + np.abs(np.modf(opens * 7.31)[0]) * 5000
+        values = np.column_stack([
+            opens, np.maximum(opens, closes) + spread, np.minimum(opens, closes) - spread, closes,
+            np.round(volume), np.round(volume / 40) + 1, (opens + closes) / 2,
+        ])
+        return times, values
+
+    def latest_bar(self, symbol, now):
+        step = 60
+        if symbol in self.frames:
+            times, values = self.frames[symbol]
+            i = max(np.searchsorted(times, now - step, side="right") - 1, 0)
+            return times[i], values[i]
+        last_closed = (int(now) // step - 1) * step
+        times, values = self.bars(symbol, step, last_closed, last_closed)
+        return times[0], values[0]
+
+    def price(self, symbol, now):
+        if symbol in self.frames:
+            return float(self.latest_bar(symbol, now)[1][3])
+        return float(self._synthetic(symbol, np.array([now]))[0])
+
+
+def _bars_json(times, values):
+    """Bar dicts for epoch-second `times` and their value rows, timestamps formatted in one pass."""
+    stamps = np.char.add(np.datetime_as_string(np.asarray(times, dtype="datetime64[s]"), unit="s"), "Z").tolist()
+    return [
+        {"t": t, "o": o, "h": h, "l": l, "c": c, "v": v, "n": int(n), "vw": vw}
+        for t, (o, h, l, c, v, n, vw) in zip(stamps, np.asarray(values, dtype=float).tolist())
+    ]
+
+
+# =============================================
+# 🏦 Broker state
+# =============================================
+class MockBroker:
+    def __init__(self, market, cash=100_000.0, reject_rate=0.0):
+        self.market = market
+        self.cash = cash
+        self.reject_rate = reject_rate
+        self.orders = {}
+        self.client_ids = {}  # client_order_id -> order id
+        self.positions = {}  # symbol -> [qty, avg_entry_price]
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _asset_class(symbol):
+        return "crypto" if "/" in symbol else "us_equity"
+
+    def _fill(self, order, price, now):
+        qty = float(order["qty"])
+        signed = qty if order["side"] == "buy" else -qty
+        held, avg = self.positions.get(order["symbol"], [0.0, 0.0])
+        new_qty = held + signed
+        if held == 0 or (held > 0) == (signed > 0):
+            avg = (avg * abs(held) + price * qty) / abs(new_qty)
+        elif new_qty != 0 and (new_qty > 0) != (held > 0):
+            avg = price  # flipped through zero
+        if new_qty == 0:
+            self.positions.pop(order["symbol"], None)
+        else:
+            self.positions[order["symbol"]] = [new_qty, avg]
+        self.cash -= signed * price
+        stamp = _iso(int(now * 1e9))
+        order.update(status="filled", filled_qty=str(qty), filled_avg_price=str(round(price, 4)),
+                     filled_at=stamp, updated_at=stamp)
+
+    def submit(self, body, now):
+        if random.random() < self.reject_rate:
+            return 403, {"code": 40310000, "message": "insufficient buying power (injected)"}
+        symbol = body.get("symbol")
+        qty = body.get("qty")
+        if qty is None and body.get("notional") is not None:
+            qty = float(body["notional"]) / self.market.price(symbol, now)
+        if not symbol or qty is None or body.get("side") not in ("buy", "sell"):
+            return 422, {"code": 40010001, "message": "symbol, qty and side are required"}
+
+        client_order_id = body.get("client_order_id")
+        if client_order_id and self.by_client_id(client_order_id):
+            return 422, {"code": 40010001, "message": "client_order_id must be unique"}
+
+        order_type = body.get("type", "market")
+        stamp = _iso(int(now * 1e9))
+        order = {
+            "id": str(uuid.uuid4()), "client_order_id": body.get("client_order_id") or str(uuid.uuid4()),
+            "created_at": stamp, "updated_at": stamp, "submitted_at": stamp, "filled_at": None,
+            "expired_at": None, "canceled_at": None, "failed_at": None, "replaced_at": None,
+            "replaced_by": None, "replaces": None, "asset_id": str(uuid.uuid5(uuid.NAMESPACE_OID, symbol)),
+            "symbol": symbol, "asset_class": self._asset_class(symbol), "notional": body.get("notional"),
+            "qty": str(qty), "filled_qty": "0", "filled_avg_price": None, "order_class": "simple",
+            "order_type": order_type, "type": order_type, "side": body["side"],
+            "time_in_force": body.get("time_in_force", "day"), "limit_price": body.get("limit_price"),
+            "stop_price": body.get("stop_price"), "status": "new", "extended_hours": bool(body.get("extended_hours", False)),
+            "legs": None, "trail_percent": None, "trail_price": None, "hwm": None,
+        }
+        price = self.market.price(symbol, now)
+        fill_price = price * (1.0001 if body["side"] == "buy" else 0.9999)
+        with self.lock:
+            self.orders[order["id"]] = order
+            self.client_ids[order["client_order_id"]] = order["id"]
+            limit = order["limit_price"]
+            marketable = limit is None or (
+                fill_price <= float(limit) if body["side"] == "buy" else fill_price >= float(limit))
+            if order_type == "market" or (order_type == "limit" and marketable):
+                self._fill(order, fill_price if limit is None else float(limit), now)
+        return 200, order
+
+    def by_client_id(self, client_order_id):
+        return self.orders.get(self.client_ids.get(client_order_id))
+
+    def cancel(self, order_id, now):
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                return 404, {"code": 40410000, "message": "order not found"}
+            if order["status"] in ("filled", "canceled"):
+                return 422, {"code": 42210000, "message": f"order is already in \"{order['status']}\" state"}
+            stamp = _iso(int(now * 1e9))
+            order.update(status="canceled", canceled_at=stamp, updated_at=stamp)
+        return 204, None
+
+    def list_orders(self, status="open", limit=50):
+        closed = ("filled", "canceled", "expired", "rejected")
+        orders = [o for o in self.orders.values()
+                  if status == "all" or (status == "closed") == (o["status"] in closed)]
+        orders.sort(key=lambda o: o["submitted_at"], reverse=True)
+        return orders[:int(limit)]
+
+    def position_json(self, symbol, now):
+        qty, avg = self.positions[symbol]
+        price = self.market.price(symbol, now)
+        market_value = qty * price
+        cost_basis = qty * avg
+        return {
+            "asset_id": str(uuid.uuid5(uuid.NAMESPACE_OID, symbol)), "symbol": symbol,
+            "exchange": "CRYPTO" if "/" in symbol else "NASDAQ", "asset_class": self._asset_class(symbol),
+            "avg_entry_price": str(avg), "qty": str(qty), "qty_available": str(qty),
+            "side": "long" if qty > 0 else "short", "market_value": str(market_value),
+            "cost_basis": str(cost_basis), "unrealized_pl": str(market_value - cost_basis),
+            "unrealized_plpc": str((market_value - cost_basis) / abs(cost_basis) if cost_basis else 0),
+            "unrealized_intraday_pl": str(market_value - cost_basis),
+            "unrealized_intraday_plpc": str((market_value - cost_basis) / abs(cost_basis) if cost_basis else 0),
+            "current_price": str(price), "lastday_price": str(price), "change_today": "0",
+        }
+
+    def account_json(self, now):
+        equity = self.cash + sum(qty * self.market.price(s, now) for s, (qty, _) in self.positions.items())
+        return {
+            "id": "00000000-0000-0000-0000-000000000000", "account_number": "MOCK0000",
+            "status": "ACTIVE", "crypto_status": "ACTIVE", "currency": "USD",
+            "cash": str(self.cash), "portfolio_value": str(equity), "equity": str(equity),
+            "last_equity": str(equity), "buying_power": str(max(self.cash, 0) * 2),
+            "regt_buying_power": str(max(self.cash, 0) * 2), "daytrading_buying_power": str(max(self.cash, 0) * 4),
+            "non_marginable_buying_power": str(max(self.cash, 0)), "multiplier": "2",
+            "pattern_day_trader": False, "trading_blocked": False, "transfers_blocked": False,
+            "account_blocked": False, "shorting_enabled": True, "trade_suspended_by_user": False,
+            "created_at": "2025-01-01T00:00:00Z", "long_market_value": "0", "short_market_value": "0",
+            "initial_margin": "0", "maintenance_margin": "0", "daytrade_count": 0, "sma": "0",
+        }
+
+
+# =============================================
+# 🌐 HTTP front end
+# =============================================
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None, headers=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        mock = self.server.mock
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        body = None
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+        if url.path == "/_mock/stats":
+            return self._send(200, mock.stats())
+
+        stats_path = "/v2/orders/{id}" if url.path.startswith("/v2/orders/") else url.path
+        mock.count("requests", f"{method} {stats_path}")
+        if mock.latency_ms or mock.jitter_ms:
+            time.sleep(max(0.0, random.gauss(mock.latency_ms, mock.jitter_ms)) / 1000)
+        if not mock.take_token(self.headers.get("APCA-API-KEY-ID", "anonymous")):
+            mock.count("rate_limited")
+            return self._send(429, {"message": "too many requests."}, {"Retry-After": "1"})
+        if random.random() < mock.error_rate:
+            mock.count("errors")
+            return self._send(500, {"code": 50010000, "message": "internal server error (injected)"})
+
+        status, payload = mock.route(method, url.path, query, body or {})
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class MockAlpacaServer:
+    def __init__(self, host="localhost", port=0, frames=None, latency_ms=0.0, jitter_ms=0.0,
+                 rate_limit=None, error_rate=0.0, reject_rate=0.0, cash=100_000.0):
+        self.market = MarketData(frames)
+        self.broker = MockBroker(self.market, cash=cash, reject_rate=reject_rate)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self.counters = Counter()
+        self.paths = Counter()
+        self.started = time.monotonic()
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self.host, self.port = self._server.server_address
+        self.url = f"http://{self.host}:{self.port}"
+
+    # ----- accounting -----
+    def count(self, counter, path=None):
+        with self._lock:
+            self.counters[counter] += 1
+            if path:
+                self.paths[path] += 1
+
+    def take_token(self, key):
+        """Token bucket of `rate_limit` requests per minute per API key."""
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.rate_limit, now))
+            tokens = min(self.rate_limit, tokens + (now - last) * self.rate_limit / 60)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return False
+            self._buckets[key] = (tokens - 1, now)
+            return True
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            return {
+                "elapsed_s": round(elapsed, 3),
+                "requests": self.counters["requests"],
+                "requests_per_s": round(self.counters["requests"] / elapsed, 2) if elapsed else 0,
+                "orders": self.counters["orders"],
+                "orders_per_s": round(self.counters["orders"] / elapsed, 2) if elapsed else 0,
+                "rate_limited": self.counters["rate_limited"],
+                "errors": self.counters["errors"],
+                "by_path": dict(self.paths),
+            }
+
+    # ----- routing -----
+    def route(self, method, path, query, body):
+        now = time.time()
+        symbols = [s for s in query.get("symbols", "").split(",") if s]
+
+        if method == "GET" and path in ("/v2/stocks/bars", "/v1beta3/crypto/us/bars"):
+            return 200, self._bars(symbols, query, now)
+        if method == "GET" and path in ("/v2/stocks/bars/latest", "/v1beta3/crypto/us/latest/bars"):
+            bars = {}
+            for s in symbols:
+                t, row = self.market.latest_bar(s, now)
+                bars[s] = _bars_json([t], [row])[0]
+            return 200, {"bars": bars}
+        if method == "GET" and path in ("/v2/stocks/quotes/latest", "/v1beta3/crypto/us/latest/quotes"):
+            stamp = _iso(int(now * 1e9))
+            quotes = {}
+            for s in symbols:
+                price = self.market.price(s, now)
+                quotes[s] = {"t": stamp, "bp": round(price * 0.9999, 4), "bs": 100, "bx": "V",
+                             "ap": round(price * 1.0001, 4), "as": 100, "ax": "V", "c": ["R"], "z": "C"}
+            return 200, {"quotes": quotes}
+        if method == "GET" and path in ("/v2/stocks/trades/latest", "/v1beta3/crypto/us/latest/trades"):
+            stamp = pd.Timestamp(int(now * 1e9), tz="UTC").strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            trades = {s: {"t": stamp, "p": round(self.market.price(s, now), 4), "s": 100, "x": "V",
+                          "i": int(now * 1e3), "c": ["@"], "z": "C"} for s in symbols}
+            return 200, {"trades": trades}
+
+        if path == "/v2/orders":
+            if method == "POST":
+                self.count("orders")
+                return self.broker.submit(body, now)
+            if method == "GET":
+                return 200, self.broker.list_orders(query.get("status", "open"), query.get("limit", 50))
+            if method == "DELETE":
+                results = []
+                for order in self.broker.list_orders("open", limit=10**9):
+                    status, _ = self.broker.cancel(order["id"], now)
+                    results.append({"id": order["id"], "status": 200 if status == 204 else status, "body": None})
+                return 207, results
+        if method == "GET" and path == "/v2/orders:by_client_order_id":
+            order = self.broker.by_client_id(query.get("client_order_id"))
+            return (200, order) if order else (404, {"code": 40410000, "message": "order not found"})
+        if path.startswith("/v2/orders/"):
+            order_id = path.rsplit("/", 1)[-1]
+            if method == "GET":
+                order = self.broker.orders.get(order_id)
+                return (200, order) if order else (404, {"code": 40410000, "message": "order not found"})
+            if method == "DELETE":
+                return self.broker.cancel(order_id, now)
+        if method == "GET" and path == "/v2/positions":
+            return 200, [self.broker.position_json(s, now) for s in list(self.broker.positions)]
+        if method == "GET" and path == "/v2/account":
+            return 200, self.broker.account_json(now)
+
+        return 404, {"code": 40410000, "message": f"{method} {path} is not mocked"}
+
+    def _bars(self, symbols, query, now):
+        step = _timeframe_seconds(query.get("timeframe", "1Min"))
+        start = int(pd.Timestamp(query["start"]).timestamp()) if query.get("start") else int(now) - 86400
+        end = int(pd.Timestamp(query["end"]).timestamp()) if query.get("end") else int(now)
+        end = min(end, int(now) - step)  # only closed bars
+        limit = min(int(query.get("limit") or PAGE_SIZE), PAGE_SIZE)
+        offset = int(query.get("page_token") or 0)
+
+        bars, remaining, skipped = {}, limit, 0
+        for symbol in symbols:
+            times, values = self.market.bars(symbol, step, start, end)
+            take_from = max(offset - skipped, 0)
+            skipped += len(times)
+            rows = _bars_json(times[take_from:take_from + remaining], values[take_from:take_from + remaining])
+            if rows:
+                bars[symbol] = rows
+            remaining -= len(rows)
+            if remaining <= 0:
+                break
+        served = limit - remaining
+        more = remaining <= 0 and offset + served < sum(len(self.market.bars(s, step, start, end)[0]) for s in symbols)
+        return {"bars": bars, "next_page_token": str(offset + served) if more else None}
+
+    # ----- lifecycle -----
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Alpaca-compatible REST server for load tests.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--bars", nargs="*", help="price_bars_*.csv files to serve instead of synthetic prices")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="requests per minute per API key (Alpaca: 200)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 500")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of orders rejected with a 403")
+    args = parser.parse_args()
+
+    frames = None
+    if args.bars:
+        from trading.replay_harness import load_bar_files
+        frames = load_bar_files(args.bars)
+
+    mock = MockAlpacaServer(args.host, args.port, frames, args.latency_ms, args.jitter_ms,
+                            args.rate_limit, args.error_rate, args.reject_rate)
+    print(f"🧪 Mock Alpaca API on {mock.url} (export ALPACA_API_URL={mock.url})")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
+        print(f"📊 {json.dumps(mock.stats(), indent=2)}")
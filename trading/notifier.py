@@ -0,0 +1,170 @@
+import atexit
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+
+# =============================================
+# 📧 Background email notifier
+# =============================================
+class EmailNotifier:
+    """Sends trade emails from a background thread so the trading loop never waits on SMTP.
+
+    `send()` only enqueues. The worker keeps one authenticated SMTP
+    connection open and reuses it while it answers a NOOP and has been idle
+    less than `idle_seconds`; otherwise it reconnects before sending, so a
+    connection the server dropped costs no failed attempt. A failure on a
+    reused connection retries at once on a fresh one; failures on a fresh
+    connection back off exponentially. Alerts arriving within
+    `coalesce_seconds` of each other go out as a single email. When the bounded queue is full, new
+    alerts are dropped with a console warning rather than blocking.
+
+    The server defaults to Gmail; SMTP_HOST / SMTP_PORT / SMTP_STARTTLS in
+    the environment override it (e.g. to point at trading/local_smtp.py).
+    """
+
+    def __init__(self, user, password, receiver, host=None, port=None, starttls=None,
+                 max_queue=100, coalesce_seconds=2.0, max_retries=5, max_backoff=60.0,
+                 idle_seconds=120.0):
+        self.user = user
+        self.password = password
+        self.receiver = receiver
+        self.host = host or os.getenv("SMTP_HOST", "smtp.gmail.com")
+        self.port = int(port or os.getenv("SMTP_PORT", 587))
+        if starttls is None:
+            starttls = os.getenv("SMTP_STARTTLS", "1") != "0"
+        self.starttls = starttls
+        self.coalesce_seconds = coalesce_seconds
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.idle_seconds = idle_seconds
+
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._server = None
+        self._last_used = 0.0
+        self._stopping = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="email-notifier", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def send(self, subject, body):
+        """Queue an alert; never blocks and never raises."""
+        try:
+            self._queue.put_nowait((subject, body))
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ Email queue full, dropped: {subject}")
+
+    def close(self, timeout=30.0):
+        """Flush whatever is queued, then log out."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._worker.join(timeout)
+        self._disconnect()
+
+    # ----- worker side -----
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.coalesce_seconds
+            while not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            while True:  # on shutdown, take everything still queued
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._deliver(*self._compose(batch))
+
+    @staticmethod
+    def _compose(batch):
+        if len(batch) == 1:
+            return batch[0]
+        subject = f"{len(batch)} trade alerts: " + " | ".join(s for s, _ in batch)
+        body = "\n\n".join(f"{s}\n{b}" for s, b in batch)
+        return subject, body
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.starttls:
+            server.starttls()
+        if self.password:
+            server.login(self.user, self.password)
+        self._server = server
+        self._last_used = time.monotonic()
+
+    def _still_open(self):
+        """Whether the open connection is worth reusing: recently used and answering NOOP."""
+        if time.monotonic() - self._last_used > self.idle_seconds:
+            return False
+        try:
+            return self._server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _drop(self):
+        """Close a stale connection without waiting on a QUIT the server won't answer."""
+        try:
+            self._server.close()
+        except Exception:
+            pass
+        self._server = None
+
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):  # e.g. SMTPServerDisconnected: just release the socket
+                self._server.close()
+            self._server = None
+
+    def _deliver(self, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.user
+        msg['To'] = self.receiver
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+
+        backoff = 1.0
+        for attempt in range(1, self.max_retries + 1):
+            reused = self._server is not None
+            try:
+                if reused and not self._still_open():
+                    self._drop()
+                    reused = False
+                if self._server is None:
+                    self._connect()
+                self._server.sendmail(self.user, self.receiver, msg.as_string())
+                self._last_used = time.monotonic()
+                self.sent += 1
+                return
+            except Exception as e:
+                print(f"⚠️ Email send failed (attempt {attempt}/{self.max_retries}): {e}")
+                self._disconnect()
+                if attempt < self.max_retries and not reused:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+        self.failed += 1
+        print(f"⚠️ Giving up on email: {subject}")
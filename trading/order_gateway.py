@@ -0,0 +1,183 @@
+import copy
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from alpaca.common.exceptions import APIError
+from alpaca.trading.enums import OrderSide, TimeInForce
+from alpaca.trading.requests import MarketOrderRequest
+
+# HTTP statuses worth another attempt; anything else (403 buying power, 422 bad order) is final
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Order statuses after which filled_qty can no longer change
+FINAL_STATUSES = {"filled", "canceled", "rejected", "expired", "done_for_day", "replaced"}
+
+
+class LegFailure(Exception):
+    """A multi-leg order could not be completed; `legs` holds every leg's outcome."""
+
+    def __init__(self, message, legs):
+        super().__init__(message)
+        self.legs = legs
+
+
+def _is_transient(error):
+    if isinstance(error, (ConnectionError, Timeout)):
+        return True
+    return isinstance(error, APIError) and error.status_code in RETRY_STATUSES
+
+
+def _opposite(side):
+    return OrderSide.SELL if side == OrderSide.BUY else OrderSide.BUY
+
+
+def _status(order):
+    status = getattr(order, "status", None)
+    return getattr(status, "value", status)
+
+
+# =============================================
+# 🚪 Concurrent order gateway
+# =============================================
+class OrderGateway:
+    """Sends the legs of a pair (or basket) trade at the same time over pooled keep-alive connections.
+
+    Each leg runs on its own worker thread through one shared HTTP session
+    whose pool holds a warm connection per worker, so both legs leave within
+    microseconds of each other instead of one full round trip apart. Every
+    leg carries a client_order_id: a transient failure (timeout, 429, 5xx)
+    is retried under the same id, and if the first attempt had actually
+    reached the broker the retry recovers that order instead of doubling it.
+
+    If a leg still fails, the legs that went through are unwound (open
+    remainder cancelled, then once the order is final - up to
+    `unwind_timeout` seconds - its filled quantity flattened with a market
+    order, retried `unwind_retries` times) and `LegFailure` is raised, so the
+    caller never keeps a naked leg.
+    """
+
+    def __init__(self, trading_client, max_workers=4, retries=2, retry_delay=0.2, warm=True,
+                 unwind_timeout=10.0, unwind_retries=5, poll_interval=0.1):
+        # Own copy of the client: same session and keys, but no built-in 3 s sleep on 429
+        self.client = copy.copy(trading_client)
+        if hasattr(self.client, "_retry"):
+            self.client._retry = 0
+        session = getattr(self.client, "_session", None)
+        if session is not None:
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.unwind_timeout = unwind_timeout
+        self.unwind_retries = unwind_retries
+        self.poll_interval = poll_interval
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="order-leg")
+        self.last_skew_ms = None
+        if warm and session is not None:
+            self.warm()
+
+    def warm(self):
+        """Open one keep-alive connection per worker ahead of the first order."""
+        list(self.pool.map(lambda _: self.client.get_account(), range(self.max_workers)))
+
+    # ----- single leg -----
+    def _submit_leg(self, request, retries=None):
+        """(order, error, sent_at) for one leg, retrying transient failures under the same client_order_id."""
+        retries = self.retries if retries is None else retries
+        sent_at = time.perf_counter()
+        for attempt in range(retries + 1):
+            try:
+                return self.client.submit_order(request), None, sent_at
+            except Exception as error:
+                if isinstance(error, APIError) and error.status_code == 422 and attempt > 0:
+                    # Duplicate client_order_id: the previous attempt did land
+                    try:
+                        return self.client.get_order_by_client_id(request.client_order_id), None, sent_at
+                    except Exception:
+                        pass
+                if attempt == retries or not _is_transient(error):
+                    return None, error, sent_at
+                time.sleep(self.retry_delay * (attempt + 1))
+
+    def _wait_final(self, order):
+        """Poll `order` until its status is final (it can still fill while new / accepted / pending_cancel)."""
+        deadline = time.monotonic() + self.unwind_timeout
+        while _status(order) not in FINAL_STATUSES:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"order {order.id} still {_status(order)} after {self.unwind_timeout:g}s")
+            time.sleep(self.poll_interval)
+            try:
+                order = self.client.get_order_by_id(order.id)
+            except Exception as error:
+                if not _is_transient(error):
+                    raise
+        return order
+
+    def _unwind(self, request, order):
+        """Cancel what is still open of `order`, wait until it is final, then flatten whatever filled."""
+        try:
+            self.client.cancel_order_by_id(order.id)
+        except Exception:
+            pass  # already filled or done
+        order = self._wait_final(order)
+        filled = float(getattr(order, "filled_qty", None) or 0)
+        if getattr(order, "status", None) == "filled" and not filled:
+            filled = float(request.qty)
+        if not filled:
+            return None
+        flatten = MarketOrderRequest(symbol=request.symbol, qty=filled, side=_opposite(request.side),
+                                     time_in_force=request.time_in_force,
+                                     client_order_id=f"unwind-{uuid.uuid4().hex[:20]}")
+        unwound, error, _ = self._submit_leg(flatten, retries=self.unwind_retries)
+        if error is not None:
+            raise error
+        return unwound
+
+    # ----- multi leg -----
+    def submit_legs(self, legs):
+        """Submit MarketOrderRequests concurrently; returns their orders in the same order.
+
+        On a failed leg the others are unwound and `LegFailure` is raised.
+        `last_skew_ms` records the spread between the legs' send times.
+        """
+        for request in legs:
+            if not request.client_order_id:
+                request.client_order_id = f"leg-{uuid.uuid4().hex[:24]}"
+
+        results = list(self.pool.map(self._submit_leg, legs))
+        sent = [sent_at for _, _, sent_at in results]
+        self.last_skew_ms = (max(sent) - min(sent)) * 1000
+
+        failed = [(request, error) for request, (_, error, _) in zip(legs, results) if error is not None]
+        if not failed:
+            return [order for order, _, _ in results]
+
+        outcome = []
+        for request, (order, error, _) in zip(legs, results):
+            if error is not None:
+                outcome.append({"symbol": request.symbol, "status": "failed", "error": str(error)})
+                continue
+            try:
+                unwound = self._unwind(request, order)
+                outcome.append({"symbol": request.symbol, "status": "unwound" if unwound else "cancelled"})
+            except Exception as unwind_error:
+                outcome.append({"symbol": request.symbol, "status": "unwind_failed", "error": str(unwind_error)})
+
+        summary = ", ".join(f"{leg['symbol']} {leg['status']}" for leg in outcome)
+        raise LegFailure(f"{len(failed)} of {len(legs)} legs failed ({summary})", outcome)
+
+    def submit_pair(self, symbol_a, qty_a, side_a, symbol_b, qty_b, side_b, time_in_force=TimeInForce.DAY):
+        """Both legs of a pair trade as market orders; returns (order_a, order_b)."""
+        return tuple(self.submit_legs([
+            MarketOrderRequest(symbol=symbol_a, qty=qty_a, side=side_a, time_in_force=time_in_force),
+            MarketOrderRequest(symbol=symbol_b, qty=qty_b, side=side_b, time_in_force=time_in_force),
+        ]))
+
+    def close(self):
+        self.pool.shutdown(wait=True)
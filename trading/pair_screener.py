@@ -0,0 +1,320 @@
+"""Screen every pair of a symbol universe for mean-reverting spreads.
+
+    python -m trading.pair_screener --symbols SPY QQQ IWM DIA XLK XLF --days 30
+    python -m trading.pair_screener --symbols-file universe.txt --timeframe day --days 730 --offline
+
+Closes come from the local bar store (backfilled from Alpaca unless
+--offline) and are aligned into one (bars, symbols) array of log prices.
+For every ordered pair (y, x) the screener estimates the hedge ratio by
+OLS of y on x, runs an Engle-Granger (Dickey-Fuller on the residual
+spread) cointegration test and turns the spread's mean-reversion speed
+into a half-life, over the whole sample and over the most recent
+`--window` bars. Each direction of a pair is tested and the stronger one
+kept. Correlation of one-bar log returns comes out of the same sums.
+
+Every statistic is built from four cross-product matrices (lagged levels
+and differences against each other), so the O(N²) pair set is a handful
+of matrix multiplications instead of 125k separate regressions. Row
+tiles of those matrices are spread over a process pool that maps the
+price array from shared memory.
+
+The ranked list is written to pairs_<YYYYmmdd_HHMMSS>.csv; the pair trader
+takes it with `pairtrading-test.py --pairs <file> [--rank N]`.
+"""
+import argparse
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from alpaca.data.timeframe import TimeFrame
+
+# Engle-Granger critical values, two variables with a constant (MacKinnon 2010, asymptotic)
+CRITICAL_VALUES = {"1%": -3.8977, "5%": -3.3377, "10%": -3.0462}
+
+PAIR_COLUMNS = [
+    "symbol_a", "symbol_b", "hedge_ratio", "t_stat", "coint_5pct", "half_life", "half_life_recent",
+    "correlation", "spread_std", "bars",
+]
+
+
+# =============================================
+# 📥 Aligned closes
+# =============================================
+def load_closes(store, symbols, timeframe, start, end, min_coverage=0.95):
+    """(timestamps, symbols, closes) with closes a (bars, symbols) float64 array.
+
+    Bars are aligned on the union of all timestamps. Symbols present on
+    fewer than `min_coverage` of them are dropped; the remaining holes are
+    forward-filled and leading rows where any symbol has not traded yet are cut.
+    """
+    series = {symbol: store.bars(symbol, timeframe, start, end) for symbol in symbols}
+    series = {symbol: bars for symbol, bars in series.items() if len(bars["timestamp"])}
+    if not series:
+        return np.empty(0, dtype=np.int64), [], np.empty((0, 0))
+
+    timestamps = np.unique(np.concatenate([bars["timestamp"] for bars in series.values()]))
+    closes = np.full((len(timestamps), len(series)), np.nan)
+    for i, bars in enumerate(series.values()):
+        closes[np.searchsorted(timestamps, bars["timestamp"]), i] = bars["close"]
+
+    keep = np.isfinite(closes).mean(axis=0) >= min_coverage
+    symbols = [symbol for symbol, kept in zip(series, keep) if kept]
+    closes = pd.DataFrame(closes[:, keep]).ffill().to_numpy()
+    first = int(np.isfinite(closes).all(axis=1).argmax()) if len(closes) else 0
+    return timestamps[first:], symbols, closes[first:]
+
+
+# =============================================
+# 🧵 Worker side (log prices live in shared memory)
+# =============================================
+_shared = {}
+
+
+def _attach(name, shape):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared.setdefault("blocks", []).append(shm)
+    return np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _init_worker(levels_name, diffs_name, shape, slices, min_corr, max_t):
+    _shared["levels"] = _attach(levels_name, shape)  # log price at t-1, centered per symbol
+    _shared["diffs"] = _attach(diffs_name, shape)    # log price change t-1 -> t
+    _shared["slices"] = slices
+    _shared["min_corr"] = min_corr
+    _shared["max_t"] = max_t
+
+
+def _cross_sums(rows, t0, t1):
+    """Cross products of the `rows` symbols against all symbols over bars [t0, t1)."""
+    levels, diffs = _shared["levels"][t0:t1], _shared["diffs"][t0:t1]
+    lr, dr = levels[:, rows], diffs[:, rows]
+    return {
+        "n": t1 - t0,
+        "ll": lr.T @ levels,  # sum L_r L_c
+        "ld": lr.T @ diffs,   # sum L_r D_c
+        "dl": dr.T @ levels,  # sum D_r L_c
+        "dd": dr.T @ diffs,   # sum D_r D_c
+        "sq_l": np.einsum("ij,ij->j", levels, levels),
+        "l_d": np.einsum("ij,ij->j", levels, diffs),
+        "sq_d": np.einsum("ij,ij->j", diffs, diffs),
+        "mean_l": levels.mean(axis=0),
+        "mean_d": diffs.mean(axis=0),
+    }
+
+
+def _spread_test(s, rows, swap, beta=None):
+    """Hedge ratio and Dickey-Fuller regression of the spread y - beta * x for every (row, column) pair.
+
+    swap=False tests y = row symbol on x = column symbol, swap=True the
+    reverse. `beta` defaults to the OLS hedge ratio over the same bars.
+    Returns (beta, gamma, t_stat, spread_var) arrays of shape (rows, columns).
+    """
+    n = s["n"]
+    col = np.s_[None, :]
+    row = np.s_[rows, None]
+    mean_l, mean_d = s["mean_l"], s["mean_d"]
+
+    # centered (co)moments; y/x take the row or column role depending on the direction
+    if swap:
+        ly, lx, dy, dx = mean_l[col], mean_l[row], mean_d[col], mean_d[row]
+        syy, sxx = s["sq_l"][col], s["sq_l"][row]
+        ly_dy, lx_dx = s["l_d"][col], s["l_d"][row]
+        ly_dx, lx_dy = s["dl"], s["ld"]
+        dyy, dxx = s["sq_d"][col], s["sq_d"][row]
+    else:
+        ly, lx, dy, dx = mean_l[row], mean_l[col], mean_d[row], mean_d[col]
+        syy, sxx = s["sq_l"][row], s["sq_l"][col]
+        ly_dy, lx_dx = s["l_d"][row], s["l_d"][col]
+        ly_dx, lx_dy = s["ld"], s["dl"]
+        dyy, dxx = s["sq_d"][row], s["sq_d"][col]
+
+    cov_l = s["ll"] - n * ly * lx
+    var_ly, var_lx = syy - n * ly * ly, sxx - n * lx * lx
+    if beta is None:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = cov_l / var_lx
+
+    # spread s = Ly - beta Lx, its change ds = Dy - beta Dx
+    s_ss = var_ly - 2 * beta * cov_l + beta * beta * var_lx
+    s_sd = ((ly_dy - n * ly * dy) - beta * (ly_dx - n * ly * dx)
+            - beta * (lx_dy - n * lx * dy) + beta * beta * (lx_dx - n * lx * dx))
+    s_dd = (dyy - n * dy * dy) - 2 * beta * (s["dd"] - n * dy * dx) + beta * beta * (dxx - n * dx * dx)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma = s_sd / s_ss
+        residual_var = np.maximum(s_dd - gamma * s_sd, 0.0) / max(n - 2, 1)
+        t_stat = gamma / np.sqrt(residual_var / s_ss)
+    return beta, gamma, t_stat, s_ss / n
+
+
+def _half_life(gamma):
+    """Bars for a spread deviation to halve under ds = gamma * s (inf if it doesn't revert)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        half_life = -math.log(2) / np.log1p(gamma)
+    return np.where((gamma < 0) & (gamma > -1), half_life, np.inf)
+
+
+def _screen_tile(bounds):
+    """Every pair (r, c) with r in [r0, r1) and c > r that passes the correlation / t-stat filters."""
+    r0, r1 = bounds
+    rows = np.arange(r0, r1)
+    (f0, f1), (w0, w1) = _shared["slices"]
+    full = _cross_sums(rows, f0, f1)
+    recent = _cross_sums(rows, w0, w1)
+
+    # one-bar log return correlation straight from the difference sums
+    n = full["n"]
+    mean_d, sq_d = full["mean_d"], full["sq_d"]
+    var_d = sq_d - n * mean_d * mean_d
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = (full["dd"] - n * mean_d[rows, None] * mean_d[None, :]) / np.sqrt(var_d[rows, None] * var_d[None, :])
+
+    forward = _spread_test(full, rows, swap=False)
+    backward = _spread_test(full, rows, swap=True)
+    use_backward = backward[2] < forward[2]
+    beta, gamma, t_stat, spread_var = (np.where(use_backward, b, f) for f, b in zip(forward, backward))
+
+    # same spread (same hedge ratio) over the most recent window only
+    recent_forward = _spread_test(recent, rows, swap=False, beta=forward[0])
+    recent_backward = _spread_test(recent, rows, swap=True, beta=backward[0])
+    gamma_recent = np.where(use_backward, recent_backward[1], recent_forward[1])
+
+    upper = rows[:, None] < np.arange(correlation.shape[1])[None, :]
+    keep = upper & (correlation >= _shared["min_corr"]) & (t_stat <= _shared["max_t"]) & np.isfinite(t_stat)
+    r, c = np.nonzero(keep)
+    swapped = use_backward[r, c]
+    return {
+        "y": np.where(swapped, c, r + r0),
+        "x": np.where(swapped, r + r0, c),
+        "hedge_ratio": beta[r, c],
+        "t_stat": t_stat[r, c],
+        "half_life": _half_life(gamma[r, c]),
+        "half_life_recent": _half_life(gamma_recent[r, c]),
+        "correlation": correlation[r, c],
+        "spread_std": np.sqrt(spread_var[r, c]),
+    }
+
+
+# =============================================
+# 🔎 Pair screen
+# =============================================
+def _run_tiles(log_prices, levels_shm, diffs_shm, window, min_corr, max_t, workers, tile_rows):
+    n_bars, n_symbols = log_prices.shape
+    shape = (n_bars - 1, n_symbols)
+    levels = np.ndarray(shape, dtype=np.float64, buffer=levels_shm.buf)
+    diffs = np.ndarray(shape, dtype=np.float64, buffer=diffs_shm.buf)
+    # centering first keeps the cross products small and well conditioned
+    np.subtract(log_prices[:-1], log_prices[:-1].mean(axis=0), out=levels)
+    np.subtract(log_prices[1:], log_prices[:-1], out=diffs)
+
+    slices = ((0, shape[0]), (max(0, shape[0] - window), shape[0]))
+    # ~8 tiles per worker keeps them all busy while each tile's (rows, N) arrays stay small
+    tile_rows = tile_rows or max(1, min(256, math.ceil(n_symbols / (workers * 8))))
+    tiles = [(r0, min(r0 + tile_rows, n_symbols)) for r0 in range(0, n_symbols - 1, tile_rows)]
+
+    if workers == 1:
+        _shared.update(levels=levels, diffs=diffs, slices=slices, min_corr=min_corr, max_t=max_t)
+        try:
+            return [_screen_tile(tile) for tile in tiles]
+        finally:
+            _shared.clear()
+    initargs = (levels_shm.name, diffs_shm.name, shape, slices, min_corr, max_t)
+    with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        return pool.map(_screen_tile, tiles, chunksize=1)
+
+
+def screen_pairs(closes, symbols, window=390, min_corr=0.5, max_t=CRITICAL_VALUES["10%"],
+                 min_half_life=1.0, max_half_life=None, workers=None, tile_rows=None):
+    """Rank every pair of `symbols` by cointegration strength.
+
+    `closes` is (bars, symbols), e.g. from `load_closes`. Pairs whose
+    return correlation is below `min_corr` or whose Engle-Granger t-stat is
+    above `max_t` (default: not significant at 10%) are dropped, as are
+    half-lives outside [min_half_life, max_half_life] bars (default max:
+    `window`). Returns a DataFrame with PAIR_COLUMNS, most negative t-stat first.
+    """
+    workers = workers or os.cpu_count()
+    max_half_life = max_half_life or window
+    log_prices = np.log(np.asarray(closes, dtype=np.float64))
+    n_bars, n_symbols = log_prices.shape
+    if n_bars < 3 or n_symbols < 2:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+
+    size = (n_bars - 1) * n_symbols * 8
+    levels_shm = shared_memory.SharedMemory(create=True, size=size)
+    diffs_shm = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        parts = _run_tiles(log_prices, levels_shm, diffs_shm, window, min_corr, max_t, workers, tile_rows)
+    finally:
+        for shm in (levels_shm, diffs_shm):
+            shm.close()
+            shm.unlink()
+
+    merged = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    names = np.asarray(symbols, dtype=object)
+    df = pd.DataFrame({
+        "symbol_a": names[merged.pop("y")],
+        "symbol_b": names[merged.pop("x")],
+        **merged,
+    })
+    df["coint_5pct"] = df["t_stat"] <= CRITICAL_VALUES["5%"]
+    df["bars"] = n_bars
+    df = df[(df["half_life"] >= min_half_life) & (df["half_life"] <= max_half_life)]
+    return df[PAIR_COLUMNS].sort_values("t_stat", ignore_index=True)
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    from alpaca.data.historical import StockHistoricalDataClient
+    from trading.bar_store import BarStore
+
+    parser = argparse.ArgumentParser(description="Rank every pair of a symbol universe by cointegration.")
+    universe = parser.add_mutually_exclusive_group(required=True)
+    universe.add_argument("--symbols", nargs="+")
+    universe.add_argument("--symbols-file", help="one symbol per line")
+    parser.add_argument("--timeframe", choices=["minute", "day"], default="minute")
+    parser.add_argument("--days", type=int, default=30, help="calendar days of history")
+    parser.add_argument("--end", default=None, help="UTC end of the window (default: now)")
+    parser.add_argument("--window", type=int, default=None, help="bars for the recent half-life (default: 1 session)")
+    parser.add_argument("--min-corr", type=float, default=0.5)
+    parser.add_argument("--max-t", type=float, default=CRITICAL_VALUES["10%"], help="keep pairs with t-stat at or below this")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--offline", action="store_true", help="only use bars already in the bar store")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", help="result file (default pairs_<time>.csv)")
+    args = parser.parse_args()
+
+    if args.symbols_file:
+        with open(args.symbols_file) as f:
+            symbols = [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    else:
+        symbols = [symbol.upper() for symbol in args.symbols]
+    timeframe = TimeFrame.Minute if args.timeframe == "minute" else TimeFrame.Day
+    window = args.window or (390 if args.timeframe == "minute" else 60)
+
+    client = None
+    if not args.offline:
+        load_dotenv("/Users/chintzruparel/Documents/GitHub/startup/.env")
+        client = StockHistoricalDataClient(os.getenv("DATA_KEY"), os.getenv("DATA_SECRET"), url_override=os.getenv("ALPACA_API_URL"))
+
+    end = datetime.fromisoformat(args.end).astimezone(timezone.utc) if args.end else datetime.now(timezone.utc)
+    start = end - timedelta(days=args.days)
+    started = datetime.now()
+    timestamps, symbols, closes = load_closes(BarStore(client), symbols, timeframe, start, end)
+    loaded = (datetime.now() - started).total_seconds()
+    print(f"📥 {closes.shape[0]} aligned bars x {len(symbols)} symbols in {loaded:.1f}s")
+
+    started = datetime.now()
+    pairs = screen_pairs(closes, symbols, window=window, min_corr=args.min_corr, max_t=args.max_t, workers=args.workers)
+    elapsed = (datetime.now() - started).total_seconds()
+
+    out = args.out or f"pairs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    pairs.to_csv(out, index=False)
+    print(f"\n🔗 Top {args.top} pairs")
+    print(pairs.head(args.top).to_string(index=False))
+    n_pairs = len(symbols) * (len(symbols) - 1) // 2
+    print(f"\n⏱️ {n_pairs} pairs screened in {elapsed:.1f}s | {len(pairs)} kept | saved to {out}")
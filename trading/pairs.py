@@ -0,0 +1,183 @@
+import math
+from collections import deque
+
+from trading.incremental import NAN, RollingMeanStd
+
+
+# =============================================
+# 📏 Hedge ratio estimators (O(1) per bar)
+# =============================================
+class RollingRegression:
+    """Rolling OLS of y on x over the last `window` bars: hedge ratio = cov(x, y) / var(x).
+
+    Means, variance and co-moment are kept with Welford add/remove updates,
+    so each bar costs the same however long the window is.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._mean_x = 0.0
+        self._mean_y = 0.0
+        self._m2_x = 0.0
+        self._c_xy = 0.0
+
+    def _add(self, x, y, n):
+        dx = x - self._mean_x
+        self._mean_x += dx / n
+        self._mean_y += (y - self._mean_y) / n
+        self._m2_x += dx * (x - self._mean_x)
+        self._c_xy += dx * (y - self._mean_y)
+
+    def _remove(self, x, y, n):
+        # inverse of _add: n is the count after removal
+        mean_x = self._mean_x - (x - self._mean_x) / n
+        self._m2_x -= (x - mean_x) * (x - self._mean_x)
+        self._c_xy -= (x - mean_x) * (y - self._mean_y)
+        self._mean_x = mean_x
+        self._mean_y -= (y - self._mean_y) / n
+
+    def update(self, x, y):
+        if len(self._values) == self.window:
+            old_x, old_y = self._values.popleft()
+            self._remove(old_x, old_y, self.window - 1)
+        self._values.append((x, y))
+        self._add(x, y, len(self._values))
+        return self.beta
+
+    @property
+    def beta(self):
+        if len(self._values) < self.window or self._m2_x <= 0.0:
+            return NAN
+        return self._c_xy / self._m2_x
+
+    @property
+    def alpha(self):
+        return self._mean_y - self.beta * self._mean_x
+
+
+class KalmanHedgeRatio:
+    """Recursive (Kalman filter) estimate of y = beta * x + alpha with random-walk beta and alpha.
+
+    `delta` sets how fast the coefficients may drift (1e-4 is the usual
+    choice; smaller = steadier), `obs_var` the measurement noise of y.
+    Seeded with beta = y / x on the first bar. All 2x2 algebra is written
+    out by hand, so an update is a few dozen float operations.
+    """
+
+    def __init__(self, delta=1e-4, obs_var=1e-3):
+        self.drift = delta / (1.0 - delta)
+        self.obs_var = obs_var
+        self.beta = NAN
+        self.alpha = 0.0
+        # state covariance [[p00, p01], [p01, p11]] for (beta, alpha)
+        self._p00 = self._p01 = self._p11 = 0.0
+
+    def update(self, x, y):
+        if math.isnan(self.beta):
+            self.beta = y / x
+            return self.beta
+
+        # predict: coefficients random-walk, so only the covariance grows
+        r00 = self._p00 + self.drift
+        r01 = self._p01
+        r11 = self._p11 + self.drift
+
+        # observation row h = [x, 1]
+        rh0 = r00 * x + r01
+        rh1 = r01 * x + r11
+        q = rh0 * x + rh1 + self.obs_var
+        error = y - (self.beta * x + self.alpha)
+        k0, k1 = rh0 / q, rh1 / q
+
+        self.beta += k0 * error
+        self.alpha += k1 * error
+        self._p00 = r00 - k0 * rh0
+        self._p01 = r01 - k0 * rh1
+        self._p11 = r11 - k1 * rh1
+        return self.beta
+
+
+class FixedHedgeRatio:
+    """Constant hedge ratio (1.0 = the plain price difference)."""
+
+    def __init__(self, beta=1.0):
+        self.beta = beta
+
+    def update(self, x, y):
+        return self.beta
+
+
+# =============================================
+# 🔗 Incremental pair engine
+# =============================================
+class PairEngine:
+    """Spread z-score of one pair (A vs B), updated one aligned bar at a time.
+
+    spread = close_a - hedge_ratio * close_b, with the hedge ratio as
+    estimated *before* the bar (no look-ahead). Its rolling mean and
+    sample std (ddof=1, same as pandas' `rolling().std()`) come from a
+    Welford `RollingMeanStd`, so every bar is O(1) whatever the lookback
+    and one process can track many pairs.
+
+    hedge: "kalman" (KalmanHedgeRatio), "ols" (RollingRegression over
+    `hedge_window` bars) or "none" (ratio fixed at 1.0, the old raw difference).
+
+    Bars of the two symbols are matched on timestamp like an inner join:
+    a bar is held until the other symbol's bar for the same minute shows
+    up, and dropped once a later minute has been matched.
+    """
+
+    def __init__(self, symbol_a, symbol_b, window=60, hedge="kalman", hedge_window=None, delta=1e-4, obs_var=1e-3):
+        self.symbol_a = symbol_a
+        self.symbol_b = symbol_b
+        if hedge == "kalman":
+            self.hedge = KalmanHedgeRatio(delta=delta, obs_var=obs_var)
+        elif hedge == "ols":
+            self.hedge = RollingRegression(hedge_window or window)
+        elif hedge == "none":
+            self.hedge = FixedHedgeRatio(1.0)
+        else:
+            raise ValueError(f"unknown hedge mode {hedge!r} (kalman, ols or none)")
+        self._stats = RollingMeanStd(window, ddof=1)
+        self._pending_a = {}
+        self._pending_b = {}
+        self.last_timestamp = None
+        self.latest = None
+
+    def update(self, timestamp, close_a, close_b):
+        """Feed one aligned bar; returns the latest values as a dict."""
+        hedge_ratio = self.hedge.beta
+        spread = close_a - hedge_ratio * close_b
+        if not math.isnan(spread):  # OLS warm-up: no ratio yet, keep NaN out of the running stats
+            self._stats.update(spread)
+        mean, std = self._stats.mean, self._stats.std
+        z_score = (spread - mean) / std if std > 0 else NAN
+        self.hedge.update(close_b, close_a)
+
+        self.latest = {
+            "timestamp": timestamp,
+            "close_a": close_a,
+            "close_b": close_b,
+            "hedge_ratio": hedge_ratio,
+            "spread": spread,
+            "z_score": z_score,
+            "prev_z": self.latest["z_score"] if self.latest else NAN,
+        }
+        self.last_timestamp = timestamp
+        return self.latest
+
+    def add_bars(self, rows_a, rows_b):
+        """Feed new bar rows of both symbols; returns the updates for each newly matched timestamp."""
+        for rows, pending in ((rows_a, self._pending_a), (rows_b, self._pending_b)):
+            for row in rows:
+                if self.last_timestamp is None or row['timestamp'] > self.last_timestamp:
+                    pending[row['timestamp']] = row['close']
+
+        matched = sorted(self._pending_a.keys() & self._pending_b.keys())
+        updates = [self.update(ts, self._pending_a[ts], self._pending_b[ts]) for ts in matched]
+        if matched:
+            for pending in (self._pending_a, self._pending_b):
+                for ts in [ts for ts in pending if ts <= self.last_timestamp]:
+                    del pending[ts]
+        return updates
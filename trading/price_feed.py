@@ -0,0 +1,201 @@
+import copy
+import threading
+import time
+
+from alpaca.common.exceptions import APIError
+from alpaca.data.requests import (
+    CryptoLatestQuoteRequest, CryptoLatestTradeRequest, StockLatestQuoteRequest, StockLatestTradeRequest,
+)
+
+from trading.bar_decoder import parse_timestamps
+
+
+def _quote_price(bid, ask):
+    """Mid of a two-sided quote, else whichever side is there."""
+    if bid and ask:
+        return (bid + ask) / 2.0
+    return ask or bid or None
+
+
+# =============================================
+# ⚡ Sub-second price feed
+# =============================================
+class PriceFeed:
+    """Current price of a few symbols for the 1-second scalpers, from trades/quotes instead of minute bars.
+
+    `price(symbol)` returns the last trade (source="trade") or the quote mid
+    (source="quote"). One latest-trade/latest-quote request covers every
+    symbol, and its answer is cached for `ttl` seconds (longer if the next
+    poll is not due yet), so several reads in one loop cost at most one request.
+
+    Polling adapts: `wait()` sleeps `interval` seconds, which halves (down
+    to `min_interval`) whenever the price moved and grows 1.5x (up to
+    `max_interval`) while nothing trades. A 429 doubles it up to
+    `max_backoff` and keeps serving the cached price meanwhile.
+
+    With stream=True the trades/quotes websocket fills the cache instead
+    and `wait()` returns as soon as a new price arrives. If the stream goes
+    quiet for `stale_after` seconds, reads fall back to a REST request.
+    """
+
+    def __init__(self, data_client, symbols, source="trade", ttl=0.2, min_interval=0.25, max_interval=2.0,
+                 max_backoff=30.0, feed="iex", stream=False, api_key=None, secret_key=None, stream_url=None,
+                 stale_after=5.0):
+        if source not in ("trade", "quote"):
+            raise ValueError(f"unknown price source {source!r} (trade or quote)")
+        self.symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        self.source = source
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_backoff = max_backoff
+        self.feed = feed
+        self.stale_after = stale_after
+        self.crypto = hasattr(data_client, "get_crypto_bars")
+        self.interval = min_interval
+
+        # Raw JSON (no pydantic models) through a copy of the client, like fetch_bars
+        self.client = data_client
+        if hasattr(data_client, "_use_raw_data"):
+            self.client = copy.copy(data_client)
+            self.client._use_raw_data = True
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.rate_limited = 0
+        self.stream_updates = 0
+        self._prices = {}  # symbol -> {"price", "timestamp" (epoch ns), "received" (monotonic)}
+        self._fetched_at = None
+        self._next_poll = time.monotonic()
+        self._lock = threading.Lock()
+        self._updated = threading.Event()
+
+        self._stream = None
+        if stream:
+            self._start_stream(api_key, secret_key, stream_url)
+
+    # ----- REST polling -----
+    def _request(self):
+        if self.crypto:
+            if self.source == "trade":
+                return self.client.get_crypto_latest_trade(CryptoLatestTradeRequest(symbol_or_symbols=self.symbols))
+            return self.client.get_crypto_latest_quote(CryptoLatestQuoteRequest(symbol_or_symbols=self.symbols))
+        if self.source == "trade":
+            return self.client.get_stock_latest_trade(StockLatestTradeRequest(symbol_or_symbols=self.symbols, feed=self.feed))
+        return self.client.get_stock_latest_quote(StockLatestQuoteRequest(symbol_or_symbols=self.symbols, feed=self.feed))
+
+    def _parse(self, entry):
+        """(price, timestamp string or datetime) from a raw dict or an alpaca Trade/Quote object."""
+        if isinstance(entry, dict):
+            if self.source == "trade":
+                return entry.get("p"), entry.get("t")
+            return _quote_price(entry.get("bp"), entry.get("ap")), entry.get("t")
+        if self.source == "trade":
+            return entry.price, entry.timestamp
+        return _quote_price(entry.bid_price, entry.ask_price), entry.timestamp
+
+    def refresh(self):
+        """Poll once for every symbol; returns True if any price changed."""
+        self.requests += 1
+        try:
+            data = self._request()
+        except Exception as error:
+            if not isinstance(error, APIError) or error.status_code != 429:
+                self._next_poll = time.monotonic() + self.interval  # no hammering while the API is failing
+                raise
+            self.rate_limited += 1
+            self.interval = min(self.max_backoff, max(self.interval, self.min_interval) * 2)
+            self._next_poll = time.monotonic() + self.interval
+            return False
+
+        received = time.monotonic()
+        changed = False
+        with self._lock:
+            for symbol, entry in data.items():
+                price, stamp = self._parse(entry)
+                if price is None:
+                    continue
+                timestamp = int(parse_timestamps([stamp])[0]) if isinstance(stamp, str) else stamp
+                old = self._prices.get(symbol)
+                if old is None or old["price"] != price or old["timestamp"] != timestamp:
+                    changed = True
+                self._prices[symbol] = {"price": float(price), "timestamp": timestamp, "received": received}
+        self._fetched_at = received
+
+        if changed:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        self._next_poll = received + self.interval
+        return changed
+
+    # ----- reads -----
+    def latest(self, symbol):
+        """{"price", "timestamp", "received"} for `symbol`, polling only if the cache has expired."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._prices.get(symbol)
+        if self._stream is not None and cached and now - cached["received"] < self.stale_after:
+            self.cache_hits += 1
+            return cached
+        if cached and self._fetched_at is not None and (now - self._fetched_at < self.ttl or now < self._next_poll):
+            self.cache_hits += 1
+            return cached
+        self.refresh()
+        with self._lock:
+            return self._prices.get(symbol)
+
+    def price(self, symbol):
+        latest = self.latest(symbol)
+        return latest["price"] if latest else None
+
+    def wait(self):
+        """Sleep until the next poll is due (or, streaming, until a new price arrives)."""
+        due = self._next_poll
+        if self._fetched_at is not None:
+            due = max(due, self._fetched_at + self.ttl)  # reads before this are cache hits anyway
+        timeout = max(0.0, due - time.monotonic())
+        if self._stream is not None:
+            self._updated.wait(timeout=self.max_interval)
+            self._updated.clear()
+            return
+        time.sleep(timeout)
+
+    # ----- streaming -----
+    def _start_stream(self, api_key, secret_key, url):
+        if self.crypto:
+            from alpaca.data.live import CryptoDataStream
+            self._stream = CryptoDataStream(api_key, secret_key, raw_data=True, url_override=url)
+        else:
+            from alpaca.data.enums import DataFeed
+            from alpaca.data.live import StockDataStream
+            self._stream = StockDataStream(api_key, secret_key, raw_data=True, feed=DataFeed(self.feed), url_override=url)
+
+        if self.source == "trade":
+            self._stream.subscribe_trades(self._on_message, *self.symbols)
+        else:
+            self._stream.subscribe_quotes(self._on_message, *self.symbols)
+        threading.Thread(target=self._stream.run, name="price-stream", daemon=True).start()
+
+    async def _on_message(self, msg):
+        price = msg.get("p") if self.source == "trade" else _quote_price(msg.get("bp"), msg.get("ap"))
+        if price is None:
+            return
+        stamp = msg.get("t")
+        timestamp = stamp.to_unix_nano() if hasattr(stamp, "to_unix_nano") else stamp
+        with self._lock:
+            self._prices[msg["S"]] = {"price": float(price), "timestamp": timestamp, "received": time.monotonic()}
+        self.stream_updates += 1
+        self._updated.set()
+
+    def stats(self):
+        return {"requests": self.requests, "cache_hits": self.cache_hits,
+                "rate_limited": self.rate_limited, "stream_updates": self.stream_updates,
+                "interval_s": round(self.interval, 3)}
+
+    def close(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop()
+            except Exception:
+                pass  # loop not started or already closed
@@ -0,0 +1,400 @@
+"""Local broker that every script's Alpaca REST calls go through: one shared rate limit, coalesced reads.
+
+    python -m trading.rate_broker --port 5010
+    export ALPACA_API_URL=http://localhost:5010     # then start the strategies as usual
+
+All scripts already send their data and trading requests to `ALPACA_API_URL`
+when it is set, so pointing them at the broker is enough. It forwards data
+paths (/v2/stocks/..., /v1beta*/...) to `--data-url` and everything else to
+`--trading-url`, and on the way:
+
+  rate limit   one token bucket per API key (`--rate-limit` requests/minute,
+               at most `--burst` back to back). A request without a token
+               waits for one instead of being sent and bounced with a 429;
+               data requests leave `--trading-reserve` tokens for orders.
+               An upstream 429 empties the bucket for its Retry-After.
+  coalescing   a GET identical to one already in flight (same key, path and
+               query) waits for that call and gets its answer. Bar requests
+               are normalised first (symbols sorted, start/end snapped to
+               the bar grid), so two strategies asking for the last bars a
+               few ms apart match. A bar or latest trade/quote/bar request
+               whose symbols and time range sit inside an in-flight one is
+               answered by filtering that call's response.
+
+Websocket streams are not proxied. Stats: GET /_broker/stats.
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from trading.bar_decoder import parse_timestamps
+
+DATA_PREFIXES = ("/v2/stocks", "/v1beta")
+# Endpoints answered as {<key>: {symbol: ...}}; only these are coalesced across symbol sets
+BY_SYMBOL = {
+    "/v2/stocks/bars": "bars", "/v1beta3/crypto/us/bars": "bars",
+    "/v2/stocks/bars/latest": "bars", "/v1beta3/crypto/us/latest/bars": "bars",
+    "/v2/stocks/quotes/latest": "quotes", "/v1beta3/crypto/us/latest/quotes": "quotes",
+    "/v2/stocks/trades/latest": "trades", "/v1beta3/crypto/us/latest/trades": "trades",
+}
+RANGED = {"/v2/stocks/bars", "/v1beta3/crypto/us/bars"}
+_GRID_SECONDS = {"Min": 60, "T": 60, "Hour": 3600, "H": 3600}  # daily bars sit on exchange time, not a UTC grid
+_HOP_BY_HOP = {"host", "content-length", "connection", "keep-alive", "accept-encoding", "transfer-encoding"}
+
+
+def _grid_seconds(timeframe):
+    amount = "".join(ch for ch in timeframe if ch.isdigit())
+    unit = "".join(ch for ch in timeframe if not ch.isdigit())
+    return int(amount or 1) * _GRID_SECONDS[unit] if unit in _GRID_SECONDS else None
+
+
+def _iso(seconds):
+    return pd.Timestamp(seconds, unit="s", tz="UTC").strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _to_seconds(value):
+    stamp = pd.Timestamp(value)
+    if stamp.tzinfo is None:
+        stamp = stamp.tz_localize("UTC")
+    return stamp.timestamp()
+
+
+# =============================================
+# 🪣 Token bucket
+# =============================================
+class TokenBucket:
+    """`rate` requests per minute, at most `burst` back to back; callers wait for a token."""
+
+    def __init__(self, rate, burst):
+        self.per_second = rate / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    def acquire(self, reserve=0, timeout=None):
+        """Take a token, leaving `reserve` in the bucket; returns seconds waited, or None after `timeout`."""
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1 + reserve:
+                    self.tokens -= 1
+                    return now - started
+                delay = (1 + reserve - self.tokens) / self.per_second
+            if timeout is not None and now - started + delay > timeout:
+                return None
+            time.sleep(delay)
+
+    def drain(self, seconds):
+        """Upstream answered 429: nothing goes out for `seconds`."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.per_second
+
+
+# =============================================
+# 🔀 In-flight calls
+# =============================================
+class _Call:
+    """One upstream GET that later identical or narrower requests can wait on."""
+
+    def __init__(self, key, scope):
+        self.key = key
+        self.scope = scope
+        self.done = threading.Event()
+        self.status = None
+        self.body = None
+        self.content_type = None
+
+
+def _scope(account, path, query):
+    """What a by-symbol GET covers, for matching narrower requests; None if it can't be shared that way."""
+    if path not in BY_SYMBOL or "page_token" in query:
+        return None
+    start = end = None
+    if path in RANGED:
+        if "start" not in query or "end" not in query:
+            return None
+        start, end = _to_seconds(query["start"]), _to_seconds(query["end"])
+    other = tuple(sorted((k, v) for k, v in query.items() if k not in ("symbols", "start", "end", "limit")))
+    return {"account": account, "path": path, "other": other,
+            "symbols": frozenset(s for s in query.get("symbols", "").split(",") if s),
+            "start": start, "end": end, "limit": int(query["limit"]) if query.get("limit") else None}
+
+
+def _covers(outer, inner):
+    if (outer["account"], outer["path"], outer["other"]) != (inner["account"], inner["path"], inner["other"]):
+        return False
+    if not inner["symbols"] <= outer["symbols"]:
+        return False
+    return outer["start"] is None or (outer["start"] <= inner["start"] and inner["end"] <= outer["end"])
+
+
+def _narrow(call, scope):
+    """Body for `scope` cut out of a wider call's JSON answer, or None if it can't be."""
+    if call.status != 200:
+        return None
+    try:
+        payload = json.loads(call.body)
+    except ValueError:
+        return None
+    if payload.get("next_page_token"):
+        return None  # the wider answer is only its first page
+    field = BY_SYMBOL[scope["path"]]
+    entries = payload.get(field) or {}
+    narrowed = {symbol: entries[symbol] for symbol in scope["symbols"] if symbol in entries}
+
+    if scope["start"] is not None:
+        lo, hi = int(scope["start"] * 1e9), int(scope["end"] * 1e9)
+        total = 0
+        for symbol, rows in narrowed.items():
+            times = parse_timestamps([row["t"] for row in rows])
+            narrowed[symbol] = [row for row, t in zip(rows, times) if lo <= t <= hi]
+            total += len(narrowed[symbol])
+        narrowed = {symbol: rows for symbol, rows in narrowed.items() if rows}
+        if scope["limit"] is not None and total > scope["limit"]:
+            return None  # would need paging; let it go upstream
+
+    payload[field] = narrowed
+    return json.dumps(payload).encode()
+
+
+# =============================================
+# 🌐 HTTP front end
+# =============================================
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        broker = self.server.broker
+        url = urlparse(self.path)
+        if url.path == "/_broker/stats":
+            return self._send(200, json.dumps(broker.stats()).encode())
+
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in _HOP_BY_HOP}
+        account = self.headers.get("APCA-API-KEY-ID") or self.headers.get("Authorization") or "anonymous"
+        status, content, content_type = broker.handle(method, url.path, url.query, headers, body, account)
+        self._send(status, content, content_type)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+
+class RateBroker:
+    def __init__(self, host="localhost", port=0, data_url="https://data.alpaca.markets",
+                 trading_url="https://paper-api.alpaca.markets", rate_limit=180, burst=20, trading_reserve=5,
+                 max_wait=30.0, timeout=10.0, pool_size=16):
+        self.data_url = data_url.rstrip("/")
+        self.trading_url = trading_url.rstrip("/")
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.trading_reserve = min(trading_reserve, burst - 1)
+        self.max_wait = max_wait
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.counters = Counter()
+        self.paths = Counter()
+        self.wait_max = 0.0
+        self.started = time.monotonic()
+        self._buckets = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.broker = self
+        self.host, self.port = self._server.server_address
+        self.url = f"http://{self.host}:{self.port}"
+
+    # ----- accounting -----
+    def count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def bucket(self, account):
+        with self._lock:
+            if account not in self._buckets:
+                self._buckets[account] = TokenBucket(self.rate_limit, self.burst)
+            return self._buckets[account]
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        with self._lock:
+            counters = dict(self.counters)
+            return {
+                "elapsed_s": round(elapsed, 3),
+                "requests": counters.get("requests", 0),
+                "upstream": counters.get("upstream", 0),
+                "upstream_per_min": round(counters.get("upstream", 0) * 60 / elapsed, 1) if elapsed else 0,
+                "coalesced": counters.get("coalesced", 0),
+                "narrowed": counters.get("narrowed", 0),
+                "waited": counters.get("waited", 0),
+                "wait_ms_total": round(counters.get("wait_s", 0.0) * 1000, 1),
+                "wait_ms_max": round(self.wait_max * 1000, 1),
+                "shed": counters.get("shed", 0),
+                "upstream_429": counters.get("upstream_429", 0),
+                "errors": counters.get("errors", 0),
+                "by_path": dict(self.paths),
+            }
+
+    # ----- forwarding -----
+    def normalize(self, path, query):
+        """Query dict with symbols sorted and bar start/end snapped to the bar grid (same bars, shared key)."""
+        if path not in BY_SYMBOL:
+            return query
+        query = dict(query)
+        if "symbols" in query:
+            query["symbols"] = ",".join(sorted(set(s for s in query["symbols"].split(",") if s)))
+        step = _grid_seconds(query.get("timeframe", "")) if path in RANGED else None
+        if step and query.get("start") and query.get("end"):
+            # start and end are inclusive and bars sit on multiples of `step`
+            start = -(-_to_seconds(query["start"]) // step) * step
+            end = _to_seconds(query["end"]) // step * step
+            if start <= end:
+                query["start"], query["end"] = _iso(start), _iso(end)
+        return query
+
+    def forward(self, method, path, query_string, headers, body, account):
+        """(status, body, content type) from upstream, after waiting for a token."""
+        trading = not path.startswith(DATA_PREFIXES)
+        bucket = self.bucket(account)
+        waited = bucket.acquire(reserve=0 if trading else self.trading_reserve, timeout=self.max_wait)
+        if waited is None:
+            self.count("shed")
+            return 429, b'{"message": "too many requests (rate broker queue full)"}', "application/json"
+        if waited > 0.001:
+            with self._lock:
+                self.counters["waited"] += 1
+                self.counters["wait_s"] += waited
+                self.wait_max = max(self.wait_max, waited)
+
+        base = self.trading_url if trading else self.data_url
+        target = base + path + (f"?{query_string}" if query_string else "")
+        self.count("upstream")
+        try:
+            response = self.session.request(method, target, data=body, headers=headers, timeout=self.timeout)
+        except requests.RequestException as error:
+            self.count("errors")
+            return 502, json.dumps({"message": f"rate broker: upstream unreachable ({error})"}).encode(), "application/json"
+        if response.status_code == 429:
+            self.count("upstream_429")
+            bucket.drain(float(response.headers.get("Retry-After") or 1))
+        return response.status_code, response.content, response.headers.get("Content-Type", "application/json")
+
+    def handle(self, method, path, query_string, headers, body, account):
+        with self._lock:
+            self.counters["requests"] += 1
+            self.paths[f"{method} {'/v2/orders/{id}' if path.startswith('/v2/orders/') else path}"] += 1
+        if method != "GET":
+            return self.forward(method, path, query_string, headers, body, account)
+
+        query = self.normalize(path, dict(parse_qsl(query_string, keep_blank_values=True)))
+        if path in BY_SYMBOL:
+            query_string = urlencode(query)
+        key = (account, path, tuple(sorted(query.items())))
+        scope = _scope(account, path, query)
+
+        with self._lock:
+            call = self._inflight.get(key)
+            if call is None and scope is not None:
+                call = next((c for c in self._inflight.values() if c.scope and _covers(c.scope, scope)), None)
+            leader = call is None
+            if leader:
+                call = _Call(key, scope)
+                self._inflight[key] = call
+
+        if leader:
+            try:
+                call.status, call.body, call.content_type = self.forward(method, path, query_string, headers, body, account)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+                call.done.set()
+            return call.status, call.body, call.content_type
+
+        if call.done.wait(self.max_wait + self.timeout) and call.status is not None:
+            if call.key == key:
+                self.count("coalesced")
+                return call.status, call.body, call.content_type
+            narrowed = _narrow(call, scope)
+            if narrowed is not None:
+                self.count("coalesced")
+                self.count("narrowed")
+                return 200, narrowed, "application/json"
+        return self.forward(method, path, query_string, headers, body, account)
+
+    # ----- lifecycle -----
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self.session.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared rate limit and request coalescing for every script's Alpaca calls.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5010)
+    parser.add_argument("--data-url", default="https://data.alpaca.markets")
+    parser.add_argument("--trading-url", default="https://paper-api.alpaca.markets")
+    parser.add_argument("--rate-limit", type=int, default=180, help="requests per minute per API key (Alpaca allows 200)")
+    parser.add_argument("--burst", type=int, default=20, help="most requests sent back to back")
+    parser.add_argument("--trading-reserve", type=int, default=5, help="tokens data requests must leave for orders")
+    parser.add_argument("--max-wait", type=float, default=30.0, help="seconds a request may queue before a 429")
+    args = parser.parse_args()
+
+    broker = RateBroker(args.host, args.port, args.data_url, args.trading_url, args.rate_limit, args.burst,
+                        args.trading_reserve, args.max_wait)
+    print(f"🚦 Rate broker on {broker.url} -> data {broker.data_url} | trading {broker.trading_url} "
+          f"(export ALPACA_API_URL={broker.url})")
+    try:
+        broker._server.serve_forever()
+    except KeyboardInterrupt:
+        broker.stop()
+        print(f"📊 {json.dumps(broker.stats(), indent=2)}")
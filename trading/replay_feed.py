@@ -0,0 +1,88 @@
+"""Local stand-in for Alpaca's market data websocket that replays saved bars.
+
+    python -m trading.replay_feed "Historical Files/price_bars_*.csv" --port 8765 --interval 0.05
+
+Then point a StockDataStream (or `strat-run-multi.py --stream --stream-url
+ws://localhost:8765`) at it. It speaks the same msgpack protocol as
+wss://stream.data.alpaca.markets: connected -> auth -> subscribe, then one
+frame per minute with every subscribed symbol's bar. Each bar carries an
+extra "st" field (send time, epoch ns) so the client can measure latency.
+"""
+import argparse
+import asyncio
+import glob
+import time
+
+import msgpack
+import pandas as pd
+import websockets
+
+
+def load_bars(patterns):
+    """Read price_bars_*.csv files into per-minute groups of raw stream bars."""
+    paths = sorted(p for pattern in patterns for p in glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"no bar files match {patterns}")
+    df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    df = df.drop_duplicates(['symbol', 'timestamp']).sort_values(['timestamp', 'symbol'])
+
+    groups = []
+    for ts, group in df.groupby('timestamp', sort=True):
+        t = msgpack.Timestamp.from_unix_nano(ts.value)
+        groups.append([
+            {"T": "b", "S": row.symbol, "t": t, "o": row.open, "h": row.high, "l": row.low,
+             "c": row.close, "v": row.volume, "n": row.trade_count, "vw": row.vwap}
+            for row in group.itertuples(index=False)
+        ])
+    return groups
+
+
+async def _session(ws, groups, interval):
+    await ws.send(msgpack.packb([{"T": "success", "msg": "connected"}]))
+
+    auth = msgpack.unpackb(await ws.recv())
+    if auth.get("action") != "auth":
+        await ws.send(msgpack.packb([{"T": "error", "code": 401, "msg": "not authenticated"}]))
+        return
+    await ws.send(msgpack.packb([{"T": "success", "msg": "authenticated"}]))
+
+    sub = msgpack.unpackb(await ws.recv())
+    symbols = set(sub.get("bars", []))
+    await ws.send(msgpack.packb([{"T": "subscription", "trades": [], "quotes": [], "bars": sorted(symbols)}]))
+
+    wildcard = "*" in symbols
+    sent = 0
+    for group in groups:
+        msgs = [bar for bar in group if wildcard or bar["S"] in symbols]
+        if not msgs:
+            continue
+        stamp = time.time_ns()
+        for bar in msgs:
+            bar["st"] = stamp
+        await ws.send(msgpack.packb(msgs))
+        sent += len(msgs)
+        await asyncio.sleep(interval)
+
+    print(f"📤 Replay finished: {sent} bars sent")
+    await ws.wait_closed()
+
+
+async def serve(groups, host="localhost", port=8765, interval=0.0):
+    async with websockets.serve(lambda ws: _session(ws, groups, interval), host, port):
+        print(f"📡 Replaying {sum(len(g) for g in groups)} bars on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay saved bars over an Alpaca-compatible websocket.")
+    parser.add_argument("files", nargs="+", help="price_bars_*.csv files or glob patterns")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between bar minutes (0 = as fast as possible)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(load_bars(args.files), args.host, args.port, args.interval))
+    except KeyboardInterrupt:
+        pass
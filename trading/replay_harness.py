@@ -0,0 +1,378 @@
+"""Replay recorded minute bars through an unchanged strategy script, faster than real time.
+
+    python -m trading.replay_harness universal-strat-run.py --bars "Historical Files/price_bars_*.csv" --input SPY
+    python -m trading.replay_harness pair-trading/pairtrading-test.py --store SPY QQQ --date 2025-06-25
+    python -m trading.replay_harness scalp-strategies/scalp-SPY.py --store SPY --date 2025-06-25 --until 16:00
+
+The script runs as-is. Only its own `time` / `datetime` imports are
+swapped for a simulated clock (sleeping just advances it). The alpaca
+data/trading clients and the email notifier are replaced with fakes
+that serve the recorded bars and fill market orders at the last closed
+bar. Each replay runs in a fresh temporary directory, so no state file
+from an earlier run is restored (snapshot restore is disabled anyway)
+and no CSV is appended to; the CSVs it wrote then replace those of the
+same name in `--out`, so two replays of the same day can be diffed.
+"""
+import argparse
+import builtins
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time as real_time
+import types
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime as real_datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from alpaca.data.timeframe import TimeFrame
+
+TIMEZONE = pytz.timezone("America/New_York")
+
+
+class ReplayFinished(BaseException):
+    """Raised from sleep once the clock passes `until`; a BaseException so the scripts' `except Exception` lets it through."""
+
+
+# =============================================
+# ⏱️ Simulated clock
+# =============================================
+class SimClock:
+    def __init__(self, start, until=None):
+        self.now = pd.Timestamp(start).tz_convert("UTC").to_pydatetime()
+        self.until = None if until is None else pd.Timestamp(until).tz_convert("UTC").to_pydatetime()
+        self.slept = 0.0
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += timedelta(seconds=seconds)
+            self.slept += seconds
+        if self.until is not None and self.now >= self.until:
+            raise ReplayFinished()
+
+    def time(self):
+        return self.now.timestamp()
+
+    def time_module(self):
+        module = types.ModuleType("time")
+        module.__dict__.update(real_time.__dict__)
+        module.sleep = self.sleep
+        module.time = self.time
+        module.monotonic = self.time
+        module.time_ns = lambda: int(self.time() * 1e9)
+        return module
+
+    def datetime_class(self):
+        clock = self
+
+        class SimDatetime(real_datetime):
+            @classmethod
+            def now(cls, tz=None):
+                if tz is None:
+                    return clock.now.astimezone().replace(tzinfo=None)
+                return clock.now.astimezone(tz)
+
+            @classmethod
+            def utcnow(cls):
+                return clock.now.replace(tzinfo=None)
+
+            @classmethod
+            def today(cls):
+                return cls.now()
+
+        return SimDatetime
+
+    def datetime_module(self):
+        import datetime as datetime_module
+        module = types.ModuleType("datetime")
+        module.__dict__.update(datetime_module.__dict__)
+        module.datetime = self.datetime_class()
+        return module
+
+
+# =============================================
+# 📦 Recorded bars
+# =============================================
+class _Bar:
+    """Just enough of alpaca's `Bar` for the scripts: attributes + model_dump()."""
+    __slots__ = ("symbol", "timestamp", "open", "high", "low", "close", "volume", "trade_count", "vwap")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def model_dump(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def load_bar_files(patterns):
+    """price_bars_*.csv files -> {symbol: DataFrame}."""
+    paths = sorted(p for pattern in patterns for p in glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"no bar files match {patterns}")
+    df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    df = df.drop_duplicates(['symbol', 'timestamp']).sort_values('timestamp')
+    return {symbol: group.reset_index(drop=True) for symbol, group in df.groupby('symbol')}
+
+
+def load_store_bars(symbols, start, end, root=None):
+    """Bars for `symbols` from the local bar store (read-only, no network)."""
+    from trading.bar_store import BarStore, DEFAULT_ROOT
+    store = BarStore(root=root or DEFAULT_ROOT)
+    return {symbol: store.frame(symbol, TimeFrame.Minute, start, end) for symbol in symbols}
+
+
+class FakeDataClient:
+    """Stands in for Stock/CryptoHistoricalDataClient; only closed bars up to the clock are visible."""
+
+    def __init__(self, clock, frames, bar_interval=timedelta(minutes=1)):
+        self.clock = clock
+        self.interval_ns = int(bar_interval.total_seconds() * 1e9)
+        self.requests = 0
+        self._times = {}
+        self._bars = {}
+        for symbol, df in frames.items():
+            rows = df.to_dict('records')
+            self._times[symbol] = pd.DatetimeIndex(pd.to_datetime(df['timestamp'], utc=True)).as_unit("ns").asi8
+            self._bars[symbol] = [_Bar(**{**row, "symbol": symbol, "timestamp": pd.Timestamp(row['timestamp']).to_pydatetime()}) for row in rows]
+
+    def _get_bars(self, request):
+        self.requests += 1
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        visible_until = int(self.clock.time() * 1e9) - self.interval_ns
+        start_ns = pd.Timestamp(request.start).value if request.start else None
+        end_ns = min(pd.Timestamp(request.end).value, visible_until) if request.end else visible_until
+
+        data = {}
+        for symbol in symbols:
+            times = self._times.get(symbol)
+            if times is None:
+                continue
+            lo = 0 if start_ns is None else np.searchsorted(times, start_ns, side="left")
+            hi = np.searchsorted(times, end_ns, side="right")
+            if request.limit:
+                hi = min(hi, lo + request.limit)
+            if hi > lo:
+                data[symbol] = self._bars[symbol][lo:hi]
+        return types.SimpleNamespace(data=data)
+
+    def get_stock_bars(self, request):
+        return self._get_bars(request)
+
+    def latest_close(self, symbol):
+        times = self._times.get(symbol)
+        if times is None:
+            return None
+        i = np.searchsorted(times, int(self.clock.time() * 1e9) - self.interval_ns, side="right") - 1
+        return self._bars[symbol][i].close if i >= 0 else None
+
+    def _latest(self, request):
+        """Latest trade/quote stand-in: the last closed bar's close, stamped at that bar's end."""
+        self.requests += 1
+        symbols = request.symbol_or_symbols
+        symbols = [symbols] if isinstance(symbols, str) else symbols
+        data = {}
+        visible_until = int(self.clock.time() * 1e9) - self.interval_ns
+        for symbol in symbols:
+            times = self._times.get(symbol)
+            i = -1 if times is None else np.searchsorted(times, visible_until, side="right") - 1
+            if i >= 0:
+                price = self._bars[symbol][i].close
+                stamp = pd.Timestamp(times[i] + self.interval_ns, tz="UTC").to_pydatetime()
+                data[symbol] = types.SimpleNamespace(symbol=symbol, timestamp=stamp, price=price,
+                                                     bid_price=price, ask_price=price)
+        return data
+
+    def get_stock_latest_trade(self, request):
+        return self._latest(request)
+
+    def get_stock_latest_quote(self, request):
+        return self._latest(request)
+
+
+class FakeCryptoDataClient(FakeDataClient):
+    def get_crypto_bars(self, request):
+        return self._get_bars(request)
+
+    def get_crypto_latest_trade(self, request):
+        return self._latest(request)
+
+    def get_crypto_latest_quote(self, request):
+        return self._latest(request)
+
+
+class FakeTradingClient:
+    """Fills every market order immediately at the last closed bar's close."""
+
+    def __init__(self, clock, data_client):
+        self.clock = clock
+        self.data_client = data_client
+        self.orders = []
+        self.positions = {}
+
+    def submit_order(self, order_data):
+        side = getattr(order_data.side, "value", order_data.side)
+        qty = float(order_data.qty)
+        price = self.data_client.latest_close(order_data.symbol)
+        order = types.SimpleNamespace(
+            id=f"replay-{len(self.orders) + 1}", symbol=order_data.symbol, qty=qty, side=side,
+            filled_avg_price=price, submitted_at=self.clock.now, status="filled"
+        )
+        self.orders.append(order)
+        self.positions[order.symbol] = self.positions.get(order.symbol, 0.0) + (qty if side == "buy" else -qty)
+        return order
+
+    def get_all_positions(self):
+        return [types.SimpleNamespace(symbol=symbol, qty=qty) for symbol, qty in self.positions.items() if qty]
+
+
+class FakeNotifier:
+    def __init__(self, *args, **kwargs):
+        self.messages = []
+
+    def send(self, subject, body):
+        self.messages.append((subject, body))
+
+    def close(self, timeout=None):
+        pass
+
+
+# =============================================
+# 🎬 Run a script against the recorded session
+# =============================================
+@contextmanager
+def _patched(targets):
+    saved = []
+    try:
+        for module, name, value in targets:
+            saved.append((module, name, getattr(module, name)))
+            setattr(module, name, value)
+        yield
+    finally:
+        for module, name, value in reversed(saved):
+            setattr(module, name, value)
+
+
+def replay(script, frames, start, until=None, inputs=(), out_dir=".", crypto=False, quiet=False):
+    """Run `script` from `start` (sim time) until it exits or the clock passes `until`."""
+    import alpaca.data.historical
+    import alpaca.trading.client
+    import trading.audit_log
+    import trading.notifier
+    import trading.price_feed
+    import trading.scheduler
+    import trading.snapshot
+
+    clock = SimClock(start, until)
+    data_client = (FakeCryptoDataClient if crypto else FakeDataClient)(clock, frames)
+    trading_client = FakeTradingClient(clock, data_client)
+    notifiers = []
+
+    def make_notifier(*args, **kwargs):
+        notifiers.append(FakeNotifier())
+        return notifiers[-1]
+
+    sim_time, sim_datetime = clock.time_module(), clock.datetime_module()
+    shims = {"time": sim_time, "datetime": sim_datetime}
+    real_import = builtins.__import__
+
+    def script_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in shims:
+            return shims[name]
+        return real_import(name, globals, locals, fromlist, level)
+
+    answers = iter(inputs)
+    script_builtins = dict(builtins.__dict__, __import__=script_import, input=lambda prompt="": next(answers))
+
+    targets = [
+        (alpaca.data.historical, "StockHistoricalDataClient", lambda *a, **k: data_client),
+        (alpaca.data.historical, "CryptoHistoricalDataClient", lambda *a, **k: data_client),
+        (alpaca.trading.client, "TradingClient", lambda *a, **k: trading_client),
+        (trading.notifier, "EmailNotifier", make_notifier),
+        (trading.scheduler, "time", sim_time),
+        (trading.price_feed, "time", sim_time),
+        (trading.audit_log, "time", sim_time),
+        (trading.audit_log, "datetime", sim_datetime.datetime),
+        (trading.snapshot.StrategySnapshot, "load", lambda self: {}),  # always a cold start
+    ]
+
+    script = os.path.abspath(script)
+    with open(script) as f:
+        code = compile(f.read(), script, "exec")
+    script_globals = {"__name__": "__main__", "__file__": script, "__builtins__": script_builtins}
+
+    work_dir = tempfile.mkdtemp(prefix="replay_")
+    cwd, argv = os.getcwd(), sys.argv
+    started = real_time.perf_counter()
+    try:
+        os.chdir(work_dir)
+        sys.argv = [script]
+        with _patched(targets), redirect_stdout(open(os.devnull, "w") if quiet else sys.stdout):
+            try:
+                exec(code, script_globals)
+            except (ReplayFinished, SystemExit):
+                pass
+            finally:
+                # Flush audit writers now rather than at interpreter exit
+                for value in list(script_globals.values()):
+                    for writer in (value.values() if isinstance(value, dict) else [value]):
+                        if isinstance(writer, (trading.audit_log.AuditWriter, trading.scheduler.BarScheduler)):
+                            writer.close()
+    finally:
+        os.chdir(cwd)
+        sys.argv = argv
+        os.makedirs(out_dir, exist_ok=True)
+        outputs = sorted(name for name in os.listdir(work_dir) if name.endswith(".csv"))
+        for name in outputs:
+            shutil.move(os.path.join(work_dir, name), os.path.join(out_dir, name))
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return types.SimpleNamespace(
+        wall_seconds=real_time.perf_counter() - started,
+        sim_seconds=(clock.now - pd.Timestamp(start).tz_convert("UTC").to_pydatetime()).total_seconds(),
+        orders=trading_client.orders,
+        emails=[message for notifier in notifiers for message in notifier.messages],
+        data_requests=data_client.requests,
+        outputs=[os.path.join(out_dir, name) for name in outputs],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded bars through a strategy script on a simulated clock.")
+    parser.add_argument("script")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--bars", nargs="+", help="price_bars_*.csv files or glob patterns")
+    source.add_argument("--store", nargs="+", metavar="SYMBOL", help="read these symbols from the local bar store")
+    parser.add_argument("--date", help="session date (NY), default: first bar's date")
+    parser.add_argument("--start", default="09:30", help="NY time the clock starts at")
+    parser.add_argument("--until", default=None, help="NY time to stop scripts that never exit on their own")
+    parser.add_argument("--input", action="append", default=[], help="answers for input() prompts, in order")
+    parser.add_argument("--out", default="replay_out", help="directory the audit CSVs are copied to")
+    parser.add_argument("--crypto", action="store_true", help="serve bars through a crypto data client")
+    parser.add_argument("--quiet", action="store_true", help="hide the script's console output")
+    args = parser.parse_args()
+
+    if args.bars:
+        frames = load_bar_files(args.bars)
+        first = min(df['timestamp'].iloc[0] for df in frames.values())
+        session = args.date or first.tz_convert(TIMEZONE).strftime("%Y-%m-%d")
+    else:
+        if not args.date:
+            parser.error("--store needs --date")
+        session = args.date
+        day = TIMEZONE.localize(real_datetime.strptime(session, "%Y-%m-%d"))
+        frames = load_store_bars(args.store, day - timedelta(days=1), day + timedelta(days=1))
+
+    start = TIMEZONE.localize(real_datetime.strptime(f"{session} {args.start}", "%Y-%m-%d %H:%M"))
+    until = TIMEZONE.localize(real_datetime.strptime(f"{session} {args.until}", "%Y-%m-%d %H:%M")) if args.until else None
+
+    result = replay(args.script, frames, start, until=until, inputs=args.input, out_dir=args.out,
+                    crypto=args.crypto, quiet=args.quiet)
+    print(f"⏩ Replayed {result.sim_seconds / 3600:.2f}h of {os.path.basename(args.script)} in {result.wall_seconds:.2f}s | "
+          f"{result.data_requests} data requests | {len(result.orders)} orders | {len(result.emails)} emails | output in {args.out}/")
@@ -0,0 +1,193 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from trading.bar_decoder import BAR_COLUMNS
+from trading.incremental import TimeframeIndicators
+
+# Bucket length of each supported timeframe; "1d" is a New York calendar day
+TIMEFRAMES = {
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+}
+DAY_TIMEZONE = "America/New_York"
+# Minute bars to replay before trading, enough for MACD(26/12/9) on that timeframe across nights/weekends
+WARM_UP = {
+    "5m": pd.Timedelta(days=4),
+    "15m": pd.Timedelta(days=7),
+    "1h": pd.Timedelta(days=21),
+    "1d": pd.Timedelta(days=75),
+}
+_MINUTE_NS = 60 * 10**9
+
+
+def _ns(timestamp):
+    return timestamp if isinstance(timestamp, int) else pd.Timestamp(timestamp).value
+
+
+# =============================================
+# 🕰️ Higher-timeframe bars from 1-minute bars
+# =============================================
+class BarResampler:
+    """Builds one timeframe's bars (5m / 15m / 1h / 1d) from 1-minute bars, O(1) per minute.
+
+    Intraday buckets start on multiples of the timeframe in UTC, the same
+    boundaries Alpaca's own 5Min/15Min/Hour bars use; "1d" buckets are New
+    York calendar days. open/high/low/close/volume/trade_count aggregate as
+    usual and vwap is the volume-weighted mean of the minute vwaps.
+
+    `update(bar)` returns the bars it completed: a bucket closes as soon as
+    its last minute arrives, or when a minute from a later bucket shows up
+    (a gap, or the overnight jump for "1d"). `forming` is the bucket still
+    being built. Minutes at or before the last one seen are ignored, so
+    overlapping fetches can be fed twice.
+    """
+
+    def __init__(self, timeframe="15m"):
+        if timeframe not in TIMEFRAMES:
+            raise ValueError(f"unknown timeframe {timeframe!r} (one of {', '.join(TIMEFRAMES)})")
+        self.timeframe = timeframe
+        self._interval_ns = TIMEFRAMES[timeframe].value
+        self._last_ns = None
+        self._start_ns = None
+        self._end_ns = None
+        self._bar = None  # forming bucket
+        self._pv = 0.0    # sum(vwap * volume) of the forming bucket
+
+    def _bucket(self, ts_ns):
+        """[start, end) in epoch ns of the bucket holding `ts_ns`."""
+        if self.timeframe != "1d":
+            start = ts_ns - ts_ns % self._interval_ns
+            return start, start + self._interval_ns
+        day = pd.Timestamp(ts_ns, tz="UTC").tz_convert(DAY_TIMEZONE).normalize()
+        return day.value, (day + pd.DateOffset(days=1)).value  # calendar day: 23h / 25h on DST changes
+
+    def _close(self):
+        bar = self._bar
+        bar["vwap"] = self._pv / bar["volume"] if bar["volume"] else bar["close"]
+        self._bar = None
+        return bar
+
+    def update(self, bar):
+        ts_ns = _ns(bar["timestamp"])
+        if self._last_ns is not None and ts_ns <= self._last_ns:
+            return []
+        self._last_ns = ts_ns
+
+        completed = []
+        if self._bar is not None and ts_ns >= self._end_ns:
+            completed.append(self._close())
+        if self._bar is None:
+            self._start_ns, self._end_ns = self._bucket(ts_ns)
+            self._bar = {"symbol": bar.get("symbol"), "timestamp": pd.Timestamp(self._start_ns, tz="UTC"),
+                         "open": bar["open"], "high": bar["high"], "low": bar["low"], "close": bar["close"],
+                         "volume": 0.0, "trade_count": 0.0, "vwap": math.nan}
+            self._pv = 0.0
+        else:
+            forming = self._bar
+            forming["high"] = max(forming["high"], bar["high"])
+            forming["low"] = min(forming["low"], bar["low"])
+            forming["close"] = bar["close"]
+        volume = bar.get("volume") or 0.0
+        self._bar["volume"] += volume
+        self._bar["trade_count"] += bar.get("trade_count") or 0.0
+        vwap = bar.get("vwap")
+        self._pv += (vwap if vwap is not None and not math.isnan(vwap) else bar["close"]) * volume
+
+        if ts_ns + _MINUTE_NS >= self._end_ns:
+            completed.append(self._close())
+        return completed
+
+    @property
+    def forming(self):
+        """The bucket still being built (vwap so far), or None."""
+        if self._bar is None:
+            return None
+        volume = self._bar["volume"]
+        return dict(self._bar, vwap=self._pv / volume if volume else self._bar["close"])
+
+    def state(self):
+        forming = None
+        if self._bar is not None:
+            forming = dict(self._bar, timestamp=self._start_ns)
+        return {"last": self._last_ns, "start": self._start_ns, "end": self._end_ns,
+                "forming": forming, "pv": self._pv}
+
+    def load_state(self, state):
+        self._last_ns = state["last"]
+        self._start_ns = state["start"]
+        self._end_ns = state["end"]
+        forming = state["forming"]
+        self._bar = None if forming is None else dict(forming, timestamp=pd.Timestamp(forming["timestamp"], tz="UTC"))
+        self._pv = state["pv"]
+
+
+# =============================================
+# 🧭 Multi-timeframe indicators
+# =============================================
+class MultiTimeframe:
+    """Resamplers plus one indicator bundle per timeframe, all fed from the 1-minute bars.
+
+    `update(minute_bar)` costs O(1) per timeframe: the minute goes into each
+    resampler, and only a completed bucket updates that timeframe's
+    indicators. `latest[timeframe]` holds the indicator values of the last
+    completed bar (None until the first one), so a strategy can check e.g.
+    `latest["15m"]["macd"] > latest["15m"]["macd_signal"]` without another
+    bars request. `indicators` is the per-timeframe factory (default
+    `TimeframeIndicators()`).
+    """
+
+    def __init__(self, timeframes=("5m", "15m", "1h", "1d"), indicators=TimeframeIndicators):
+        self.timeframes = list(timeframes)
+        self.resamplers = {timeframe: BarResampler(timeframe) for timeframe in self.timeframes}
+        self.indicators = {timeframe: indicators() for timeframe in self.timeframes}
+        self.latest = {timeframe: None for timeframe in self.timeframes}
+
+    def update(self, bar):
+        """Feed one minute bar; returns {timeframe: indicator values} for the buckets it completed."""
+        updated = {}
+        bar = dict(bar, timestamp=_ns(bar["timestamp"]))  # converted once for every resampler
+        for timeframe, resampler in self.resamplers.items():
+            for completed in resampler.update(bar):
+                self.latest[timeframe] = updated[timeframe] = self.indicators[timeframe].update(completed)
+        return updated
+
+    def warm_up(self, bars, symbol=None):
+        """Feed stored minute bars, e.g. `BarStore.read()` columns or `bars(...)` output, oldest first."""
+        timestamps = np.asarray(bars["timestamp"]).view(np.int64)
+        columns = [np.asarray(bars[column], dtype=float).tolist() for column in BAR_COLUMNS]
+        for i, ts in enumerate(timestamps.tolist()):
+            row = {column: values[i] for column, values in zip(BAR_COLUMNS, columns)}
+            row["symbol"] = symbol
+            row["timestamp"] = ts
+            self.update(row)
+
+    def confirms(self, timeframe, side):
+        """True if `timeframe`'s MACD agrees with a "BUY" (macd > signal) or "SELL" (macd < signal)."""
+        latest = self.latest[timeframe]
+        if latest is None:
+            return False
+        if side == "BUY":
+            return latest["macd"] > latest["macd_signal"]
+        return latest["macd"] < latest["macd_signal"]
+
+    def state(self):
+        latest = {
+            timeframe: None if values is None else dict(values, timestamp=pd.Timestamp(values["timestamp"]).isoformat())
+            for timeframe, values in self.latest.items()
+        }
+        return {
+            "resamplers": {timeframe: resampler.state() for timeframe, resampler in self.resamplers.items()},
+            "indicators": {timeframe: bundle.state() for timeframe, bundle in self.indicators.items()},
+            "latest": latest,
+        }
+
+    def load_state(self, state):
+        for timeframe in self.timeframes:
+            self.resamplers[timeframe].load_state(state["resamplers"][timeframe])
+            self.indicators[timeframe].load_state(state["indicators"][timeframe])
+            values = state["latest"][timeframe]
+            self.latest[timeframe] = None if values is None else dict(values, timestamp=pd.Timestamp(values["timestamp"]))
@@ -0,0 +1,199 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from alpaca.data.requests import StockBarsRequest
+from alpaca.data.timeframe import TimeFrame
+
+from trading.bar_decoder import BAR_COLUMNS, fetch_bars
+
+ALERT_COLUMNS = ["timestamp", "symbol", "zone", "rsi", "close"]
+_CLOSE = BAR_COLUMNS.index("close")
+_ZONES = {1: "overbought", -1: "oversold"}
+
+
+# =============================================
+# 📐 RSI of a whole universe (symbols x bars)
+# =============================================
+class UniverseRSI:
+    """Wilder RSI of many symbols at once, with overbought/oversold hysteresis.
+
+    Same values as `ta.momentum.RSIIndicator` on each symbol's own bars.
+    The state is one vector per quantity (smoothed gain/loss, last close,
+    bar count, zone), so `update(closes)` runs over a (symbols, bars) block
+    one column at a time with every symbol in the same NumPy step. Rows are
+    right-aligned: a symbol with fewer new bars has NaN on the left, and a
+    NaN is simply not a bar for that symbol.
+
+    Zones use hysteresis: a symbol enters "overbought" at RSI >= `upper`
+    and only leaves (re-arming the alert) once it falls below
+    `upper - band`; "oversold" mirrors that at `lower`. Entering a zone is
+    an alert; leaving one is not.
+    """
+
+    def __init__(self, symbols, window=14, upper=70.0, lower=30.0, band=5.0):
+        self.symbols = list(symbols)
+        self.window = window
+        self.upper = upper
+        self.lower = lower
+        self.band = band
+        n = len(self.symbols)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.zone = np.zeros(n, dtype=np.int8)  # 1 overbought, -1 oversold, 0 neutral
+        self._prev_close = np.full(n, np.nan)
+        self._up = np.zeros(n)
+        self._down = np.zeros(n)
+
+    @property
+    def value(self):
+        """Current RSI per symbol (NaN until a symbol has `window` bars)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rsi = np.where(self._down == 0, 100.0, 100.0 - 100.0 / (1.0 + self._up / self._down))
+        return np.where(self.count >= self.window, rsi, np.nan)
+
+    def update(self, closes):
+        """Feed a (symbols, bars) block of new closes; returns the alerts it raised, oldest first.
+
+        Each alert is (row, column, zone, rsi) with zone 1 (overbought) or
+        -1 (oversold).
+        """
+        closes = np.asarray(closes, dtype=float).reshape(len(self.symbols), -1)
+        alerts = []
+        for column in range(closes.shape[1]):
+            close = closes[:, column]
+            active = ~np.isnan(close)
+            if not active.any():
+                continue
+            started = active & (self.count > 0)
+            diff = np.where(started, close - self._prev_close, 0.0)
+            gain, loss = np.maximum(diff, 0.0), np.maximum(-diff, 0.0)
+            self._up = np.where(started, self._up + (gain - self._up) / self.window, np.where(active, gain, self._up))
+            self._down = np.where(started, self._down + (loss - self._down) / self.window,
+                                  np.where(active, loss, self._down))
+            self._prev_close = np.where(active, close, self._prev_close)
+            self.count += active
+
+            rsi = self.value
+            ready = active & (self.count >= self.window)
+            leave = ready & (((self.zone == 1) & (rsi < self.upper - self.band))
+                             | ((self.zone == -1) & (rsi > self.lower + self.band)))
+            enter_high = ready & (self.zone != 1) & (rsi >= self.upper)
+            enter_low = ready & (self.zone != -1) & (rsi <= self.lower)
+            self.zone[leave] = 0
+            self.zone[enter_high] = 1
+            self.zone[enter_low] = -1
+            for row in np.flatnonzero(enter_high | enter_low).tolist():
+                alerts.append((row, column, int(self.zone[row]), float(rsi[row])))
+        return alerts
+
+
+def right_align(series, n_symbols):
+    """{row: (timestamps, closes)} -> (closes, timestamps) of shape (n_symbols, longest), padded on the left."""
+    width = max((len(closes) for _, closes in series.values()), default=0)
+    closes = np.full((n_symbols, width), np.nan)
+    timestamps = np.zeros((n_symbols, width), dtype=np.int64)
+    for row, (times, values) in series.items():
+        if len(values):
+            closes[row, width - len(values):] = values
+            timestamps[row, width - len(times):] = times
+    return closes, timestamps
+
+
+# =============================================
+# 🔎 Batched universe scanner
+# =============================================
+class RSIScanner:
+    """Headless RSI alerts for a universe of thousands of symbols.
+
+    Every `scan()` asks for the bars each symbol is missing with one
+    multi-symbol bars request per `batch_size` symbols (run on a few
+    threads), keeps only the closed bars newer than each symbol's last one,
+    and feeds them to a `UniverseRSI` in a single block. The first scan
+    warms up from `warmup_bars` bars of history without raising alerts.
+    """
+
+    def __init__(self, data_client, symbols, timeframe=TimeFrame.Minute, bar_interval=pd.Timedelta(minutes=1),
+                 window=14, upper=70.0, lower=30.0, band=5.0, batch_size=200, warmup_bars=150, feed="iex",
+                 workers=4):
+        self.data_client = data_client
+        self.symbols = list(dict.fromkeys(symbols))
+        self.timeframe = timeframe
+        self.bar_interval = pd.Timedelta(bar_interval)
+        self.batch_size = batch_size
+        self.warmup_bars = warmup_bars
+        self.feed = feed
+        self.workers = workers
+        self.rsi = UniverseRSI(self.symbols, window=window, upper=upper, lower=lower, band=band)
+        self.last_timestamp = np.full(len(self.symbols), -1, dtype=np.int64)  # epoch ns, -1 = none yet
+        self.latest_close = np.full(len(self.symbols), np.nan)
+        self._fetched_until = {}  # batch -> end of its last request
+        self.requests = 0
+        self.scans = 0
+        self.timings = {}
+
+    def _batches(self):
+        for start in range(0, len(self.symbols), self.batch_size):
+            yield start, self.symbols[start:start + self.batch_size]
+
+    def _fetch(self, first, batch, start, end):
+        request = StockBarsRequest(symbol_or_symbols=batch, timeframe=self.timeframe,
+                                   start=start.isoformat(), end=end.isoformat(), feed=self.feed)
+        return first, fetch_bars(self.data_client, request)
+
+    def scan(self, now=None):
+        """Fetch and evaluate every symbol's new bars; returns alert dicts (none on the warm-up scan)."""
+        now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+        # Only closed bars: the request stops just before the current bar's start
+        end = now.floor(self.bar_interval) - pd.Timedelta(seconds=1)
+        lookback = now.floor(self.bar_interval) - self.bar_interval * self.warmup_bars
+
+        started = time.perf_counter()
+        jobs = []
+        for first, batch in self._batches():
+            # From one bar before the last request's end (late-published bars), never past the warm-up range
+            fetched_until = self._fetched_until.get(first)
+            start = lookback if fetched_until is None else max(lookback, fetched_until - self.bar_interval)
+            if start <= end:
+                jobs.append((first, batch, start, end))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            responses = list(pool.map(lambda job: self._fetch(*job), jobs))
+        self.requests += len(jobs)
+        for first, _, _, _ in jobs:
+            self._fetched_until[first] = end
+        fetched = time.perf_counter()
+
+        series = {}
+        for first, data in responses:
+            for offset, symbol in enumerate(self.symbols[first:first + self.batch_size]):
+                if symbol not in data:
+                    continue
+                row = first + offset
+                times, values = data[symbol]
+                new = np.asarray(times) > self.last_timestamp[row]
+                if new.any():
+                    series[row] = (np.asarray(times)[new], values[_CLOSE][new])
+                    self.last_timestamp[row] = times[new][-1]
+                    self.latest_close[row] = values[_CLOSE][new][-1]
+        closes, timestamps = right_align(series, len(self.symbols))
+        raised = self.rsi.update(closes)
+        computed = time.perf_counter()
+
+        warm = self.scans > 0
+        self.scans += 1
+        self.timings = {"fetch_s": fetched - started, "compute_ms": (computed - fetched) * 1000,
+                        "requests": len(jobs), "bars": int(np.isfinite(closes).sum())}
+        if not warm:
+            return []
+        return [
+            {"timestamp": pd.Timestamp(int(timestamps[row, column]), tz="UTC"), "symbol": self.symbols[row],
+             "zone": _ZONES[zone], "rsi": rsi, "close": float(closes[row, column])}
+            for row, column, zone, rsi in raised
+        ]
+
+    def snapshot(self):
+        """Current RSI / zone / last close of every symbol as a DataFrame, most overbought first."""
+        zone = pd.Series(self.rsi.zone).map({1: "overbought", -1: "oversold", 0: "neutral"})
+        return pd.DataFrame({"symbol": self.symbols, "rsi": self.rsi.value, "zone": zone.to_numpy(),
+                             "close": self.latest_close}).sort_values("rsi", ascending=False, ignore_index=True)
@@ -0,0 +1,111 @@
+import math
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from trading.audit_log import AuditWriter
+
+LATENCY_STAGES = ["data", "decision", "order_ack"]
+LATENCY_COLUMNS = ["tick_time", "bar_timestamp", "symbol", "wake_ms", "data_ms", "decision_ms", "order_ack_ms"]
+
+
+# =============================================
+# ⏲️ Bar-aligned polling scheduler
+# =============================================
+class BarScheduler:
+    """Wakes the polling loop at each bar boundary plus a settle delay.
+
+    `wait()` sleeps to an absolute deadline computed from the wall clock,
+    so the period stays one bar however long fetch/compute/orders took and
+    the loop never drifts across minute boundaries. `is_new_bar()` tells the
+    loop whether there is anything to evaluate, so the same bar is never
+    traded (or audited) twice.
+
+    Each tick, `mark(stage)` stamps data arrival, decision and order ack;
+    `record(bar_timestamp)` turns them into milliseconds since that bar
+    closed and, with `latency_prefix`, appends them to a latency CSV.
+    Loops over several symbols pass `key=symbol` to both, giving one row
+    per symbol that shares the tick's unkeyed marks (e.g. data arrival).
+    """
+
+    def __init__(self, bar_interval=timedelta(minutes=1), settle_seconds=2.0, latency_prefix=None):
+        self.interval = bar_interval.total_seconds()
+        self.settle = settle_seconds
+        self.latency_log = AuditWriter(latency_prefix, LATENCY_COLUMNS) if latency_prefix else None
+
+        self.ticks = 0
+        self.skipped = 0
+        self.latencies_ms = {stage: deque(maxlen=100_000) for stage in LATENCY_STAGES}
+        self._last_bar = {}
+        self._wake_ms = None
+        self._tick_time = None
+        self._marks = {}
+
+    def next_wakeup(self, now=None):
+        """Epoch seconds of the next bar boundary + settle delay after `now`."""
+        now = time.time() if now is None else now
+        return (math.floor((now - self.settle) / self.interval) + 1) * self.interval + self.settle
+
+    def wait(self):
+        target = self.next_wakeup()
+        while True:
+            remaining = target - time.time()
+            if remaining <= 0:
+                break
+            time.sleep(remaining)
+        now = time.time()
+        self.ticks += 1
+        self._wake_ms = (now - target) * 1000
+        self._tick_time = datetime.fromtimestamp(now, timezone.utc)
+        self._marks = {}
+
+    def is_new_bar(self, timestamp, key=None):
+        """True the first time a bar timestamp is seen (per `key`, e.g. symbol)."""
+        timestamp = pd.Timestamp(timestamp)
+        last = self._last_bar.get(key)
+        if last is not None and timestamp <= last:
+            self.skipped += 1
+            return False
+        self._last_bar[key] = timestamp
+        return True
+
+    def mark(self, stage, key=None):
+        self._marks.setdefault(key, {})[stage] = time.time()
+
+    def record(self, bar_timestamp, key=None):
+        bar_close = pd.Timestamp(bar_timestamp).timestamp() + self.interval
+        marks = dict(self._marks.get(None, {}))
+        if key is not None:
+            marks.update(self._marks.pop(key, {}))
+        row = {
+            "tick_time": self._tick_time,
+            "bar_timestamp": bar_timestamp,
+            "symbol": key,
+            "wake_ms": None if self._wake_ms is None else round(self._wake_ms, 3),
+        }
+        for stage in LATENCY_STAGES:
+            stamp = marks.get(stage)
+            delay = None if stamp is None else round((stamp - bar_close) * 1000, 3)
+            row[f"{stage}_ms"] = delay
+            if delay is not None:
+                self.latencies_ms[stage].append(delay)
+        if self.latency_log is not None:
+            self.latency_log.append(row)
+        if key is None:
+            self._marks = {}
+        return row
+
+    def latency_summary(self):
+        parts = [f"{self.ticks} ticks, {self.skipped} stale bars skipped"]
+        for stage in LATENCY_STAGES:
+            if self.latencies_ms[stage]:
+                lat = np.fromiter(self.latencies_ms[stage], dtype=float)
+                parts.append(f"{stage} p50 {np.percentile(lat, 50):.0f}ms p99 {np.percentile(lat, 99):.0f}ms")
+        return " | ".join(parts)
+
+    def close(self):
+        if self.latency_log is not None:
+            self.latency_log.close()
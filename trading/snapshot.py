@@ -0,0 +1,114 @@
+import json
+import os
+
+import pandas as pd
+
+
+# =============================================
+# 💾 Strategy snapshots (warm restart)
+# =============================================
+class StrategySnapshot:
+    """Keeps a compact JSON snapshot of one or more `SymbolStrategy` objects on disk.
+
+    `save()` is called once per evaluated bar but only writes every
+    `every` bars, or right away when any symbol's position flags changed
+    (`flush()` writes what is still pending, e.g. on exit). The file is fsynced
+    and then swapped in with os.replace, so a crash leaves either the
+    previous snapshot or the new one, never half of each. It holds the
+    position flags, the last bar and every incremental indicator's state;
+    bars after an older snapshot are simply fetched again on restore.
+
+    `restore()` runs at startup. If the snapshot's last bar is still inside
+    the lookback window the indicators pick up where they stopped and the
+    next `fetch_new_bars` only asks for the bars missed while the process
+    was down. An older snapshot (or one taken with different parameters)
+    only brings back the position flags. Either way the flags are then
+    checked against the broker's open positions, which win any disagreement.
+    """
+
+    def __init__(self, path, strategies, every=10):
+        self.path = path
+        self.strategies = strategies  # symbol -> SymbolStrategy
+        self.every = every
+        self.saves = 0
+        self._pending = 0       # save() calls since the last write
+        self._positions = None  # position flags at the last write
+
+    def _position_flags(self):
+        return {
+            symbol: (strategy.in_position, strategy.entry_price, strategy.highest_price_since_entry,
+                     strategy.trailing_stop_trigger)
+            for symbol, strategy in self.strategies.items()
+        }
+
+    def save(self, force=False):
+        """Write the snapshot if `every` bars went by, a position changed, or `force`; returns True if written."""
+        self._pending += 1
+        positions = self._position_flags()
+        if not force and self._pending < self.every and positions == self._positions:
+            return False
+        state = {symbol: strategy.state() for symbol, strategy in self.strategies.items()}
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(state, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".tmp", self.path)
+        self.saves += 1
+        self._pending = 0
+        self._positions = positions
+        return True
+
+    def flush(self):
+        """Write the bars evaluated since the last write, if any (a run that evaluated nothing keeps the old file)."""
+        if self._pending:
+            self.save(force=True)
+
+    def load(self):
+        """The saved {symbol: state}, or {} when there is no usable snapshot."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Ignoring unreadable snapshot {self.path}: {e}")
+            return {}
+
+    def restore(self, trading_client, now):
+        """Reload the snapshot and reconcile it with `trading_client.get_all_positions()`.
+
+        Returns the symbols whose indicators were restored (their latest bar
+        has already been evaluated). Prints one line per adjustment.
+        """
+        saved = self.load()
+        warm = []
+        for symbol, strategy in self.strategies.items():
+            state = saved.get(symbol)
+            if state is None:
+                continue
+            fresh = state["params"] == strategy.params and _fresh(state, strategy, now)
+            strategy.load_state(state, indicators=fresh)
+            if fresh:
+                warm.append(symbol)
+            print(f"💾 {symbol}: restored {'indicators and ' if fresh else ''}position "
+                  f"(in_position={strategy.in_position}) from {self.path}")
+
+        positions = {position.symbol: position for position in trading_client.get_all_positions()}
+        for symbol, strategy in self.strategies.items():
+            position = positions.get(symbol)
+            qty = float(position.qty) if position is not None else 0.0
+            avg_entry_price = getattr(position, "avg_entry_price", None)
+            change = strategy.sync_position(qty, float(avg_entry_price) if avg_entry_price else None)
+            if change:
+                print(f"🔄 {change}")
+        return warm
+
+
+def _fresh(state, strategy, now):
+    """True if the snapshot's last bar is recent enough for a gap-only fetch."""
+    timestamps = state["window"]["timestamp"]
+    if not timestamps or state["indicators"]["latest"] is None:
+        return False
+    window = strategy.window
+    last = pd.Timestamp(timestamps[-1], tz="UTC")
+    return last >= pd.Timestamp(now) - window.bar_interval * window.maxlen
@@ -0,0 +1,205 @@
+from datetime import datetime, timezone
+
+from alpaca.data.timeframe import TimeFrame
+
+from trading.bar_window import RollingBarWindow
+from trading.incremental import StrategyIndicators
+from trading.resampler import WARM_UP, MultiTimeframe
+
+# Column layout of the strat_<SYMBOL>_<timestamp>.csv audit files
+AUDIT_COLUMNS = [
+    "timestamp", "close", "vwap", "macd", "macd_signal", "bb_upper", "bb_lower", "atr", "atr_median",
+    "buy_condition_1", "buy_condition_2", "buy_condition_3", "buy_condition_4", "buy_signal",
+    "sell_condition_1", "sell_condition_2", "sell_condition_3", "sell_condition_4", "sell_signal",
+    "in_position", "entry_price", "highest_price_since_entry",
+]
+# Appended when the strategy runs with a higher-timeframe confirmation
+CONFIRM_COLUMNS = ["confirm_buy", "confirm_sell"]
+
+
+# =============================================
+# 🧠 BB / MACD / ATR / VWAP scalping strategy
+# =============================================
+class SymbolStrategy:
+    """Per-symbol state and decision logic of universal-strat-run.py.
+
+    Holds the rolling bar window, the incremental indicators and the position
+    flags for one symbol. Order submission, emails and logging stay with the
+    caller so one process can drive many symbols.
+
+    With `confirm_timeframe` (e.g. "15m") the minute bars are also resampled
+    to that timeframe, and a buy/sell signal additionally needs its MACD to
+    agree (macd > signal to buy, < to sell). `warm_up()` fills it from the
+    bar store first.
+    """
+
+    def __init__(self, symbol, position_size, lookback_bars=120, trailing_stop=0.985, confirm_timeframe=None,
+                 **indicator_params):
+        self.symbol = symbol
+        self.position_size = position_size
+        self.trailing_stop = trailing_stop
+        self.window = RollingBarWindow(symbol, maxlen=lookback_bars)
+        self.indicators = StrategyIndicators(**indicator_params)
+        self.params = dict(indicator_params, lookback_bars=lookback_bars, trailing_stop=trailing_stop)
+        self.confirm_timeframe = confirm_timeframe
+        self.timeframes = None
+        if confirm_timeframe:
+            self.timeframes = MultiTimeframe((confirm_timeframe,))
+            self.params["confirm_timeframe"] = confirm_timeframe
+
+        self.in_position = False
+        self.entry_price = None
+        self.highest_price_since_entry = None
+        self.trailing_stop_trigger = None
+
+    @property
+    def latest(self):
+        return self.indicators.latest
+
+    def add_bars(self, bars):
+        for bar in bars:
+            self.indicators.update(bar)
+            if self.timeframes is not None:
+                self.timeframes.update(bar)
+
+    def warm_up(self, store, now=None):
+        """Feed the confirmation timeframe from the bar store's minute bars (cached after the first run)."""
+        if self.timeframes is None:
+            return 0
+        now = now or datetime.now(timezone.utc)
+        bars = store.bars(self.symbol, TimeFrame.Minute, now - WARM_UP[self.confirm_timeframe], now)
+        self.timeframes.warm_up(bars, self.symbol)
+        return len(bars["close"])
+
+    def check_conditions(self):
+        """Buy/sell conditions on the latest bar, as an audit row (position fields as of before any order)."""
+        latest = self.latest
+
+        row = dict(latest)
+        row["buy_condition_1"] = latest['close'] > latest['vwap']
+        row["buy_condition_2"] = latest['macd'] > latest['macd_signal']
+        row["buy_condition_3"] = latest['close'] < latest['bb_lower']
+        row["buy_condition_4"] = latest['atr'] > latest['atr_median']
+        row["buy_signal"] = (row["buy_condition_1"] and row["buy_condition_2"]
+                             and row["buy_condition_3"] and row["buy_condition_4"])
+
+        row["sell_condition_1"] = latest['close'] < latest['vwap']
+        row["sell_condition_2"] = latest['macd'] < latest['macd_signal']
+        row["sell_condition_3"] = latest['close'] > latest['bb_upper']
+        row["sell_condition_4"] = latest['atr'] > latest['atr_median']
+        row["sell_signal"] = (row["sell_condition_1"] and row["sell_condition_2"]
+                              and row["sell_condition_3"] and row["sell_condition_4"])
+
+        if self.timeframes is not None:
+            row["confirm_timeframe"] = self.confirm_timeframe
+            row["confirm_buy"] = self.timeframes.confirms(self.confirm_timeframe, "BUY")
+            row["confirm_sell"] = self.timeframes.confirms(self.confirm_timeframe, "SELL")
+            row["buy_signal"] = row["buy_signal"] and row["confirm_buy"]
+            row["sell_signal"] = row["sell_signal"] and row["confirm_sell"]
+
+        row["in_position"] = self.in_position
+        row["entry_price"] = self.entry_price if self.entry_price else ""
+        row["highest_price_since_entry"] = self.highest_price_since_entry if self.highest_price_since_entry else ""
+        return row
+
+    def decide(self, row):
+        """Update position state for this bar; returns "BUY", "TRAILING_STOP", "SELL", "HOLD" or None."""
+        close = row['close']
+
+        if row["buy_signal"] and not self.in_position:
+            self.in_position = True
+            self.entry_price = close
+            self.highest_price_since_entry = close
+            self.trailing_stop_trigger = close * self.trailing_stop
+            return "BUY"
+
+        if not self.in_position:
+            return None
+
+        if self.highest_price_since_entry is None:  # position adopted from the broker before any bar
+            self.highest_price_since_entry = close
+        self.highest_price_since_entry = max(self.highest_price_since_entry, close)
+        self.trailing_stop_trigger = self.highest_price_since_entry * self.trailing_stop
+
+        if close <= self.trailing_stop_trigger:
+            self._flatten()
+            return "TRAILING_STOP"
+        if row["sell_signal"]:
+            self._flatten()
+            return "SELL"
+        return "HOLD"
+
+    def _flatten(self):
+        self.in_position = False
+        self.entry_price = None
+        self.highest_price_since_entry = None
+
+    # ----- warm restart -----
+    def state(self):
+        """Position flags, the last bar and indicator state as plain JSON-able data.
+
+        The indicators carry the history, so of the bar window only the last
+        bar is kept: a restore needs it to skip bars already seen and to
+        fetch just the ones missed.
+        """
+        state = {
+            "params": self.params,
+            "in_position": self.in_position,
+            "entry_price": self.entry_price,
+            "highest_price_since_entry": self.highest_price_since_entry,
+            "trailing_stop_trigger": self.trailing_stop_trigger,
+            "window": self.window.state(tail=1),
+            "indicators": self.indicators.state(),
+        }
+        if self.timeframes is not None:
+            state["timeframes"] = self.timeframes.state()
+        return state
+
+    def load_state(self, state, indicators=True):
+        """Restore a `state()`; with indicators=False only the position flags come back."""
+        self.in_position = state["in_position"]
+        self.entry_price = state["entry_price"]
+        self.highest_price_since_entry = state["highest_price_since_entry"]
+        self.trailing_stop_trigger = state["trailing_stop_trigger"]
+        if indicators:
+            self.window.load_state(state["window"])
+            self.indicators.load_state(state["indicators"])
+            if self.timeframes is not None:
+                self.timeframes.load_state(state["timeframes"])
+
+    def sync_position(self, qty, avg_entry_price=None):
+        """Line the position flags up with the broker's `qty` of this symbol; returns what changed, or None."""
+        if qty > 0 and not self.in_position:
+            self.in_position = True
+            self.entry_price = avg_entry_price or (self.latest['close'] if self.latest else None)
+            self.highest_price_since_entry = self.entry_price
+            if self.entry_price is not None and self.latest:
+                self.highest_price_since_entry = max(self.entry_price, self.latest['close'])
+            entry = f" from ${self.entry_price:.2f}" if self.entry_price is not None else ""
+            return f"broker holds {qty:g} {self.symbol}, resuming in position{entry}"
+        if qty <= 0 and self.in_position:
+            self._flatten()
+            self.trailing_stop_trigger = None
+            return f"no {self.symbol} position at the broker, clearing in_position"
+        return None
+
+
+def format_conditions(row):
+    """Condition breakdown printed by universal-strat-run.py on every check."""
+    return "\n".join([
+        f"\n🔍 Conditions Check at {row['timestamp']}:",
+        f"  BUY Conditions:",
+        f"   1) Close > VWAP: {row['buy_condition_1']} ({row['close']:.2f} > {row['vwap']:.2f})",
+        f"   2) MACD > MACD Signal: {row['buy_condition_2']} ({row['macd']:.4f} > {row['macd_signal']:.4f})",
+        f"   3) Close < BB Lower: {row['buy_condition_3']} ({row['close']:.2f} < {row['bb_lower']:.2f})",
+        f"   4) ATR > ATR Median: {row['buy_condition_4']} ({row['atr']:.4f} > {row['atr_median']:.4f})",
+        *([f"   +) {row['confirm_timeframe']} MACD > Signal: {row['confirm_buy']}"] if "confirm_buy" in row else []),
+        f"  => BUY Signal: {row['buy_signal']}",
+        f"  SELL Conditions:",
+        f"   1) Close < VWAP: {row['sell_condition_1']} ({row['close']:.2f} < {row['vwap']:.2f})",
+        f"   2) MACD < MACD Signal: {row['sell_condition_2']} ({row['macd']:.4f} < {row['macd_signal']:.4f})",
+        f"   3) Close > BB Upper: {row['sell_condition_3']} ({row['close']:.2f} > {row['bb_upper']:.2f})",
+        f"   4) ATR > ATR Median: {row['sell_condition_4']} ({row['atr']:.4f} > {row['atr_median']:.4f})",
+        *([f"   +) {row['confirm_timeframe']} MACD < Signal: {row['confirm_sell']}"] if "confirm_sell" in row else []),
+        f"  => SELL Signal: {row['sell_signal']}\n",
+    ])
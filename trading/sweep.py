@@ -0,0 +1,155 @@
+import itertools
+import os
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+import pandas as pd
+
+from trading import indicators
+from trading.backtest import run_backtest, summarize
+
+SWEEP_FIELDS = ["high", "low", "close", "volume"]
+
+# Condition families each exit rule ANDs together; every rule buys on all four
+SELL_RULES = {
+    "all": ("bb", "macd", "atr", "vwap"),  # universal-strat-run
+    "bb_macd": ("bb", "macd"),             # scalp-btc: upper band and bearish MACD only
+}
+
+# Strategy constants currently hard-coded across the scripts, as one grid each
+UNIVERSAL_PARAMS = dict(bb_window=10, bb_dev=1.5, macd_fast=9, macd_slow=21, macd_sign=7,
+                        atr_window=5, atr_median_window=50, vwap_window=30, trailing_stop=0.985,
+                        sell_rule="all")
+SCALP_BTC_PARAMS = dict(bb_window=20, bb_dev=2, macd_fast=12, macd_slow=26, macd_sign=9,
+                        atr_window=5, atr_median_window=15, vwap_window=15, trailing_stop=0.995,
+                        sell_rule="bb_macd")
+
+
+def parameter_grid(**choices):
+    """Every combination of the given value lists, skipping MACD fast >= slow.
+
+    Keys are expanded in the order given, so put the most expensive
+    indicators first and neighbouring combinations share them.
+    """
+    keys = list(choices)
+    grid = []
+    for values in itertools.product(*(choices[key] for key in keys)):
+        params = dict(zip(keys, values))
+        if params["macd_fast"] >= params["macd_slow"]:
+            continue
+        grid.append(params)
+    return grid
+
+
+def _condition_specs(params):
+    """The four buy/sell condition families a parameter set depends on."""
+    return [
+        ("bb", params["bb_window"], params["bb_dev"]),
+        ("macd", params["macd_fast"], params["macd_slow"], params["macd_sign"]),
+        ("atr", params["atr_window"], params["atr_median_window"], params.get("atr_quantile", 0.5)),
+        ("vwap", params["vwap_window"]),
+    ]
+
+
+# =============================================
+# 🧵 Worker side (bars + condition masks live in shared memory)
+# =============================================
+_shared = {}
+
+
+def _attach(name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared.setdefault("blocks", []).append(shm)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(bars_name, n_bars, masks_name, n_masks, slots):
+    bars = _attach(bars_name, (len(SWEEP_FIELDS), n_bars), np.float64)
+    _shared["bars"] = {field: bars[i] for i, field in enumerate(SWEEP_FIELDS)}
+    _shared["masks"] = _attach(masks_name, (n_masks, n_bars), np.bool_)
+    _shared["slots"] = slots
+
+
+def _fill_condition(spec):
+    """Compute one indicator family once and write its buy/sell masks into shared memory."""
+    bars = _shared["bars"]
+    close = bars["close"]
+    kind = spec[0]
+    with np.errstate(invalid="ignore"):  # warm-up NaNs compare False, as with pandas
+        if kind == "bb":
+            _, upper, lower = indicators.bollinger_bands(close, window=spec[1], window_dev=spec[2])
+            buy, sell = close < lower, close > upper
+        elif kind == "macd":
+            line, signal, _ = indicators.macd(close, window_fast=spec[1], window_slow=spec[2], window_sign=spec[3])
+            buy, sell = line > signal, line < signal
+        elif kind == "atr":
+            atr = indicators.average_true_range(bars["high"], bars["low"], close, window=spec[1])
+            if spec[3] == 0.5:
+                threshold = indicators.rolling_median(atr, spec[2])
+            else:
+                threshold = indicators.rolling_quantile(atr, spec[2], spec[3])
+            buy = sell = atr > threshold
+        else:
+            vwap = indicators.volume_weighted_average_price(bars["high"], bars["low"], close, bars["volume"], window=spec[1])
+            buy, sell = close > vwap, close < vwap
+
+    buy_slot, sell_slot = _shared["slots"][spec]
+    _shared["masks"][buy_slot] = buy
+    _shared["masks"][sell_slot] = sell
+
+
+def _evaluate(params):
+    masks, slots = _shared["masks"], _shared["slots"]
+    specs = _condition_specs(params)
+    sell_families = SELL_RULES[params.get("sell_rule", "all")]
+    buy_slots = [slots[spec][0] for spec in specs]
+    sell_slots = [slots[spec][1] for spec in specs if spec[0] in sell_families]
+    buy = np.logical_and.reduce(masks[buy_slots])
+    sell = np.logical_and.reduce(masks[sell_slots])
+    trades = run_backtest(_shared["bars"]["close"], buy, sell, trailing_stop=params["trailing_stop"])
+    return {**params, **summarize(trades)}
+
+
+# =============================================
+# 🔬 Parameter sweep
+# =============================================
+def _copy_bars(shm, bars, n_bars):
+    shared_bars = np.ndarray((len(SWEEP_FIELDS), n_bars), dtype=np.float64, buffer=shm.buf)
+    for i, field in enumerate(SWEEP_FIELDS):
+        shared_bars[i] = np.asarray(bars[field], dtype=float)
+
+
+def sweep(bars, grid, workers=None):
+    """Backtest every parameter set in `grid` on `bars` across a process pool.
+
+    `bars` is anything with high/low/close/volume columns (a bar store
+    frame or `BarStore.read()` output). The bar columns are copied once
+    into shared memory that every worker maps. Each distinct indicator
+    setting (e.g. one MACD triple) is computed once, also in parallel, and
+    stored as boolean buy/sell masks in a second shared block; evaluating a
+    parameter set is then a few mask ANDs plus a vectorized backtest. A
+    `sell_rule` key picks which families the exit ANDs (see `SELL_RULES`).
+
+    Returns one row per parameter set with its stats, best total PnL first.
+    """
+    workers = workers or os.cpu_count()
+    n_bars = len(bars["close"])
+
+    specs = sorted({spec for params in grid for spec in _condition_specs(params)}, key=str)
+    slots = {spec: (2 * i, 2 * i + 1) for i, spec in enumerate(specs)}
+
+    bars_shm = shared_memory.SharedMemory(create=True, size=len(SWEEP_FIELDS) * n_bars * 8)
+    masks_shm = shared_memory.SharedMemory(create=True, size=max(2 * len(specs) * n_bars, 1))
+    try:
+        _copy_bars(bars_shm, bars, n_bars)
+        initargs = (bars_shm.name, n_bars, masks_shm.name, 2 * len(specs), slots)
+        with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            pool.map(_fill_condition, specs, chunksize=1)
+            chunksize = max(1, len(grid) // (workers * 8))
+            results = pool.map(_evaluate, grid, chunksize=chunksize)
+    finally:
+        for shm in (bars_shm, masks_shm):
+            shm.close()
+            shm.unlink()
+
+    return pd.DataFrame(results).sort_values("total_pnl", ascending=False, ignore_index=True)
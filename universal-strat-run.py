@@ -1,24 +1,21 @@
 import os
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 import pytz
-import pandas as pd
 from dotenv import load_dotenv
 
 from alpaca.data.historical import StockHistoricalDataClient
-from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 from alpaca.trading.enums import OrderSide, TimeInForce
 
-from ta.trend import MACD
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.volume import VolumeWeightedAveragePrice
-
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from trading.bar_window import fetch_new_bars
+from trading.strategy import SymbolStrategy, format_conditions, AUDIT_COLUMNS
+from trading.audit_log import AuditWriter
+from trading.scheduler import BarScheduler
+from trading.notifier import EmailNotifier
+from trading.snapshot import StrategySnapshot
 
 # =============================================
 # 🔐 Load credentials
@@ -42,36 +39,53 @@ POSITION_SIZE = 25
 TIMEFRAME = TimeFrame.Minute
 TIMEZONE = pytz.timezone("America/New_York")
 
-in_position = False
-highest_price_since_entry = None
-entry_price = None
+LOOKBACK_BARS = 120
+SETTLE_SECONDS = 2.0  # wait this long after each minute boundary for the bar to be published
 
 # =============================================
 # 📑 AUDIT LOG SETUP
 # =============================================
-audit_log = []
-start_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-audit_filename = f"strat_{SYMBOL}_{start_timestamp}.csv"
+# Rows are appended to strat_<SYMBOL>_<timestamp>.csv in small batches as we go
+audit_log = AuditWriter(f"strat_{SYMBOL}", AUDIT_COLUMNS)
 
 # =============================================
 # 📡 Alpaca clients
 # =============================================
-data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET)
-trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True)
+data_client = StockHistoricalDataClient(DATA_KEY, DATA_SECRET, url_override=os.getenv("ALPACA_API_URL"))
+trading_client = TradingClient(TRADE_KEY, TRADE_SECRET, paper=True, url_override=os.getenv("ALPACA_API_URL"))
+
+# BB(10, 1.5) / MACD(9, 21, 7) / ATR(5) / ATR median(50) / VWAP(30), 1.5% trailing stop
+strategy = SymbolStrategy(
+    SYMBOL, POSITION_SIZE, lookback_bars=LOOKBACK_BARS, trailing_stop=0.985,
+    bb_window=10, bb_dev=1.5, macd_fast=9, macd_slow=21, macd_sign=7,
+    atr_window=5, atr_median_window=50, vwap_window=30
+)
+
+# Wakes once per bar, never evaluates the same bar twice, logs per-tick latency
+scheduler = BarScheduler(settle_seconds=SETTLE_SECONDS, latency_prefix=f"latency_{SYMBOL}")
+
+# =============================================
+# 💾 Warm restart
+# =============================================
+# Position flags + indicator state are saved to state_<SYMBOL>.json every 10 bars,
+# and right away whenever the position changes.
+# A restarted process reloads them, checks them against the broker and only
+# fetches the bars it missed while it was down.
+snapshot = StrategySnapshot(f"state_{SYMBOL}.json", {SYMBOL: strategy})
+try:
+    if snapshot.restore(trading_client, datetime.now(timezone.utc)):
+        scheduler.is_new_bar(strategy.latest['timestamp'])  # evaluated before the restart
+except Exception as e:
+    print(f"⚠️ Could not reconcile with broker positions: {e}")
 
 # =============================================
 # 📧 Email helper
 # =============================================
+# Queued and sent from a background thread; the loop never waits on SMTP
+notifier = EmailNotifier(EMAIL_USER, EMAIL_PASSWORD, EMAIL_RECEIVER)
+
 def send_trade_email(subject, body):
-    msg = MIMEMultipart()
-    msg['From'] = EMAIL_USER
-    msg['To'] = EMAIL_RECEIVER
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-    with smtplib.SMTP("smtp.gmail.com", 587) as server:
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.sendmail(EMAIL_USER, EMAIL_RECEIVER, msg.as_string())
+    notifier.send(subject, body)
 
 # =============================================
 # 🔁 LIVE HFT Loop
@@ -93,105 +107,37 @@ try:
             print("✅ Market closed. Exiting loop.")
             break
 
-        # 📈 Fetch market data
+        # 📈 Fetch only the bars we are missing
         utc_now = datetime.now(timezone.utc)
-        start = utc_now - timedelta(minutes=120)
-
-        request = StockBarsRequest(
-            symbol_or_symbols=[SYMBOL],
-            timeframe=TIMEFRAME,
-            start=start.isoformat(),
-            end=utc_now.isoformat(),
-            feed="iex"
-        )
-
-        bars = data_client.get_stock_bars(request).data.get(SYMBOL)
-        if not bars or len(bars) == 0:
-            print(f"⚠️ No data returned for {SYMBOL}. Retrying in 60 seconds...")
-            time.sleep(60)
-            continue
+        new_bars = fetch_new_bars(data_client, {SYMBOL: strategy.window}, utc_now, timeframe=TIMEFRAME)[SYMBOL]
+        scheduler.mark("data")
 
-        df = pd.DataFrame([bar.model_dump() for bar in bars])
-        df['time'] = pd.to_datetime(df['timestamp'])
-        df.set_index('time', inplace=True)
+        # 🧮 Indicators: feed only the new bars
+        strategy.add_bars(new_bars)
 
-        # 🧮 Indicators
-        bb = BollingerBands(close=df['close'], window=10, window_dev=1.5)
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_lower'] = bb.bollinger_lband()
-
-        macd = MACD(close=df['close'], window_fast=9, window_slow=21, window_sign=7)
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-
-        atr = AverageTrueRange(high=df['high'], low=df['low'], close=df['close'], window=5)
-        df['atr'] = atr.average_true_range()
-        atr_median = df['atr'].rolling(window=50).median()
-
-        vwap = VolumeWeightedAveragePrice(
-            high=df['high'], low=df['low'], close=df['close'], volume=df['volume'], window=30
-        )
-        df['vwap'] = vwap.volume_weighted_average_price()
+        latest = strategy.latest
+        if latest is None:
+            print(f"⚠️ No data returned for {SYMBOL}. Retrying next bar...")
+            scheduler.wait()
+            continue
 
-        latest = df.iloc[-1]
+        if not scheduler.is_new_bar(latest['timestamp']):
+            print(f"⏱️ No new bar since {latest['timestamp']}. Waiting for the next one...")
+            scheduler.wait()
+            continue
 
         # ✅ Signal conditions
-        buy_condition_1 = latest['close'] > latest['vwap']
-        buy_condition_2 = latest['macd'] > latest['macd_signal']
-        buy_condition_3 = latest['close'] < latest['bb_lower']
-        buy_condition_4 = latest['atr'] > atr_median.iloc[-1]
-        buy_signal = buy_condition_1 and buy_condition_2 and buy_condition_3 and buy_condition_4
-
-        sell_condition_1 = latest['close'] < latest['vwap']
-        sell_condition_2 = latest['macd'] < latest['macd_signal']
-        sell_condition_3 = latest['close'] > latest['bb_upper']
-        sell_condition_4 = latest['atr'] > atr_median.iloc[-1]
-        sell_signal = sell_condition_1 and sell_condition_2 and sell_condition_3 and sell_condition_4
-
-        # ✅ Log condition breakdown
-        print(f"\n🔍 Conditions Check at {latest.name}:")
-        print(f"  BUY Conditions:")
-        print(f"   1) Close > VWAP: {buy_condition_1} ({latest['close']:.2f} > {latest['vwap']:.2f})")
-        print(f"   2) MACD > MACD Signal: {buy_condition_2} ({latest['macd']:.4f} > {latest['macd_signal']:.4f})")
-        print(f"   3) Close < BB Lower: {buy_condition_3} ({latest['close']:.2f} < {latest['bb_lower']:.2f})")
-        print(f"   4) ATR > ATR Median: {buy_condition_4} ({latest['atr']:.4f} > {atr_median.iloc[-1]:.4f})")
-        print(f"  => BUY Signal: {buy_signal}")
-
-        print(f"  SELL Conditions:")
-        print(f"   1) Close < VWAP: {sell_condition_1} ({latest['close']:.2f} < {latest['vwap']:.2f})")
-        print(f"   2) MACD < MACD Signal: {sell_condition_2} ({latest['macd']:.4f} < {latest['macd_signal']:.4f})")
-        print(f"   3) Close > BB Upper: {sell_condition_3} ({latest['close']:.2f} > {latest['bb_upper']:.2f})")
-        print(f"   4) ATR > ATR Median: {sell_condition_4} ({latest['atr']:.4f} > {atr_median.iloc[-1]:.4f})")
-        print(f"  => SELL Signal: {sell_signal}\n")
+        row = strategy.check_conditions()
+        print(format_conditions(row))
 
         # 📑 Append audit log row
-        audit_log.append({
-            "timestamp": latest.name,
-            "close": latest['close'],
-            "vwap": latest['vwap'],
-            "macd": latest['macd'],
-            "macd_signal": latest['macd_signal'],
-            "bb_upper": latest['bb_upper'],
-            "bb_lower": latest['bb_lower'],
-            "atr": latest['atr'],
-            "atr_median": atr_median.iloc[-1],
-            "buy_condition_1": buy_condition_1,
-            "buy_condition_2": buy_condition_2,
-            "buy_condition_3": buy_condition_3,
-            "buy_condition_4": buy_condition_4,
-            "buy_signal": buy_signal,
-            "sell_condition_1": sell_condition_1,
-            "sell_condition_2": sell_condition_2,
-            "sell_condition_3": sell_condition_3,
-            "sell_condition_4": sell_condition_4,
-            "sell_signal": sell_signal,
-            "in_position": in_position,
-            "entry_price": entry_price if entry_price else "",
-            "highest_price_since_entry": highest_price_since_entry if highest_price_since_entry else ""
-        })
+        audit_log.append(row)
+
+        action = strategy.decide(row)
+        scheduler.mark("decision")
 
         # ✅ BUY order
-        if buy_signal and not in_position:
+        if action == "BUY":
             order = MarketOrderRequest(
                 symbol=SYMBOL,
                 qty=POSITION_SIZE,
@@ -199,72 +145,66 @@ try:
                 time_in_force=TimeInForce.DAY
             )
             trading_client.submit_order(order)
-            in_position = True
-            entry_price = latest['close']
-            highest_price_since_entry = latest['close']
+            scheduler.mark("order_ack")
 
-            print(f"✅ BUY executed at {latest.name} - ${latest['close']:.2f}")
+            print(f"✅ BUY executed at {latest['timestamp']} - ${latest['close']:.2f}")
 
             send_trade_email(
                 f"✅ BUY Executed: {SYMBOL}",
-                f"BUY Order\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
+                f"BUY Order\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
             )
 
         # ✅ Manage open position
-        if in_position:
-            highest_price_since_entry = max(highest_price_since_entry, latest['close'])
-            trailing_stop_trigger = highest_price_since_entry * 0.985
-
-            if latest['close'] <= trailing_stop_trigger:
-                order = MarketOrderRequest(
-                    symbol=SYMBOL,
-                    qty=POSITION_SIZE,
-                    side=OrderSide.SELL,
-                    time_in_force=TimeInForce.DAY
-                )
-                trading_client.submit_order(order)
-                in_position = False
-                entry_price = None
-                highest_price_since_entry = None
-
-                print(f"🚨 TRAILING STOP triggered at {latest.name} - ${latest['close']:.2f}")
-
-                send_trade_email(
-                    f"🚨 Trailing Stop SELL: {SYMBOL}",
-                    f"Trailing Stop Triggered\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
-                )
-
-            elif sell_signal:
-                order = MarketOrderRequest(
-                    symbol=SYMBOL,
-                    qty=POSITION_SIZE,
-                    side=OrderSide.SELL,
-                    time_in_force=TimeInForce.DAY
-                )
-                trading_client.submit_order(order)
-                in_position = False
-                entry_price = None
-                highest_price_since_entry = None
-
-                print(f"❌ SELL signal executed at {latest.name} - ${latest['close']:.2f}")
-
-                send_trade_email(
-                    f"❌ SELL Executed: {SYMBOL}",
-                    f"SELL Order\nTime: {latest.name}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
-                )
-
-            else:
-                print(f"⏱️ Holding | Price: ${latest['close']:.2f} | Highest: ${highest_price_since_entry:.2f} | Trailing Stop: ${trailing_stop_trigger:.2f}\n")
-
-        elif not in_position:
-            print(f"⏱️ No trade at {latest.name} | In Position: {in_position}")
-
-        time.sleep(60)
+        elif action == "TRAILING_STOP":
+            order = MarketOrderRequest(
+                symbol=SYMBOL,
+                qty=POSITION_SIZE,
+                side=OrderSide.SELL,
+                time_in_force=TimeInForce.DAY
+            )
+            trading_client.submit_order(order)
+            scheduler.mark("order_ack")
+
+            print(f"🚨 TRAILING STOP triggered at {latest['timestamp']} - ${latest['close']:.2f}")
+
+            send_trade_email(
+                f"🚨 Trailing Stop SELL: {SYMBOL}",
+                f"Trailing Stop Triggered\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
+            )
+
+        elif action == "SELL":
+            order = MarketOrderRequest(
+                symbol=SYMBOL,
+                qty=POSITION_SIZE,
+                side=OrderSide.SELL,
+                time_in_force=TimeInForce.DAY
+            )
+            trading_client.submit_order(order)
+            scheduler.mark("order_ack")
+
+            print(f"❌ SELL signal executed at {latest['timestamp']} - ${latest['close']:.2f}")
+
+            send_trade_email(
+                f"❌ SELL Executed: {SYMBOL}",
+                f"SELL Order\nTime: {latest['timestamp']}\nPrice: ${latest['close']:.2f}\nQty: {POSITION_SIZE}"
+            )
+
+        elif action == "HOLD":
+            print(f"⏱️ Holding | Price: ${latest['close']:.2f} | Highest: ${strategy.highest_price_since_entry:.2f} | Trailing Stop: ${strategy.trailing_stop_trigger:.2f}\n")
+
+        else:
+            print(f"⏱️ No trade at {latest['timestamp']} | In Position: {strategy.in_position}")
+
+        snapshot.save()
+        scheduler.record(latest['timestamp'])
+        scheduler.wait()
 
 except Exception as e:
     print(f"⚠️ ERROR: {e}")
 
 finally:
-    audit_df = pd.DataFrame(audit_log)
-    audit_df.to_csv(audit_filename, index=False)
-    print(f"📑 Final audit log saved to {audit_filename}")
+    snapshot.flush()
+    audit_log.close()
+    scheduler.close()
+    print(f"📑 Final audit log saved to {audit_log.filename}")
+    print(f"⏲️ {scheduler.latency_summary()}")